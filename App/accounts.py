@@ -0,0 +1,20 @@
+from django.contrib.auth.models import User
+from django.db.models.functions import Lower
+
+
+# Both lookups compare lower(column) with a lowercased value, which the
+# auth_user_username_lower_idx / auth_user_email_lower_idx expression indexes
+# answer directly. username__iexact and email__iexact compile to UPPER()/LIKE
+# and scan the whole table instead.
+
+
+def users_with_username(username):
+    return User.objects.alias(username_lower=Lower("username")).filter(
+        username_lower=(username or "").strip().lower()
+    )
+
+
+def users_with_email(email):
+    return User.objects.alias(email_lower=Lower("email")).filter(
+        email_lower=(email or "").strip().lower()
+    )
@@ -1,5 +1,20 @@
 from django.contrib import admin
-from .models import AccountRegistration, ContactMessage, Order, Product, ProductRating, SiteAnnouncement
+from .announcements import invalidate_site_announcement
+from .catalog import invalidate_product_caches
+from .inventory import record_stock_change
+from .models import (
+    AccountRegistration,
+    BackgroundTask,
+    ContactMessage,
+    InventoryMovement,
+    InventorySnapshot,
+    LowStockAlert,
+    Order,
+    OutboundEmail,
+    Product,
+    ProductRating,
+    SiteAnnouncement,
+)
 
 
 @admin.register(AccountRegistration)
@@ -26,6 +41,26 @@ class ProductAdmin(admin.ModelAdmin):
     search_fields = ("name", "vin", "vendor__username", "vendor__email")
     readonly_fields = ("created_at", "updated_at")
 
+    def save_model(self, request, obj, form, change):
+        previous_stock = None
+        if change:
+            previous_stock = form.initial.get("current_stock")
+            if previous_stock is None:
+                previous_stock = form.initial.get("initial_stock")
+        super().save_model(request, obj, form, change)
+        record_stock_change(obj, previous_stock)
+        # A changed part number leaves entries under the old SKU as well.
+        invalidate_product_caches({obj.vin, form.initial.get("vin") or obj.vin})
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        invalidate_product_caches([obj.vin])
+
+    def delete_queryset(self, request, queryset):
+        skus = list(queryset.values_list("vin", flat=True))
+        super().delete_queryset(request, queryset)
+        invalidate_product_caches(skus)
+
 
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
@@ -35,6 +70,57 @@ class OrderAdmin(admin.ModelAdmin):
     readonly_fields = ("created_at",)
 
 
+@admin.register(InventoryMovement)
+class InventoryMovementAdmin(admin.ModelAdmin):
+    list_display = ("product", "vendor", "kind", "quantity", "stock_after", "order", "created_at")
+    list_filter = ("kind", "created_at")
+    search_fields = ("product__name", "product__vin", "vendor__username", "vendor__email")
+    list_select_related = ("product", "vendor", "order")
+    raw_id_fields = ("product", "vendor", "order")
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(InventorySnapshot)
+class InventorySnapshotAdmin(admin.ModelAdmin):
+    list_display = ("product", "vendor", "taken_on", "stock", "created_at")
+    list_filter = ("taken_on",)
+    search_fields = ("product__name", "product__vin", "vendor__username", "vendor__email")
+    list_select_related = ("product", "vendor")
+    readonly_fields = ("created_at",)
+
+
+@admin.register(LowStockAlert)
+class LowStockAlertAdmin(admin.ModelAdmin):
+    list_display = ("product", "vendor", "stock", "reorder_level", "created_at", "resolved_at")
+    list_filter = ("created_at", "resolved_at")
+    search_fields = ("product__name", "product__vin", "vendor__username", "vendor__email")
+    list_select_related = ("product", "vendor")
+    readonly_fields = ("created_at",)
+
+
+@admin.register(BackgroundTask)
+class BackgroundTaskAdmin(admin.ModelAdmin):
+    list_display = ("name", "status", "attempts", "max_attempts", "run_after", "updated_at")
+    list_filter = ("status", "name")
+    search_fields = ("name",)
+    readonly_fields = ("locked_by", "locked_at", "last_error", "created_at", "updated_at")
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ("subject", "to_email", "status", "attempts", "next_attempt_at", "sent_at")
+    list_filter = ("status", "created_at")
+    search_fields = ("to_email", "subject")
+    # Message bodies can carry personal details, so they stay out of the admin.
+    exclude = ("body", "password_reset_user")
+    readonly_fields = ("locked_by", "locked_at", "last_error", "created_at", "sent_at")
+
+
 @admin.register(ProductRating)
 class ProductRatingAdmin(admin.ModelAdmin):
     list_display = ("product", "user", "rating", "created_at")
@@ -42,6 +128,19 @@ class ProductRatingAdmin(admin.ModelAdmin):
     search_fields = ("product__name", "product__vin", "user__username", "user__email")
     readonly_fields = ("created_at", "updated_at")
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        invalidate_product_caches([obj.product.vin])
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        invalidate_product_caches([obj.product.vin])
+
+    def delete_queryset(self, request, queryset):
+        skus = list(queryset.values_list("product__vin", flat=True).distinct())
+        super().delete_queryset(request, queryset)
+        invalidate_product_caches(skus)
+
 
 @admin.register(ContactMessage)
 class ContactMessageAdmin(admin.ModelAdmin):
@@ -57,3 +156,15 @@ class SiteAnnouncementAdmin(admin.ModelAdmin):
     list_filter = ("updated_at",)
     search_fields = ("message",)
     readonly_fields = ("created_at", "updated_at")
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        invalidate_site_announcement()
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        invalidate_site_announcement()
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        invalidate_site_announcement()
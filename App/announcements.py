@@ -0,0 +1,45 @@
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import SiteAnnouncement
+
+
+SITE_ANNOUNCEMENT_VERSION_KEY = "site_announcement:version"
+
+# Per-process copy of the active announcement, tagged with the shared cache
+# version it was loaded under. Saving an announcement bumps the version so every
+# worker reloads it on its next request.
+_local_announcement = {"version": None, "message": ""}
+
+
+def _active_site_announcement_queryset():
+    return SiteAnnouncement.objects.only("message").order_by("-updated_at")
+
+
+def _remember(version, announcement):
+    message = announcement.message if announcement else ""
+    _local_announcement["version"] = version
+    _local_announcement["message"] = message
+    return message
+
+
+async def aget_active_site_announcement():
+    version = await cache.aget(SITE_ANNOUNCEMENT_VERSION_KEY)
+    if version is None:
+        await cache.aadd(SITE_ANNOUNCEMENT_VERSION_KEY, 1, None)
+        version = await cache.aget(SITE_ANNOUNCEMENT_VERSION_KEY)
+    if version is not None and version == _local_announcement["version"]:
+        return _local_announcement["message"]
+    return _remember(version, await _active_site_announcement_queryset().afirst())
+
+
+def _bump_site_announcement_version():
+    try:
+        cache.incr(SITE_ANNOUNCEMENT_VERSION_KEY)
+    except ValueError:
+        cache.set(SITE_ANNOUNCEMENT_VERSION_KEY, 1, None)
+    _local_announcement["version"] = None
+
+
+def invalidate_site_announcement():
+    transaction.on_commit(_bump_site_announcement_version)
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class AppConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = 'App'
+
+    def ready(self):
+        from .instrumentation import install_instrumentation
+
+        # Query wrappers are attached as each thread opens its connection, so the
+        # hook has to be in place before the first one; the middleware is only
+        # built on the first request, possibly on another thread.
+        install_instrumentation()
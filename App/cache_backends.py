@@ -0,0 +1,40 @@
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+
+from .metrics import record_cache_reads
+
+
+_MISSING = object()
+
+
+class MeteredCacheMixin:
+    # Counts hits and misses under the alias's METRICS_LABEL setting. get() is the
+    # read the other helpers (get_many, get_or_set and the async variants) fall
+    # back on, so overriding it counts each read once.
+    def __init__(self, location, params):
+        super().__init__(location, params)
+        self.metrics_label = str(params.get("METRICS_LABEL") or location)
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version=version)
+        hit = value is not _MISSING
+        record_cache_reads(self.metrics_label, hits=int(hit), misses=int(not hit))
+        return value if hit else default
+
+
+class MeteredLocMemCache(MeteredCacheMixin, LocMemCache):
+    pass
+
+
+class MeteredFileBasedCache(MeteredCacheMixin, FileBasedCache):
+    pass
+
+
+class MeteredRedisCache(MeteredCacheMixin, RedisCache):
+    # Redis answers get_many with one MGET instead of calling get() per key.
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        values = super().get_many(keys, version=version)
+        record_cache_reads(self.metrics_label, hits=len(values), misses=len(keys) - len(values))
+        return values
@@ -0,0 +1,522 @@
+import math
+from decimal import Decimal, InvalidOperation
+from urllib.parse import quote
+
+from django.core.cache import cache, caches
+from django.db.models import Avg, Count, FloatField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Substr
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+from .models import AccountRegistration, Product, ProductRating
+
+
+LOW_STOCK_BADGE_THRESHOLD = 5
+
+CATALOG_DEFAULT_PAGE_SIZE = 24
+CATALOG_MAX_PAGE_SIZE = 60
+# Page numbers past the last page are moved back to it once the count is known;
+# this cap only keeps absurd values away from the OFFSET arithmetic.
+CATALOG_MAX_PAGE = 10_000
+
+# Sort keys mirror the storefront's #sortBy options.
+CATALOG_SORT_ORDERS = {
+    "relevance": ("-created_at", "-id"),
+    "priceAsc": ("price", "-created_at", "-id"),
+    "priceDesc": ("-price", "-created_at", "-id"),
+    "ratingDesc": ("-rating_avg", "-created_at", "-id"),
+    "stockDesc": ("-current_stock", "-created_at", "-id"),
+}
+
+# (lower bound inclusive, upper bound exclusive) in ETB; None means unbounded.
+CATALOG_PRICE_BUCKETS = (
+    (Decimal("0"), Decimal("500")),
+    (Decimal("500"), Decimal("1000")),
+    (Decimal("1000"), Decimal("5000")),
+    (Decimal("5000"), None),
+)
+
+# Minimum average rating for each "N & up" band.
+CATALOG_RATING_BANDS = (4.5, 4.0, 3.0)
+
+CATALOG_STOCK_MODES = ("All", "In", "Low")
+
+PRODUCT_LOOKUP_MAX_SKUS = 50
+PRODUCT_LOOKUP_CACHE_TIMEOUT = 30
+PRODUCT_LOOKUP_CACHE_PREFIX = "product_lookup:"
+
+PRODUCT_DETAIL_CACHE_TIMEOUT = 300
+PRODUCT_DETAIL_CACHE_PREFIX = "product_detail:"
+
+SHOP_CARD_SUMMARY_WORDS = 12
+# Enough characters for SHOP_CARD_SUMMARY_WORDS typical words without reading
+# the whole (up to 500 character) description.
+SHOP_CARD_SUMMARY_CHARS = 120
+
+# Rendered cards are keyed by the product's version, so a stale entry is never
+# read again and each process can keep them in its own memory ("fragments"
+# cache). The timeout only bounds how long seller name and photo changes (which
+# do not touch the product row) take to show.
+PRODUCT_CARD_CACHE_ALIAS = "fragments"
+PRODUCT_CARD_CACHE_TIMEOUT = 86400
+PRODUCT_CARD_CACHE_PREFIX = "product_card:v1:"
+PRODUCT_CARD_TEMPLATE = "partials/product_card.html"
+PRODUCT_CARD_AOS_STEP_MS = 60
+PRODUCT_CARD_AOS_ROW = 6
+
+SHOP_LISTING_COLUMNS = (
+    "vin",
+    "name",
+    "category",
+    "price",
+    "current_stock",
+    "product_image",
+    "updated_at",
+    "vendor__username",
+    "vendor__first_name",
+    "vendor__last_name",
+    "vendor__account_registration__profile_picture",
+)
+
+
+def shop_products_queryset(category_name=None, search_term=None):
+    filters = {
+        "is_active": True,
+        "current_stock__gt": 0,
+        "vendor__is_active": True,
+        "vendor__account_registration__is_verified": True,
+    }
+    if category_name:
+        filters["category"] = category_name
+    if search_term:
+        term = search_term.strip()
+        if term:
+            filters["name__isnull"] = False
+
+    queryset = (
+        Product.objects.filter(
+            **filters
+        )
+        .filter(
+            Q(vin__icontains=search_term) |
+            Q(name__icontains=search_term) |
+            Q(category__icontains=search_term)
+            if search_term
+            else Q()
+        )
+        .annotate(
+            rating_avg=Coalesce(
+                Avg("ratings__rating"),
+                Value(0.0),
+                output_field=FloatField(),
+            ),
+            rating_count=Coalesce(Count("ratings", distinct=True), 0),
+        )
+    )
+    return with_listing_columns(queryset).order_by("-created_at")
+
+
+def with_listing_columns(queryset, *extra_columns):
+    # The listing projection carries only what a product card shows. The full
+    # description is fetched per SKU by the detail endpoint when a shopper opens it.
+    return (
+        queryset.select_related("vendor", "vendor__account_registration")
+        .annotate(description_head=Substr("description", 1, SHOP_CARD_SUMMARY_CHARS))
+        .only(*SHOP_LISTING_COLUMNS, *extra_columns)
+    )
+
+
+def seller_display_name(first_name, last_name, username):
+    return f"{first_name or ''} {last_name or ''}".strip() or username
+
+
+def shop_card_summary(text):
+    text = text or ""
+    words = text.split()
+    truncated = len(text) >= SHOP_CARD_SUMMARY_CHARS
+    if truncated and len(words) > 1 and not text[-1].isspace():
+        # The description head may end part-way through a word.
+        words = words[:-1]
+    if len(words) > SHOP_CARD_SUMMARY_WORDS:
+        words = words[:SHOP_CARD_SUMMARY_WORDS]
+        truncated = True
+    summary = " ".join(words)
+    return f"{summary}...." if truncated else summary
+
+
+def serialize_shop_product(product):
+    image_url = product.product_image.url if product.product_image else ""
+    stock = product.current_stock if product.current_stock is not None else 0
+    seller_photo = ""
+    try:
+        account = product.vendor.account_registration
+        if account and account.profile_picture:
+            seller_photo = account.profile_picture.url
+    except AccountRegistration.DoesNotExist:
+        seller_photo = ""
+
+    stock_badges = []
+    if stock <= LOW_STOCK_BADGE_THRESHOLD:
+        stock_badges.append("Low Stock")
+
+    return {
+        "sku": product.vin,
+        "name": product.name,
+        "category": product.category,
+        "brand": product.vendor.get_full_name().strip() or product.vendor.username,
+        "seller_photo": seller_photo,
+        "owner_id": product.vendor_id,
+        "condition": "New",
+        "rating": float(product.rating_avg or 0),
+        "reviews": int(product.rating_count or 0),
+        "price": float(product.price),
+        "stock": stock,
+        "badges": stock_badges,
+        "oem": product.vin,
+        "img": image_url,
+        "summary": shop_card_summary(product.description_head),
+    }
+
+
+def shop_card_version(product):
+    # Stock, price and detail edits all bump updated_at; ratings only change the
+    # annotated average and count.
+    updated = int(product.updated_at.timestamp() * 1_000_000) if product.updated_at else 0
+    return f"{updated}-{int(product.rating_count or 0)}-{float(product.rating_avg or 0):.4f}"
+
+
+def rating_star_classes(rating):
+    full = int(rating)
+    half = rating - full >= 0.5
+    classes = []
+    for index in range(5):
+        if index < full:
+            classes.append("fas fa-star")
+        elif index == full and half:
+            classes.append("fas fa-star-half-alt")
+        else:
+            classes.append("far fa-star")
+    return classes
+
+
+def seller_avatar_data_uri(name):
+    # Same placeholder as sellerAvatarDataUri() in static/js/index.js.
+    initial = ((name or "S").strip()[:1] or "S").upper()
+    svg = (
+        '<svg xmlns="http://www.w3.org/2000/svg" width="64" height="64"><rect width="100%" height="100%" '
+        'fill="#dff1df"/><text x="50%" y="54%" dominant-baseline="middle" text-anchor="middle" '
+        f'font-size="28" font-family="Arial, sans-serif" fill="#2f6b2f">{initial}</text></svg>'
+    )
+    return "data:image/svg+xml;utf8," + quote(svg, safe="-_.!~*'()")
+
+
+def _product_card_context(product, ui_text):
+    seller_name = product["brand"] or ui_text.get("js_unknown_seller", "Unknown Seller")
+    return {
+        "product": product,
+        "ui_text": ui_text,
+        "badges": product["badges"][:2],
+        "price_label": f"{product['price']:,.2f} ETB",
+        "rating_label": f"{product['rating']:.1f}",
+        "stars": rating_star_classes(product["rating"]),
+        "seller_name": seller_name,
+        "seller_photo": product["seller_photo"] or seller_avatar_data_uri(seller_name),
+    }
+
+
+def render_product_cards(products, versions, language, ui_text, ui_version=""):
+    # Listing pages are stitched from per-product fragments, so a request only
+    # renders the cards whose product changed since they were cached.
+    keys = [
+        f"{PRODUCT_CARD_CACHE_PREFIX}{language}-{ui_version}:{product['sku']}:{versions.get(product['sku'], '')}"
+        for product in products
+    ]
+    fragments = caches[PRODUCT_CARD_CACHE_ALIAS]
+    cached = fragments.get_many(keys) if keys else {}
+    rendered = {}
+    template = None
+    for key, product in zip(keys, products):
+        if key in cached or key in rendered:
+            continue
+        if template is None:
+            template = get_template(PRODUCT_CARD_TEMPLATE)
+        rendered[key] = template.render(_product_card_context(product, ui_text)).strip()
+    if rendered:
+        fragments.set_many(rendered, PRODUCT_CARD_CACHE_TIMEOUT)
+
+    columns = []
+    for index, key in enumerate(keys):
+        delay = (index % PRODUCT_CARD_AOS_ROW) * PRODUCT_CARD_AOS_STEP_MS
+        card = cached.get(key) or rendered[key]
+        columns.append(
+            f'<div class="col-sm-6 col-lg-3 mb-4" data-aos="fade-up" data-aos-delay="{delay}">{card}</div>'
+        )
+    return mark_safe("\n".join(columns))
+
+
+def serialize_shop_product_detail(product):
+    detail = serialize_shop_product(product)
+    detail["seller_name"] = detail["brand"]
+    detail["desc"] = product.description
+    return detail
+
+
+def _parse_decimal(value):
+    raw = str(value or "").replace(",", "").strip()
+    if not raw:
+        return None
+    try:
+        number = Decimal(raw)
+    except InvalidOperation:
+        return None
+    return number if number.is_finite() else None
+
+
+def _parse_int(value, default):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def parse_catalog_filters(params):
+    category = (params.get("category") or "").strip()
+    brand = (params.get("brand") or "").strip()
+    try:
+        rating_min = float(params.get("rating") or 0)
+    except ValueError:
+        rating_min = 0.0
+    if not math.isfinite(rating_min):
+        rating_min = 0.0
+    stock = (params.get("stock") or "All").strip()
+    sort = (params.get("sort") or "relevance").strip()
+    page_size = _parse_int(params.get("page_size"), CATALOG_DEFAULT_PAGE_SIZE)
+    return {
+        "q": (params.get("q") or "").strip(),
+        "category": "" if category == "All" else category,
+        "brand": "" if brand == "All" else brand,
+        "min_price": _parse_decimal(params.get("min_price")),
+        "max_price": _parse_decimal(params.get("max_price")),
+        "rating_min": min(max(rating_min, 0.0), 5.0),
+        "stock": stock if stock in CATALOG_STOCK_MODES else "All",
+        "sort": sort if sort in CATALOG_SORT_ORDERS else "relevance",
+        "page": min(max(1, _parse_int(params.get("page"), 1)), CATALOG_MAX_PAGE),
+        "page_size": min(max(1, page_size), CATALOG_MAX_PAGE_SIZE),
+    }
+
+
+def catalog_base_queryset():
+    # Rating stats come from correlated subqueries rather than a join so that the
+    # facet aggregates below count each product once.
+    ratings = ProductRating.objects.filter(product=OuterRef("pk")).values("product")
+    return Product.objects.filter(
+        is_active=True,
+        current_stock__gt=0,
+        vendor__is_active=True,
+        vendor__account_registration__is_verified=True,
+    ).annotate(
+        rating_avg=Coalesce(
+            Subquery(ratings.annotate(value=Avg("rating")).values("value")),
+            Value(0.0),
+            output_field=FloatField(),
+        ),
+        rating_count=Coalesce(
+            Subquery(ratings.annotate(value=Count("id")).values("value")),
+            0,
+        ),
+    )
+
+
+def _apply_catalog_filters(queryset, filters, skip=(), brand_vendor_ids=None):
+    query = filters["q"]
+    if query:
+        queryset = queryset.filter(
+            Q(vin__icontains=query)
+            | Q(name__icontains=query)
+            | Q(category__icontains=query)
+            | Q(vendor__first_name__icontains=query)
+            | Q(vendor__last_name__icontains=query)
+            | Q(vendor__username__icontains=query)
+        )
+    if filters["category"] and "category" not in skip:
+        queryset = queryset.filter(category=filters["category"])
+    if filters["brand"] and "brand" not in skip:
+        queryset = queryset.filter(vendor_id__in=brand_vendor_ids or [])
+    if "price" not in skip:
+        if filters["min_price"] is not None:
+            queryset = queryset.filter(price__gte=filters["min_price"])
+        if filters["max_price"] is not None:
+            queryset = queryset.filter(price__lte=filters["max_price"])
+    if filters["rating_min"] and "rating" not in skip:
+        queryset = queryset.filter(rating_avg__gte=filters["rating_min"])
+    if filters["stock"] == "Low":
+        queryset = queryset.filter(current_stock__lte=LOW_STOCK_BADGE_THRESHOLD)
+    return queryset
+
+
+async def _abrand_facet(queryset):
+    counts = {}
+    vendor_ids = {}
+    rows = (
+        queryset.order_by()
+        .values("vendor_id", "vendor__first_name", "vendor__last_name", "vendor__username")
+        .annotate(count=Count("id"))
+    )
+    # Brands are seller display names, and two sellers may share one.
+    async for row in rows:
+        label = seller_display_name(
+            row["vendor__first_name"],
+            row["vendor__last_name"],
+            row["vendor__username"],
+        )
+        counts[label] = counts.get(label, 0) + row["count"]
+        vendor_ids.setdefault(label, []).append(row["vendor_id"])
+    facet = [{"value": label, "count": counts[label]} for label in sorted(counts)]
+    return facet, vendor_ids
+
+
+async def _acategory_facet(queryset):
+    rows = queryset.order_by("category").values("category").annotate(count=Count("id"))
+    return [{"value": row["category"], "count": row["count"]} async for row in rows]
+
+
+async def _aprice_facet(queryset):
+    aggregates = {}
+    for index, (low, high) in enumerate(CATALOG_PRICE_BUCKETS):
+        condition = Q(price__gte=low)
+        if high is not None:
+            condition &= Q(price__lt=high)
+        aggregates[f"bucket_{index}"] = Count("id", filter=condition)
+    counts = await queryset.order_by().aaggregate(**aggregates)
+    return [
+        {
+            "min": float(low),
+            "max": float(high) if high is not None else None,
+            "count": counts[f"bucket_{index}"],
+        }
+        for index, (low, high) in enumerate(CATALOG_PRICE_BUCKETS)
+    ]
+
+
+async def _arating_facet(queryset):
+    aggregates = {
+        f"band_{index}": Count("id", filter=Q(rating_avg__gte=band))
+        for index, band in enumerate(CATALOG_RATING_BANDS)
+    }
+    counts = await queryset.order_by().aaggregate(**aggregates)
+    return [
+        {"min": band, "count": counts[f"band_{index}"]}
+        for index, band in enumerate(CATALOG_RATING_BANDS)
+    ]
+
+
+async def aquery_catalog(filters):
+    # One page of matching products plus facet counts. Each facet ignores its own
+    # filter so the client can show how many products every alternative returns.
+    base = catalog_base_queryset()
+    brand_facet, brand_vendor_ids = await _abrand_facet(
+        _apply_catalog_filters(base, filters, skip=("brand",))
+    )
+    vendor_ids = brand_vendor_ids.get(filters["brand"], [])
+    matching = _apply_catalog_filters(base, filters, brand_vendor_ids=vendor_ids)
+
+    total = await matching.acount()
+    page_size = filters["page_size"]
+    num_pages = max(1, -(-total // page_size))
+    page = min(filters["page"], num_pages)
+    offset = (page - 1) * page_size
+    page_queryset = (
+        with_listing_columns(matching)
+        .order_by(*CATALOG_SORT_ORDERS[filters["sort"]])[offset:offset + page_size]
+    )
+    products = [serialize_shop_product(product) async for product in page_queryset]
+    category_facet = await _acategory_facet(
+        _apply_catalog_filters(base, filters, skip=("category",), brand_vendor_ids=vendor_ids)
+    )
+    price_facet = await _aprice_facet(
+        _apply_catalog_filters(base, filters, skip=("price",), brand_vendor_ids=vendor_ids)
+    )
+    rating_facet = await _arating_facet(
+        _apply_catalog_filters(base, filters, skip=("rating",), brand_vendor_ids=vendor_ids)
+    )
+    return {
+        "count": total,
+        "page": page,
+        "page_size": page_size,
+        "num_pages": num_pages,
+        "products": products,
+        "facets": {
+            "categories": category_facet,
+            "brands": brand_facet,
+            "price_buckets": price_facet,
+            "rating_bands": rating_facet,
+        },
+    }
+
+
+def parse_lookup_skus(params):
+    skus = []
+    for value in params.getlist("sku") + params.getlist("skus"):
+        for sku in str(value).split(","):
+            sku = sku.strip().upper()
+            if sku and sku not in skus:
+                skus.append(sku)
+    return skus
+
+
+async def alookup_products(skus):
+    # Per-SKU entries are cached for a few seconds so carts and compare panels
+    # polling the same hot SKUs share one `vin__in` query between them.
+    keys = {f"{PRODUCT_LOOKUP_CACHE_PREFIX}{sku}": sku for sku in skus}
+    cached = await cache.aget_many(keys.keys())
+    found = {keys[key]: entry for key, entry in cached.items()}
+
+    pending = [sku for sku in skus if sku not in found]
+    if pending:
+        products = with_listing_columns(catalog_base_queryset().filter(vin__in=pending))
+        fresh = {sku: None for sku in pending}
+        async for product in products:
+            fresh[product.vin] = serialize_shop_product(product)
+        # Unavailable SKUs are cached as None so they do not hit the database either.
+        await cache.aset_many(
+            {f"{PRODUCT_LOOKUP_CACHE_PREFIX}{sku}": entry for sku, entry in fresh.items()},
+            PRODUCT_LOOKUP_CACHE_TIMEOUT,
+        )
+        found.update(fresh)
+
+    return {
+        "products": {sku: found[sku] for sku in skus if found.get(sku)},
+        "missing": [sku for sku in skus if not found.get(sku)],
+    }
+
+
+async def aget_product_detail(sku):
+    key = f"{PRODUCT_DETAIL_CACHE_PREFIX}{sku}"
+    detail = await cache.aget(key)
+    if detail is not None:
+        return detail
+    product = await with_listing_columns(
+        catalog_base_queryset().filter(vin=sku),
+        "description",
+    ).afirst()
+    if product is None:
+        return None
+    detail = serialize_shop_product_detail(product)
+    await cache.aset(key, detail, PRODUCT_DETAIL_CACHE_TIMEOUT)
+    return detail
+
+
+def _product_cache_keys(skus):
+    keys = []
+    for sku in skus:
+        keys.append(f"{PRODUCT_LOOKUP_CACHE_PREFIX}{sku}")
+        keys.append(f"{PRODUCT_DETAIL_CACHE_PREFIX}{sku}")
+    return keys
+
+
+def invalidate_product_caches(skus):
+    cache.delete_many(_product_cache_keys(skus))
+
+
+async def ainvalidate_product_caches(skus):
+    await cache.adelete_many(_product_cache_keys(skus))
@@ -1,4 +1,6 @@
-from .i18n import get_request_language, get_ui_text
+from django.urls import reverse
+
+from .i18n import get_request_language, get_ui_text, get_ui_text_bundle
 from .models import AccountRegistration, ContactMessage, Order
 
 
@@ -7,6 +9,10 @@ def ui_language_context(request):
     return {
         "shop_language": language,
         "ui_text": get_ui_text(language),
+        "ui_text_bundle_url": reverse(
+            "ui_text_bundle",
+            kwargs={"language": language, "version": get_ui_text_bundle(language)["version"]},
+        ),
     }
 
 
@@ -23,11 +29,14 @@ def seller_order_notifications(request):
     if not user or not user.is_authenticated:
         return context
 
-    account = (
-        AccountRegistration.objects.filter(user_id=user.id)
-        .only("account_type")
-        .first()
-    )
+    # System admins never act as sellers, so they skip the account lookup.
+    account = None
+    if not user.is_superuser:
+        account = (
+            AccountRegistration.objects.filter(user_id=user.id)
+            .only("account_type")
+            .first()
+        )
     if account and account.account_type == AccountRegistration.ACCOUNT_TYPE_SELLER:
         orders_qs = (
             Order.objects.filter(product__vendor_id=user.id, is_delivered=False)
@@ -95,3 +104,7 @@ def seller_order_notifications(request):
         ).count()
 
     return context
+
+
+# Runs on every page render, so it is held to a fixed number of queries.
+seller_order_notifications.query_budget = 4
@@ -0,0 +1,281 @@
+import csv
+import json
+from datetime import datetime, time, timedelta
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .catalog import seller_display_name
+from .models import Order
+
+
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson; charset=utf-8",
+}
+EXPORT_STATUSES = ("all", "pending", "delivered")
+# Rows are pulled from the database cursor this many at a time, so memory stays
+# flat no matter how many orders an export covers.
+EXPORT_CHUNK_SIZE = 2000
+# Spreadsheet apps evaluate cells starting with these characters as formulas.
+CSV_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+VENDOR_ORDER_EXPORT_COLUMNS = (
+    "order_id",
+    "created_at",
+    "status",
+    "product_name",
+    "sku",
+    "quantity",
+    "total_price",
+    "buyer_name",
+    "buyer_email",
+)
+BUYER_ORDER_EXPORT_COLUMNS = (
+    "order_id",
+    "created_at",
+    "status",
+    "product_name",
+    "sku",
+    "quantity",
+    "total_price",
+    "seller_name",
+    "seller_email",
+)
+ADMIN_SALES_EXPORT_COLUMNS = (
+    "order_id",
+    "created_at",
+    "product_name",
+    "sku",
+    "category",
+    "quantity",
+    "total_price",
+    "seller_name",
+    "seller_email",
+    "buyer_name",
+    "buyer_email",
+)
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _parse_day(value):
+    try:
+        return parse_date((value or "").strip())
+    except ValueError:
+        return None
+
+
+def parse_order_export_filters(params, default_status="all"):
+    export_format = (params.get("format") or "csv").strip().lower()
+    if export_format not in EXPORT_FORMATS:
+        export_format = "csv"
+    status = (params.get("status") or default_status).strip().lower()
+    if status not in EXPORT_STATUSES:
+        status = default_status
+    return {
+        "format": export_format,
+        "status": status,
+        "date_from": _parse_day(params.get("date_from")),
+        "date_to": _parse_day(params.get("date_to")),
+    }
+
+
+def _filter_orders(queryset, filters):
+    # Plain datetime bounds (instead of created_at__date) keep the range usable
+    # by the index on created_at.
+    if filters["date_from"]:
+        queryset = queryset.filter(created_at__gte=_start_of_day(filters["date_from"]))
+    if filters["date_to"]:
+        queryset = queryset.filter(created_at__lt=_start_of_day(filters["date_to"] + timedelta(days=1)))
+    if filters["status"] == "pending":
+        queryset = queryset.filter(is_delivered=False)
+    elif filters["status"] == "delivered":
+        queryset = queryset.filter(is_delivered=True)
+    return queryset.order_by("created_at", "id")
+
+
+def _order_status(is_delivered):
+    return "delivered" if is_delivered else "pending"
+
+
+class ExportRows:
+    # Iterating synchronously reads the cursor in place; iterating asynchronously
+    # hands over one chunk at a time, so ASGI servers can stream the body without
+    # buffering it.
+    def __init__(self, queryset, to_row):
+        self.queryset = queryset
+        self.to_row = to_row
+
+    def __iter__(self):
+        for values in self.queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            yield self.to_row(*values)
+
+    async def __aiter__(self):
+        # values_list() iterables run their query as soon as they are created,
+        # so QuerySet.aiterator() would hit the database from the event loop.
+        # Create the sync generator here and advance it only inside the
+        # thread-sensitive executor, one chunk at a time.
+        rows = iter(self)
+        while chunk := await sync_to_async(_next_chunk)(rows):
+            for row in chunk:
+                yield row
+
+
+def _next_chunk(rows):
+    return list(islice(rows, EXPORT_CHUNK_SIZE))
+
+
+def _party_order_row(order_id, created_at, is_delivered, product_name, sku, quantity, total_price,
+                     first_name, last_name, username, email):
+    return (
+        order_id,
+        created_at.isoformat(),
+        _order_status(is_delivered),
+        product_name,
+        sku,
+        quantity,
+        str(total_price),
+        seller_display_name(first_name, last_name, username),
+        email,
+    )
+
+
+def _admin_sales_row(order_id, created_at, product_name, sku, category, quantity, total_price,
+                     seller_first, seller_last, seller_username, seller_email,
+                     buyer_first, buyer_last, buyer_username, buyer_email):
+    return (
+        order_id,
+        created_at.isoformat(),
+        product_name,
+        sku,
+        category,
+        quantity,
+        str(total_price),
+        seller_display_name(seller_first, seller_last, seller_username),
+        seller_email,
+        seller_display_name(buyer_first, buyer_last, buyer_username),
+        buyer_email,
+    )
+
+
+def iter_vendor_order_rows(vendor_id, filters):
+    rows = _filter_orders(Order.objects.filter(product__vendor_id=vendor_id), filters).values_list(
+        "id",
+        "created_at",
+        "is_delivered",
+        "product__name",
+        "product__vin",
+        "quantity",
+        "total_price",
+        "buyer__first_name",
+        "buyer__last_name",
+        "buyer__username",
+        "buyer__email",
+    )
+    return ExportRows(rows, _party_order_row)
+
+
+def iter_buyer_order_rows(buyer_id, filters):
+    rows = _filter_orders(Order.objects.filter(buyer_id=buyer_id), filters).values_list(
+        "id",
+        "created_at",
+        "is_delivered",
+        "product__name",
+        "product__vin",
+        "quantity",
+        "total_price",
+        "product__vendor__first_name",
+        "product__vendor__last_name",
+        "product__vendor__username",
+        "product__vendor__email",
+    )
+    return ExportRows(rows, _party_order_row)
+
+
+def iter_admin_sales_rows(filters):
+    rows = _filter_orders(Order.objects.all(), filters).values_list(
+        "id",
+        "created_at",
+        "product__name",
+        "product__vin",
+        "product__category",
+        "quantity",
+        "total_price",
+        "product__vendor__first_name",
+        "product__vendor__last_name",
+        "product__vendor__username",
+        "product__vendor__email",
+        "buyer__first_name",
+        "buyer__last_name",
+        "buyer__username",
+        "buyer__email",
+    )
+    return ExportRows(rows, _admin_sales_row)
+
+
+class _EchoBuffer:
+    def write(self, value):
+        return value
+
+
+def _csv_safe(value):
+    if isinstance(value, str) and value.startswith(CSV_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _csv_line(writer, row):
+    return writer.writerow([_csv_safe(value) for value in row])
+
+
+def _jsonl_line(columns, row):
+    return json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n"
+
+
+def _iter_csv(columns, rows):
+    writer = csv.writer(_EchoBuffer())
+    # The header goes out before the query runs so the download starts at once.
+    yield writer.writerow(columns)
+    for row in rows:
+        yield _csv_line(writer, row)
+
+
+async def _aiter_csv(columns, rows):
+    writer = csv.writer(_EchoBuffer())
+    yield writer.writerow(columns)
+    async for row in rows:
+        yield _csv_line(writer, row)
+
+
+def _iter_jsonl(columns, rows):
+    for row in rows:
+        yield _jsonl_line(columns, row)
+
+
+async def _aiter_jsonl(columns, rows):
+    async for row in rows:
+        yield _jsonl_line(columns, row)
+
+
+def streaming_export_response(request, filename_stem, columns, rows, export_format):
+    # Under ASGI a synchronous iterator would be consumed in full before the
+    # first byte is sent, so hand Django an async one instead.
+    if isinstance(request, ASGIRequest):
+        stream = _aiter_jsonl if export_format == "jsonl" else _aiter_csv
+    else:
+        stream = _iter_jsonl if export_format == "jsonl" else _iter_csv
+    response = StreamingHttpResponse(stream(columns, rows), content_type=EXPORT_FORMATS[export_format])
+    filename = f"{filename_stem}-{timezone.localdate().isoformat()}.{export_format}"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    response["Cache-Control"] = "no-store"
+    # Ask nginx-style proxies not to buffer the body, so rows reach the client as
+    # they are produced.
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -2,8 +2,14 @@ import os
 
 from django import forms
 from django.contrib.auth import authenticate
-from django.contrib.auth.models import User
+from .accounts import users_with_email, users_with_username
+from .inventory import product_stock_level, record_stock_change
 from .models import AccountRegistration, Product, ProductCategory, SiteAnnouncement
+from .product_import import (
+    PRODUCT_IMAGE_ARCHIVE_MAX_BYTES,
+    PRODUCT_IMPORT_EXTENSIONS,
+    PRODUCT_IMPORT_MAX_BYTES,
+)
 
 
 class LoginForm(forms.Form):
@@ -68,13 +74,13 @@ class SignupForm(forms.Form):
 
     def clean_username(self):
         username = (self.cleaned_data.get("username") or "").strip()
-        if User.objects.filter(username=username).exists():
+        if users_with_username(username).exists():
             raise forms.ValidationError("That username is already taken.")
         return username
 
     def clean_email(self):
         email = (self.cleaned_data.get("email") or "").strip().lower()
-        if User.objects.filter(email=email).exists():
+        if users_with_email(email).exists():
             raise forms.ValidationError("That email is already registered.")
         return email
 
@@ -153,6 +159,11 @@ class ProductForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         self.vendor = kwargs.pop("vendor", None)
         super().__init__(*args, **kwargs)
+        # Validation copies the submitted values onto the instance, so keep the
+        # stock level it had before the edit for the ledger.
+        self.previous_stock = product_stock_level(self.instance) if self.instance.pk else None
+        # Spreadsheet-imported products start hidden without an image.
+        self.awaiting_image = bool(self.instance.pk) and not self.instance.product_image
         if self.vendor is not None:
             self.instance.vendor = self.vendor
         available_categories = ProductCategory.objects.filter(is_visible=True).order_by("name")
@@ -213,11 +224,40 @@ class ProductForm(forms.ModelForm):
         product.vendor = self.vendor
         if product.current_stock is None:
             product.current_stock = product.initial_stock
+        if self.awaiting_image and product.product_image:
+            product.is_active = True
         if commit:
             product.save()
+            record_stock_change(product, self.previous_stock)
         return product
 
 
+class ProductImportForm(forms.Form):
+    file = forms.FileField()
+
+    def clean_file(self):
+        upload = self.cleaned_data.get("file")
+        ext = os.path.splitext(upload.name)[1].lower()
+        if ext not in PRODUCT_IMPORT_EXTENSIONS:
+            raise forms.ValidationError("Import file must be CSV or XLSX.")
+        if upload.size > PRODUCT_IMPORT_MAX_BYTES:
+            raise forms.ValidationError("Import file must be 50MB or smaller.")
+        return upload
+
+
+class ProductImageArchiveForm(forms.Form):
+    archive = forms.FileField()
+
+    def clean_archive(self):
+        upload = self.cleaned_data.get("archive")
+        ext = os.path.splitext(upload.name)[1].lower()
+        if ext != ".zip":
+            raise forms.ValidationError("Image archive must be a ZIP file.")
+        if upload.size > PRODUCT_IMAGE_ARCHIVE_MAX_BYTES:
+            raise forms.ValidationError("Image archive must be 200MB or smaller.")
+        return upload
+
+
 class ProductCategoryForm(forms.ModelForm):
     class Meta:
         model = ProductCategory
@@ -249,13 +289,13 @@ class SystemAdminCreateForm(forms.Form):
 
     def clean_username(self):
         username = (self.cleaned_data.get("username") or "").strip()
-        if User.objects.filter(username=username).exists():
+        if users_with_username(username).exists():
             raise forms.ValidationError("That username is already taken.")
         return username
 
     def clean_email(self):
         email = (self.cleaned_data.get("email") or "").strip().lower()
-        if User.objects.filter(email=email).exists():
+        if users_with_email(email).exists():
             raise forms.ValidationError("That email is already registered.")
         return email
 
@@ -1,3 +1,12 @@
+import hashlib
+import json
+from types import MappingProxyType
+
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.translation.trans_real import parse_accept_lang_header
+
+
 SUPPORTED_LANGUAGES = ("en", "am", "ti")
 DEFAULT_LANGUAGE = "en"
 SESSION_LANGUAGE_KEY = "preferred_language"
@@ -1269,6 +1278,86 @@ UI_TEXTS["am"].update(
     }
 )
 
+UI_TEXTS["en"].update(
+    {
+        "vendor_search_products_placeholder": "Name, SKU or category",
+        "vendor_all_categories": "All categories",
+        "vendor_visibility": "Visibility",
+        "vendor_all_products": "All products",
+        "vendor_listed": "Listed",
+        "vendor_hidden": "Hidden",
+        "vendor_sort_by": "Sort by",
+        "vendor_sort_newest": "Newest first",
+        "vendor_sort_low_stock": "Low stock first",
+        "vendor_sort_stock_low": "Stock: Low to High",
+        "vendor_import_products": "Import",
+        "vendor_import_products_title": "Import Products",
+        "vendor_import_products_help": "Upload a CSV or XLSX file with one product per row. Images can be added afterwards.",
+        "vendor_import_download_template": "Download the CSV template",
+        "vendor_import_row": "Row",
+        "vendor_toast_unable_import_products": "Unable to import products. Please try again.",
+        "vendor_import_images_help": "Upload a ZIP of JPG or PNG images named after each SKU, for example BRK1001.jpg.",
+        "vendor_upload_images": "Upload",
+        "export_date_from": "From",
+        "export_date_to": "To",
+        "export_status_all": "All",
+        "export_status_pending": "Pending",
+        "export_status_delivered": "Delivered",
+        "export_format": "Format",
+        "admin_export_sales": "Export Sales",
+        "admin_export_sales_help": "Download orders for any date range as CSV or JSONL.",
+        "auth_reset_page_title": "Reset Password",
+        "auth_reset_heading": "Choose a new password",
+        "auth_reset_subline": "Enter a new password for your account.",
+        "auth_new_password": "New Password",
+        "auth_new_password_placeholder": "Enter a new password",
+        "auth_confirm_new_password": "Confirm New Password",
+        "auth_confirm_new_password_placeholder": "Re-enter the new password",
+        "auth_passwords_must_match": "Passwords must match.",
+        "auth_reset_password_button": "Reset Password",
+    }
+)
+
+UI_TEXTS["am"].update(
+    {
+        "vendor_search_products_placeholder": "ስም፣ SKU ወይም ምድብ",
+        "vendor_all_categories": "ሁሉም ምድቦች",
+        "vendor_visibility": "ታይነት",
+        "vendor_all_products": "ሁሉም ምርቶች",
+        "vendor_listed": "የሚታዩ",
+        "vendor_hidden": "የተደበቁ",
+        "vendor_sort_by": "መደርደሪያ",
+        "vendor_sort_newest": "አዲሶቹ መጀመሪያ",
+        "vendor_sort_low_stock": "ዝቅተኛ ክምችት መጀመሪያ",
+        "vendor_sort_stock_low": "ክምችት: ከዝቅተኛ ወደ ከፍተኛ",
+        "vendor_import_products": "አስገባ",
+        "vendor_import_products_title": "ምርቶችን አስገባ",
+        "vendor_import_products_help": "በእያንዳንዱ ረድፍ አንድ ምርት ያለበት CSV ወይም XLSX ፋይል ይስቀሉ። ምስሎችን በኋላ ማከል ይችላሉ።",
+        "vendor_import_download_template": "የCSV አብነቱን ያውርዱ",
+        "vendor_import_row": "ረድፍ",
+        "vendor_toast_unable_import_products": "ምርቶችን ማስገባት አልተቻለም። እባክዎ እንደገና ይሞክሩ።",
+        "vendor_import_images_help": "በእያንዳንዱ SKU ስም የተሰየሙ JPG ወይም PNG ምስሎችን የያዘ ZIP ይስቀሉ፤ ለምሳሌ BRK1001.jpg።",
+        "vendor_upload_images": "ስቀል",
+        "export_date_from": "ከ",
+        "export_date_to": "እስከ",
+        "export_status_all": "ሁሉም",
+        "export_status_pending": "በመጠባበቅ ላይ",
+        "export_status_delivered": "የደረሱ",
+        "export_format": "ቅርጸት",
+        "admin_export_sales": "ሽያጮችን ላክ",
+        "admin_export_sales_help": "ለማንኛውም የቀን ክልል ትዕዛዞችን በCSV ወይም JSONL ያውርዱ።",
+        "auth_reset_page_title": "የይለፍ ቃል ዳግም ያስጀምሩ",
+        "auth_reset_heading": "አዲስ የይለፍ ቃል ይምረጡ",
+        "auth_reset_subline": "ለኣካውንትዎ አዲስ የይለፍ ቃል ያስገቡ።",
+        "auth_new_password": "አዲስ የይለፍ ቃል",
+        "auth_new_password_placeholder": "አዲስ የይለፍ ቃል ያስገቡ",
+        "auth_confirm_new_password": "አዲሱን የይለፍ ቃል ያረጋግጡ",
+        "auth_confirm_new_password_placeholder": "አዲሱን የይለፍ ቃል እንደገና ያስገቡ",
+        "auth_passwords_must_match": "የይለፍ ቃሎቹ መመሳሰል አለባቸው።",
+        "auth_reset_password_button": "የይለፍ ቃል ዳግም አስጀምር",
+    }
+)
+
 def normalize_language(value):
     raw = str(value or "").strip().lower()
     if raw in SUPPORTED_LANGUAGES:
@@ -1280,19 +1369,79 @@ def normalize_language(value):
     return DEFAULT_LANGUAGE
 
 
+def get_accept_language(request):
+    header = request.META.get("HTTP_ACCEPT_LANGUAGE", "")
+    for code, _quality in parse_accept_lang_header(header):
+        if code == "*":
+            break
+        primary = code.split("-", 1)[0]
+        if primary in SUPPORTED_LANGUAGES:
+            return primary
+    return DEFAULT_LANGUAGE
+
+
 def get_request_language(request):
-    selected = request.GET.get(QUERY_LANGUAGE_KEY) or request.session.get(SESSION_LANGUAGE_KEY)
-    language = normalize_language(selected)
-    request.session[SESSION_LANGUAGE_KEY] = language
-    return language
+    # Only touch the session store when the visitor explicitly picks a different
+    # language; otherwise anonymous catalog traffic would create a session row and
+    # a Set-Cookie on every page.
+    stored = request.session.get(SESSION_LANGUAGE_KEY)
+    requested = request.GET.get(QUERY_LANGUAGE_KEY)
+    if requested:
+        language = normalize_language(requested)
+        if language != stored:
+            request.session[SESSION_LANGUAGE_KEY] = language
+        return language
+    if stored:
+        return normalize_language(stored)
+    # Read by LanguageVaryMiddleware: the response now depends on the header.
+    request.language_from_header = True
+    return get_accept_language(request)
 
 
-def get_ui_text(language):
-    lang = normalize_language(language)
+class LanguageVaryMiddleware(MiddlewareMixin):
+    # Pages whose language came from Accept-Language must not be served from a
+    # shared cache to visitors who send a different one. Session-picked
+    # languages are already covered by the Vary: Cookie SessionMiddleware adds.
+    def process_response(self, request, response):
+        if getattr(request, "language_from_header", False):
+            patch_vary_headers(response, ("Accept-Language",))
+        return response
+
+
+def _build_ui_text_tables():
     base = UI_TEXTS.get(DEFAULT_LANGUAGE, {})
-    if lang == DEFAULT_LANGUAGE:
-        return base
-    localized = UI_TEXTS.get(lang, {})
-    merged = dict(base)
-    merged.update(localized)
-    return merged
+    tables = {}
+    for language in SUPPORTED_LANGUAGES:
+        merged = dict(base)
+        if language != DEFAULT_LANGUAGE:
+            merged.update(UI_TEXTS.get(language, {}))
+        tables[language] = MappingProxyType(merged)
+    return tables
+
+
+def _build_ui_text_bundles(tables):
+    bundles = {}
+    for language, table in tables.items():
+        payload = json.dumps(dict(table), ensure_ascii=False, sort_keys=True)
+        body = f"window.SHOP_UI_TEXT = Object.freeze({payload});\n".encode("utf-8")
+        bundles[language] = MappingProxyType(
+            {
+                "version": hashlib.sha256(body).hexdigest()[:12],
+                "body": body,
+            }
+        )
+    return bundles
+
+
+# Merged (default language + overrides) tables are built once at import time and
+# shared read-only by every request, view and context processor.
+UI_TEXT_TABLES = _build_ui_text_tables()
+UI_TEXT_BUNDLES = _build_ui_text_bundles(UI_TEXT_TABLES)
+
+
+def get_ui_text(language):
+    return UI_TEXT_TABLES[normalize_language(language)]
+
+
+def get_ui_text_bundle(language):
+    return UI_TEXT_BUNDLES[normalize_language(language)]
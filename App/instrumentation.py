@@ -0,0 +1,212 @@
+import json
+import logging
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.base import Template
+from django.template.context import RequestContext
+
+from .metrics import observe_request
+
+
+logger = logging.getLogger(__name__)
+
+# The metrics of the request being served. A ContextVar (rather than a
+# thread-local) follows async views into the threads sync_to_async runs their
+# queries on.
+_request_metrics = ContextVar("request_metrics", default=None)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.template_seconds = 0.0
+        self.context_processor_seconds = 0.0
+        self.template_depth = 0
+        self.view_name = ""
+        self.query_budget = None
+        # Set to a list by the request profiler, which then also needs to know
+        # which threads worked on the request.
+        self.queries = None
+        self.threads = set()
+
+    def as_dict(self):
+        return {
+            "view": self.view_name,
+            "sql_count": self.sql_count,
+            "sql_ms": round(self.sql_seconds * 1000, 2),
+            "template_ms": round(self.template_seconds * 1000, 2),
+            "context_processor_ms": round(self.context_processor_seconds * 1000, 2),
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 2),
+        }
+
+
+@contextmanager
+def collect_request_metrics():
+    metrics = RequestMetrics()
+    token = _request_metrics.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _request_metrics.reset(token)
+
+
+def current_request_metrics():
+    return _request_metrics.get()
+
+
+@contextmanager
+def suspend_request_metrics():
+    token = _request_metrics.set(None)
+    try:
+        yield
+    finally:
+        _request_metrics.reset(token)
+
+
+def _record_query(execute, sql, params, many, context):
+    metrics = _request_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        metrics.sql_count += 1
+        metrics.sql_seconds += duration
+        if metrics.queries is not None:
+            metrics.queries.append(
+                {
+                    "alias": context["connection"].alias,
+                    "sql": sql,
+                    "params": params,
+                    "many": many,
+                    "ms": round(duration * 1000, 2),
+                }
+            )
+            metrics.threads.add(threading.get_ident())
+
+
+def _install_query_wrapper(connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+_original_template_render = Template.render
+_original_bind_template = RequestContext.bind_template
+
+
+def _timed_template_render(self, context):
+    metrics = _request_metrics.get()
+    if metrics is None:
+        return _original_template_render(self, context)
+    # Includes and extends render nested templates; only the outermost render
+    # is timed so nothing is counted twice.
+    metrics.template_depth += 1
+    if metrics.queries is not None:
+        metrics.threads.add(threading.get_ident())
+    started = time.perf_counter()
+    try:
+        return _original_template_render(self, context)
+    finally:
+        metrics.template_depth -= 1
+        if not metrics.template_depth:
+            metrics.template_seconds += time.perf_counter() - started
+
+
+@contextmanager
+def _timed_bind_template(self, template):
+    metrics = _request_metrics.get()
+    started = time.perf_counter()
+    with ExitStack() as stack:
+        # Context processors run while the template is being bound.
+        stack.enter_context(_original_bind_template(self, template))
+        if metrics is not None:
+            metrics.context_processor_seconds += time.perf_counter() - started
+        yield
+
+
+_instrumented = False
+
+
+def install_instrumentation():
+    global _instrumented
+    if _instrumented:
+        return
+    _instrumented = True
+    connection_created.connect(_install_query_wrapper, dispatch_uid="request_metrics_queries")
+    for connection in connections.all(initialized_only=True):
+        _install_query_wrapper(connection)
+    Template.render = _timed_template_render
+    RequestContext.bind_template = _timed_bind_template
+
+
+def view_query_budget(view_func):
+    view_class = getattr(view_func, "view_class", None)
+    return getattr(view_class or view_func, "query_budget", None)
+
+
+def server_timing_header(data):
+    return ", ".join(
+        [
+            f'sql;dur={data["sql_ms"]};desc="{data["sql_count"]} queries"',
+            f'tpl;dur={data["template_ms"]};desc="templates"',
+            f'ctx;dur={data["context_processor_ms"]};desc="context processors"',
+            f'total;dur={data["total_ms"]}',
+        ]
+    )
+
+
+class RequestInstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        install_instrumentation()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        with collect_request_metrics() as metrics:
+            response = self.get_response(request)
+            self._report(request, response, metrics)
+        return response
+
+    async def __acall__(self, request):
+        with collect_request_metrics() as metrics:
+            response = await self.get_response(request)
+            self._report(request, response, metrics)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = _request_metrics.get()
+        if metrics is not None:
+            match = request.resolver_match
+            metrics.view_name = (match.view_name if match else "") or view_func.__name__
+            metrics.query_budget = view_query_budget(view_func)
+        return None
+
+    def _report(self, request, response, metrics):
+        data = metrics.as_dict()
+        # For streaming responses this covers the work done before the body starts.
+        response["Server-Timing"] = server_timing_header(data)
+        data.update({"method": request.method, "path": request.path, "status": response.status_code})
+        observe_request(data)
+        over_budget = metrics.query_budget is not None and metrics.sql_count > metrics.query_budget
+        if over_budget:
+            data["query_budget"] = metrics.query_budget
+            logger.warning("request_metrics %s", json.dumps(data))
+        else:
+            logger.info("request_metrics %s", json.dumps(data))
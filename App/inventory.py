@@ -0,0 +1,317 @@
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, IntegerField, OuterRef, Q, Subquery, Sum, Value, When
+from django.dispatch import Signal
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+
+from .catalog import invalidate_product_caches
+from .models import InventoryMovement, InventorySnapshot, LowStockAlert, Product
+from .product_import import parse_product_price
+
+
+STOCK_ADJUSTMENT_MAX_ENTRIES = 500
+INVENTORY_SNAPSHOT_BATCH_SIZE = 1000
+LOW_STOCK_SCAN_BATCH_SIZE = 500
+
+# Sent with `alerts`, the LowStockAlert rows opened by a scan.
+low_stock_detected = Signal()
+
+
+def product_stock_level(product):
+    return product.current_stock if product.current_stock is not None else product.initial_stock
+
+
+def stock_movement(product, kind, quantity, stock_after, order=None, created_at=None):
+    return InventoryMovement(
+        product_id=product.pk,
+        vendor_id=product.vendor_id,
+        order=order,
+        kind=kind,
+        quantity=quantity,
+        stock_after=stock_after,
+        created_at=created_at or timezone.now(),
+    )
+
+
+def record_stock_movements(movements):
+    movements = [movement for movement in movements if movement.quantity]
+    if movements:
+        InventoryMovement.objects.bulk_create(movements)
+
+
+def record_stock_change(product, previous_stock, kind=InventoryMovement.KIND_ADJUSTMENT):
+    # A product without a previous level is new, so its whole stock is a receipt.
+    new_stock = product_stock_level(product)
+    if previous_stock is None:
+        kind = InventoryMovement.KIND_RECEIPT
+        previous_stock = 0
+    record_stock_movements([stock_movement(product, kind, new_stock - previous_stock, new_stock)])
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def product_stock_at(product_id, moment):
+    # One lookup on the (product, created_at) index: the newest movement at or
+    # before `moment` carries the stock level it left behind.
+    stock = (
+        InventoryMovement.objects.filter(product_id=product_id, created_at__lte=moment)
+        .order_by("-created_at", "-id")
+        .values_list("stock_after", flat=True)
+        .first()
+    )
+    return 0 if stock is None else stock
+
+
+def vendor_stock_at(vendor_id, moment):
+    # A snapshot for day D holds the closing stock of D, the level at the start
+    # of D + 1. Start from the newest one before `moment` and replay only the
+    # movements recorded from that boundary on.
+    snapshot = (
+        InventorySnapshot.objects.filter(vendor_id=vendor_id, taken_on__lt=timezone.localdate(moment))
+        .values("taken_on")
+        .annotate(total=Sum("stock"))
+        .order_by("-taken_on")
+        .first()
+    )
+    movements = InventoryMovement.objects.filter(vendor_id=vendor_id, created_at__lte=moment)
+    base = 0
+    if snapshot:
+        base = snapshot["total"]
+        movements = movements.filter(created_at__gte=_start_of_day(snapshot["taken_on"] + timedelta(days=1)))
+    return base + movements.aggregate(total=Coalesce(Sum("quantity"), 0))["total"]
+
+
+def monthly_inventory_flows(vendor_id, start_day, end_day, active_only=False):
+    movements = InventoryMovement.objects.filter(
+        vendor_id=vendor_id,
+        created_at__gte=_start_of_day(start_day),
+        created_at__lt=_start_of_day(end_day),
+    )
+    if active_only:
+        movements = movements.filter(product__is_active=True)
+    rows = (
+        movements.annotate(month=TruncMonth("created_at"))
+        .values("month")
+        .annotate(
+            received=Coalesce(
+                Sum(
+                    "quantity",
+                    filter=Q(kind=InventoryMovement.KIND_RECEIPT)
+                    | Q(kind=InventoryMovement.KIND_ADJUSTMENT, quantity__gt=0),
+                ),
+                0,
+            ),
+            sold=Coalesce(Sum("quantity", filter=Q(kind=InventoryMovement.KIND_SALE)), 0),
+            returned=Coalesce(Sum("quantity", filter=Q(kind=InventoryMovement.KIND_CANCELLATION)), 0),
+            written_off=Coalesce(
+                Sum("quantity", filter=Q(kind=InventoryMovement.KIND_ADJUSTMENT, quantity__lt=0)),
+                0,
+            ),
+        )
+    )
+    return {
+        row["month"].date(): {
+            "received": row["received"],
+            "sold": -row["sold"],
+            "returned": row["returned"],
+            "written_off": -row["written_off"],
+        }
+        for row in rows
+    }
+
+
+def take_inventory_snapshot(taken_on=None, batch_size=INVENTORY_SNAPSHOT_BATCH_SIZE):
+    # Stores each product's closing stock for `taken_on` (yesterday by default),
+    # read from the ledger so the result does not depend on when the job runs.
+    # Returns the number of rows actually inserted; days already snapshotted
+    # are left as they are.
+    taken_on = taken_on or timezone.localdate() - timedelta(days=1)
+    closing = _start_of_day(taken_on + timedelta(days=1))
+    closing_stock = (
+        InventoryMovement.objects.filter(product_id=OuterRef("pk"), created_at__lt=closing)
+        .order_by("-created_at", "-id")
+        .values("stock_after")[:1]
+    )
+    rows = (
+        Product.objects.filter(created_at__lt=closing)
+        .annotate(closing_stock=Coalesce(Subquery(closing_stock), 0))
+        .values_list("id", "vendor_id", "closing_stock")
+        .order_by("pk")
+    )
+    existing = InventorySnapshot.objects.filter(taken_on=taken_on).count()
+    snapshots = []
+    for product_id, vendor_id, stock in rows.iterator(chunk_size=batch_size):
+        snapshots.append(
+            InventorySnapshot(product_id=product_id, vendor_id=vendor_id, taken_on=taken_on, stock=stock)
+        )
+        if len(snapshots) >= batch_size:
+            InventorySnapshot.objects.bulk_create(snapshots, ignore_conflicts=True)
+            snapshots = []
+    if snapshots:
+        InventorySnapshot.objects.bulk_create(snapshots, ignore_conflicts=True)
+    return InventorySnapshot.objects.filter(taken_on=taken_on).count() - existing
+
+
+def low_stock_products(vendor_id=None):
+    # Matches the product_low_stock_idx condition exactly so the partial index
+    # is used. A NULL current_stock never compares, just like in the index.
+    products = Product.objects.filter(is_active=True, current_stock__lte=F("reorder_level"))
+    if vendor_id is not None:
+        products = products.filter(vendor_id=vendor_id)
+    return products
+
+
+def scan_low_stock(batch_size=LOW_STOCK_SCAN_BATCH_SIZE):
+    now = timezone.now()
+    low_stock = {
+        product_id: (vendor_id, stock, reorder_level)
+        for product_id, vendor_id, stock, reorder_level in low_stock_products()
+        .order_by()
+        .values_list("id", "vendor_id", "current_stock", "reorder_level")
+        .iterator(chunk_size=batch_size)
+    }
+    open_alerts = dict(
+        LowStockAlert.objects.filter(resolved_at__isnull=True).values_list("product_id", "id")
+    )
+
+    alerts = [
+        LowStockAlert(
+            product_id=product_id,
+            vendor_id=vendor_id,
+            stock=stock,
+            reorder_level=reorder_level,
+        )
+        for product_id, (vendor_id, stock, reorder_level) in low_stock.items()
+        if product_id not in open_alerts
+    ]
+    recovered_ids = [
+        alert_id for product_id, alert_id in open_alerts.items() if product_id not in low_stock
+    ]
+    with transaction.atomic():
+        alerts = LowStockAlert.objects.bulk_create(alerts, batch_size=batch_size)
+        for start in range(0, len(recovered_ids), batch_size):
+            LowStockAlert.objects.filter(pk__in=recovered_ids[start:start + batch_size]).update(
+                resolved_at=now
+            )
+    if alerts:
+        low_stock_detected.send(sender=LowStockAlert, alerts=alerts)
+    return {"opened": len(alerts), "resolved": len(recovered_ids), "low_stock": len(low_stock)}
+
+
+def _parse_whole_number(value, label, minimum=None):
+    if isinstance(value, bool):
+        raise ValueError(f"{label} must be a whole number.")
+    try:
+        number = int(str(value).strip())
+    except (TypeError, ValueError):
+        raise ValueError(f"{label} must be a whole number.") from None
+    if minimum is not None and number < minimum:
+        raise ValueError(f"{label} must be {minimum} or more.")
+    return number
+
+
+def parse_stock_adjustment(entry):
+    if not isinstance(entry, dict):
+        raise ValueError("Each adjustment must be an object.")
+    has_stock = entry.get("stock") not in (None, "")
+    has_delta = entry.get("delta") not in (None, "")
+    has_price = entry.get("price") not in (None, "")
+    if has_stock and has_delta:
+        raise ValueError("Send either stock or delta, not both.")
+    if not (has_stock or has_delta or has_price):
+        raise ValueError("Nothing to change; send stock, delta or price.")
+    return {
+        "stock": _parse_whole_number(entry["stock"], "Stock", minimum=0) if has_stock else None,
+        "delta": _parse_whole_number(entry["delta"], "Delta") if has_delta else None,
+        "price": parse_product_price(str(entry["price"]).strip()) if has_price else None,
+    }
+
+
+def apply_stock_adjustments(vendor, entries):
+    results = []
+    changes_by_sku = {}
+    for entry in entries:
+        sku = str(entry.get("sku", "") if isinstance(entry, dict) else "").strip().upper()
+        if not sku:
+            results.append({"sku": "", "ok": False, "message": "SKU is required."})
+            continue
+        if sku in changes_by_sku:
+            results.append({"sku": sku, "ok": False, "message": "SKU appears more than once."})
+            continue
+        try:
+            changes_by_sku[sku] = parse_stock_adjustment(entry)
+        except ValueError as exc:
+            results.append({"sku": sku, "ok": False, "message": str(exc)})
+            continue
+        results.append({"sku": sku, "ok": True})
+    if not changes_by_sku:
+        return results
+
+    applied = {}
+    with transaction.atomic():
+        # One locked read proves ownership and gives the current stock for deltas;
+        # one UPDATE ... CASE then writes every row.
+        products = (
+            vendor.products.select_for_update()
+            .filter(vin__in=changes_by_sku.keys())
+            .only("id", "vendor_id", "vin", "price", "current_stock", "initial_stock")
+            .order_by("pk")
+        )
+        stock_cases = []
+        price_cases = []
+        movements = []
+        for product in products:
+            change = changes_by_sku[product.vin]
+            current_stock = product_stock_level(product)
+            new_stock = current_stock
+            if change["stock"] is not None:
+                new_stock = change["stock"]
+            elif change["delta"] is not None:
+                new_stock = current_stock + change["delta"]
+            if new_stock < 0:
+                applied[product.vin] = {
+                    "ok": False,
+                    "message": f"Stock cannot go below 0 (current stock is {current_stock}).",
+                }
+                continue
+            new_price = change["price"] if change["price"] is not None else product.price
+            stock_cases.append(When(pk=product.pk, then=Value(new_stock)))
+            price_cases.append(When(pk=product.pk, then=Value(new_price)))
+            movements.append(
+                stock_movement(
+                    product, InventoryMovement.KIND_ADJUSTMENT, new_stock - current_stock, new_stock
+                )
+            )
+            applied[product.vin] = {
+                "ok": True,
+                "id": product.pk,
+                "previous_stock": current_stock,
+                "stock": new_stock,
+                "price": str(new_price),
+            }
+
+        updated_ids = [result["id"] for result in applied.values() if result["ok"]]
+        if updated_ids:
+            Product.objects.filter(pk__in=updated_ids).update(
+                current_stock=Case(*stock_cases, output_field=IntegerField()),
+                price=Case(*price_cases, output_field=DecimalField(max_digits=10, decimal_places=2)),
+                updated_at=timezone.now(),
+            )
+            record_stock_movements(movements)
+
+    for result in results:
+        if not result["ok"]:
+            continue
+        outcome = applied.get(result["sku"])
+        if outcome is None:
+            result.update({"ok": False, "message": "None of your products has this SKU."})
+            continue
+        outcome.pop("id", None)
+        result.update(outcome)
+
+    invalidate_product_caches([sku for sku, outcome in applied.items() if outcome["ok"]])
+    return results
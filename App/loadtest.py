@@ -0,0 +1,53 @@
+import json
+import statistics
+import time
+import urllib.error
+import urllib.request
+
+# Kept free of Django imports: process-pool workers unpickle `post_json` by
+# importing this module, and they never configure Django.
+
+LOAD_TEST_TIMEOUT = 30
+
+
+def percentile(sorted_values, fraction):
+    index = (len(sorted_values) - 1) * fraction
+    lower = int(index)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (index - lower)
+
+
+def latency_summary(latencies):
+    if not latencies:
+        return {}
+    latencies = sorted(latencies)
+    return {
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p90_ms": round(percentile(latencies, 0.90) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2),
+    }
+
+
+def post_json(url, payload, cookies, csrf_token, timeout=LOAD_TEST_TIMEOUT):
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode(),
+        method="POST",
+        headers={
+            "Content-Type": "application/json",
+            "X-Requested-With": "XMLHttpRequest",
+            "X-CSRFToken": csrf_token,
+            "Cookie": "; ".join(f"{name}={value}" for name, value in cookies.items()),
+        },
+    )
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            status, body = response.status, response.read()
+    except urllib.error.HTTPError as exc:
+        status, body = exc.code, exc.read()
+    except (urllib.error.URLError, OSError) as exc:
+        status, body = 0, str(exc).encode()
+    return status, time.perf_counter() - started, body[:500].decode(errors="replace")
@@ -0,0 +1,154 @@
+import json
+import random
+import tempfile
+import time
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from App.loadtest import latency_summary
+from App.models import AccountRegistration, Product
+from App.synthetic import generate_marketplace, marketplace_scale
+
+
+BENCHMARK_CACHES = {
+    "default": {
+        "BACKEND": "App.cache_backends.MeteredLocMemCache",
+        "LOCATION": "benchmark-default",
+        "METRICS_LABEL": "default",
+    },
+    "sessions": {
+        "BACKEND": "App.cache_backends.MeteredLocMemCache",
+        "LOCATION": "benchmark-sessions",
+        "METRICS_LABEL": "sessions",
+    },
+    "fragments": {
+        "BACKEND": "App.cache_backends.MeteredLocMemCache",
+        "LOCATION": "benchmark-fragments",
+        "METRICS_LABEL": "fragments",
+    },
+}
+
+
+def summarize(size, endpoint, latencies, query_counts, statuses):
+    return {
+        "size": size,
+        "endpoint": endpoint,
+        "requests": len(latencies),
+        **latency_summary(latencies),
+        "queries_min": min(query_counts),
+        "queries_max": max(query_counts),
+        "statuses": sorted(set(statuses)),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the main storefront, checkout, vendor and admin entry points against "
+        "a throwaway test database filled with synthetic data at several sizes. "
+        "Prints one JSON object per size and endpoint (latency percentiles and "
+        "query counts)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            default="200,2000",
+            help="Comma-separated product counts; other tables scale with them.",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=20,
+            help="Timed requests per endpoint and size (after one warm-up request).",
+        )
+        parser.add_argument("--seed", type=int, default=1, help="Random seed for data and order picks.")
+        parser.add_argument("--output", default="", help="Write the JSON lines to this file instead of stdout.")
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options["sizes"].split(",") if size.strip()]
+        except ValueError:
+            raise CommandError("--sizes must be a comma-separated list of numbers.") from None
+        if not sizes or min(sizes) < 1:
+            raise CommandError("--sizes must list at least one positive number.")
+        requests = max(2, options["requests"])
+
+        output = open(options["output"], "w", encoding="utf-8") if options["output"] else self.stdout
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        metrics_dir = tempfile.TemporaryDirectory()
+        try:
+            with override_settings(CACHES=BENCHMARK_CACHES, METRICS_DIR=metrics_dir.name):
+                for size in sizes:
+                    call_command("flush", interactive=False, verbosity=0)
+                    started = time.perf_counter()
+                    counts = generate_marketplace(seed=options["seed"], **marketplace_scale(size))
+                    self.stderr.write(
+                        f"size={size} generated {json.dumps(counts)} in {time.perf_counter() - started:.1f}s"
+                    )
+                    for result in self.run_size(size, requests, random.Random(options["seed"])):
+                        output.write(json.dumps(result) + "\n")
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            metrics_dir.cleanup()
+            if output is not self.stdout:
+                output.close()
+
+    def run_size(self, size, requests, rng):
+        admin = User.objects.create_superuser("benchmark_admin", "benchmark_admin@example.com", "benchmark-pass")
+        seller = User.objects.get(
+            pk=Product.objects.values("vendor_id")
+            .annotate(products=Count("id"))
+            .order_by("-products")
+            .values_list("vendor_id", flat=True)[0]
+        )
+        buyer = User.objects.filter(
+            account_registration__account_type=AccountRegistration.ACCOUNT_TYPE_BUYER
+        ).first()
+        anonymous_client, buyer_client, seller_client, admin_client = Client(), Client(), Client(), Client()
+        buyer_client.force_login(buyer)
+        seller_client.force_login(seller)
+        admin_client.force_login(admin)
+        skus = list(
+            Product.objects.filter(
+                is_active=True,
+                current_stock__gt=0,
+                vendor__account_registration__is_verified=True,
+            ).values_list("vin", flat=True)
+        )
+        search_term = Product.objects.values_list("category", flat=True).first() or "Brakes"
+
+        def place_order():
+            return buyer_client.post(
+                reverse("order_create"),
+                json.dumps({"items": [{"sku": rng.choice(skus), "qty": 1}]}),
+                content_type="application/json",
+            )
+
+        endpoints = (
+            ("home", lambda: anonymous_client.get(reverse("home"))),
+            ("search_products", lambda: anonymous_client.get(reverse("search_products"), {"q": search_term})),
+            ("order_create", place_order),
+            ("vendor_dashboard", lambda: seller_client.get(reverse("vendor_dashboard"))),
+            ("admin_dashboard", lambda: admin_client.get(reverse("admin_dashboard"))),
+            ("admin_product_sku_control", lambda: admin_client.get(reverse("admin_product_sku_control"))),
+        )
+        for endpoint, send in endpoints:
+            send()
+            latencies, query_counts, statuses = [], [], []
+            for _index in range(requests):
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    response = send()
+                    latencies.append(time.perf_counter() - started)
+                query_counts.append(len(queries))
+                statuses.append(response.status_code)
+            yield summarize(size, endpoint, latencies, query_counts, statuses)
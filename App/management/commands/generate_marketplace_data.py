@@ -0,0 +1,61 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from App.synthetic import SYNTHETIC_BATCH_SIZE, SYNTHETIC_PASSWORD, delete_synthetic_data, generate_marketplace
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with synthetic sellers, buyers, categories, products, "
+        "orders and ratings using bulk inserts. Synthetic accounts are named "
+        "synthetic_* and can be removed with --clear."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sellers", type=int, default=50)
+        parser.add_argument("--buyers", type=int, default=500)
+        parser.add_argument("--categories", type=int, default=12)
+        parser.add_argument("--products", type=int, default=2500)
+        parser.add_argument("--orders", type=int, default=7500)
+        parser.add_argument("--ratings", type=int, default=2500)
+        parser.add_argument(
+            "--months",
+            type=int,
+            default=12,
+            help="Spread order dates over this many past months.",
+        )
+        parser.add_argument("--seed", type=int, default=None, help="Random seed for repeatable data.")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=SYNTHETIC_BATCH_SIZE,
+            help="Number of rows per INSERT.",
+        )
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Delete previously generated synthetic data (and everything it owns) first.",
+        )
+
+    def handle(self, *args, **options):
+        if options["clear"]:
+            deleted = delete_synthetic_data()
+            self.stdout.write(f"Deleted {deleted} synthetic row(s).")
+
+        started = time.perf_counter()
+        counts = generate_marketplace(
+            sellers=options["sellers"],
+            buyers=options["buyers"],
+            categories=options["categories"],
+            products=options["products"],
+            orders=options["orders"],
+            ratings=options["ratings"],
+            months=max(1, options["months"]),
+            seed=options["seed"],
+            batch_size=max(1, options["batch_size"]),
+        )
+        counts["seconds"] = round(time.perf_counter() - started, 2)
+        self.stdout.write(json.dumps(counts))
+        self.stdout.write(f"Synthetic accounts use the password '{SYNTHETIC_PASSWORD}'.")
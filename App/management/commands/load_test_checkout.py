@@ -0,0 +1,346 @@
+import json
+import logging
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import got_request_exception
+from django.db import DatabaseError, connection
+from django.db.models import Count, Sum
+from django.test import Client, override_settings
+from django.test.testcases import LiveServerThread, _StaticFilesHandler
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils.crypto import get_random_string
+
+from App.loadtest import latency_summary, post_json
+from App.models import AccountRegistration, InventoryMovement, Order, Product, ProductRating
+
+
+LOAD_TEST_CACHES = {
+    "default": {
+        "BACKEND": "App.cache_backends.MeteredLocMemCache",
+        "LOCATION": "load-test-default",
+        "METRICS_LABEL": "default",
+    },
+    "sessions": {
+        "BACKEND": "App.cache_backends.MeteredLocMemCache",
+        "LOCATION": "load-test-sessions",
+        "METRICS_LABEL": "sessions",
+    },
+    "fragments": {
+        "BACKEND": "App.cache_backends.MeteredLocMemCache",
+        "LOCATION": "load-test-fragments",
+        "METRICS_LABEL": "fragments",
+    },
+}
+
+
+class ServerErrors:
+    # Exceptions raised inside the live server, counted by kind. Lock errors only
+    # show up here; the client just sees a 500.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = Counter()
+
+    def __call__(self, sender, request=None, **kwargs):
+        # Sent from inside the handler's except block.
+        exc = sys.exc_info()[1]
+        if isinstance(exc, DatabaseError) and "locked" in str(exc):
+            kind = "database_locked"
+        else:
+            kind = type(exc).__name__ if exc is not None else "unknown"
+        with self.lock:
+            self.counts[kind] += 1
+
+
+def classify(operation, status, body):
+    if status == 200:
+        return "ok"
+    if status == 0:
+        return "connection_error"
+    if operation == "order" and status == 503:
+        return "lock_error"
+    if status >= 500:
+        return "server_error"
+    if operation == "order" and status == 400 and "Insufficient stock" in body:
+        return "sold_out"
+    if operation == "rating" and status == 409:
+        return "already_rated"
+    return f"http_{status}"
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test checkout and product rating against a live server backed by a "
+        "throwaway SQLite database. Many buyers order and rate a few hot SKUs at "
+        "once; the report covers throughput, latency, lock errors, overselling "
+        "and ledger/rating invariants. Needs no network access beyond localhost."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--buyers", type=int, default=50, help="Number of buyer accounts.")
+        parser.add_argument("--workers", type=int, default=16, help="Concurrent requests in flight.")
+        parser.add_argument(
+            "--processes",
+            action="store_true",
+            help="Send requests from a process pool instead of a thread pool.",
+        )
+        parser.add_argument("--hot-skus", type=int, default=3, help="Number of contended products.")
+        parser.add_argument("--stock", type=int, default=100, help="Starting stock of each hot product.")
+        parser.add_argument("--orders-per-buyer", type=int, default=4)
+        parser.add_argument("--max-quantity", type=int, default=3, help="Largest quantity per order line.")
+        parser.add_argument(
+            "--rating-attempts",
+            type=int,
+            default=2,
+            help="Times each buyer tries to rate each hot product (repeats must get 409).",
+        )
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--output", default="", help="Write the JSON report to this file as well.")
+
+    def handle(self, *args, **options):
+        if options["buyers"] < 1 or options["hot_skus"] < 1 or options["workers"] < 1:
+            raise CommandError("--buyers, --hot-skus and --workers must be at least 1.")
+        if connection.vendor != "sqlite":
+            raise CommandError("The load test creates a throwaway SQLite database; run it with SQLite.")
+
+        rng = random.Random(options["seed"])
+        server_errors = ServerErrors()
+        with tempfile.TemporaryDirectory() as directory:
+            # An in-memory test database cannot be shared with the server threads,
+            # so the throwaway database lives in a file like the real one.
+            test_settings = connection.settings_dict.setdefault("TEST", {})
+            previous_test_name = test_settings.get("NAME")
+            test_settings["NAME"] = str(Path(directory) / "load_test.sqlite3")
+            setup_test_environment()
+            old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            try:
+                with override_settings(
+                    CACHES=LOAD_TEST_CACHES,
+                    ALLOWED_HOSTS=["localhost", "testserver"],
+                    METRICS_DIR=Path(directory) / "metrics",
+                ):
+                    got_request_exception.connect(server_errors, dispatch_uid="load_test_checkout")
+                    try:
+                        report = self.run_load_test(options, rng, server_errors)
+                    finally:
+                        got_request_exception.disconnect(dispatch_uid="load_test_checkout")
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                teardown_test_environment()
+                if previous_test_name is None:
+                    test_settings.pop("NAME", None)
+                else:
+                    test_settings["NAME"] = previous_test_name
+
+        output = json.dumps(report, indent=2)
+        self.stdout.write(output)
+        if options["output"]:
+            Path(options["output"]).write_text(output + "\n", encoding="utf-8")
+        if report["invariant_violations"]:
+            raise CommandError(f"{len(report['invariant_violations'])} invariant violation(s) found.")
+
+    def create_fixtures(self, options):
+        password = make_password(None)
+        seller = User.objects.create(username="load_seller", email="load_seller@example.com", password=password)
+        AccountRegistration.objects.create(
+            user=seller,
+            account_type=AccountRegistration.ACCOUNT_TYPE_SELLER,
+            phone_number="+251900000000",
+            is_verified=True,
+        )
+        buyers = User.objects.bulk_create(
+            [
+                User(username=f"load_buyer_{index:04d}", email=f"load_buyer_{index:04d}@example.com", password=password)
+                for index in range(options["buyers"])
+            ]
+        )
+        AccountRegistration.objects.bulk_create(
+            [
+                AccountRegistration(
+                    user_id=buyer.pk,
+                    account_type=AccountRegistration.ACCOUNT_TYPE_BUYER,
+                    phone_number=f"+2519{index:08d}",
+                    is_verified=True,
+                )
+                for index, buyer in enumerate(buyers)
+            ]
+        )
+        products = []
+        for index in range(options["hot_skus"]):
+            product = Product.objects.create(
+                vendor=seller,
+                name=f"Load Test Brake Pad {index}",
+                vin=f"HT{index:04d}",
+                category="Brakes",
+                price=Decimal("25.00"),
+                initial_stock=options["stock"],
+                current_stock=options["stock"],
+                description="Hot SKU for the checkout load test.",
+                product_image="product_images/load_test.jpg",
+            )
+            InventoryMovement.objects.create(
+                product=product,
+                vendor=seller,
+                kind=InventoryMovement.KIND_RECEIPT,
+                quantity=options["stock"],
+                stock_after=options["stock"],
+            )
+            products.append(product)
+        return buyers, products
+
+    def buyer_cookies(self, buyers):
+        cookies = {}
+        for buyer in buyers:
+            client = Client()
+            client.force_login(buyer)
+            csrf_token = get_random_string(32)
+            cookies[buyer.pk] = (
+                {
+                    settings.SESSION_COOKIE_NAME: client.cookies[settings.SESSION_COOKIE_NAME].value,
+                    settings.CSRF_COOKIE_NAME: csrf_token,
+                },
+                csrf_token,
+            )
+        return cookies
+
+    def build_jobs(self, options, rng, buyers, products):
+        jobs = []
+        for buyer in buyers:
+            for _index in range(options["orders_per_buyer"]):
+                product = rng.choice(products)
+                quantity = rng.randint(1, max(1, options["max_quantity"]))
+                jobs.append(("order", buyer.pk, reverse("order_create"), {"items": [{"sku": product.vin, "qty": quantity}]}))
+            for product in products:
+                for _attempt in range(options["rating_attempts"]):
+                    jobs.append(
+                        ("rating", buyer.pk, reverse("product_rate", args=[product.vin]), {"rating": rng.randint(1, 5)})
+                    )
+        rng.shuffle(jobs)
+        return jobs
+
+    def run_load_test(self, options, rng, server_errors):
+        buyers, products = self.create_fixtures(options)
+        cookies = self.buyer_cookies(buyers)
+        jobs = self.build_jobs(options, rng, buyers, products)
+
+        # Failed requests are counted by ServerErrors; one traceback per request
+        # would drown the report.
+        request_logger = logging.getLogger("django.request")
+        previous_level = request_logger.level
+        request_logger.setLevel(logging.CRITICAL)
+        server = LiveServerThread("localhost", _StaticFilesHandler)
+        server.daemon = True
+        server.start()
+        server.is_ready.wait()
+        if server.error:
+            raise CommandError(f"Live server failed to start: {server.error}")
+        base_url = f"http://localhost:{server.port}"
+
+        pool_class = ProcessPoolExecutor if options["processes"] else ThreadPoolExecutor
+        try:
+            started = time.perf_counter()
+            with pool_class(max_workers=options["workers"]) as pool:
+                futures = [
+                    (operation, pool.submit(post_json, base_url + path, payload, *cookies[buyer_id]))
+                    for operation, buyer_id, path, payload in jobs
+                ]
+                results = [(operation, future.result()) for operation, future in futures]
+            elapsed = time.perf_counter() - started
+        finally:
+            server.terminate()
+            server.join()
+            request_logger.setLevel(previous_level)
+
+        operations = {}
+        for operation in ("order", "rating"):
+            responses = [result for name, result in results if name == operation]
+            outcomes = Counter(classify(operation, status, body) for status, _seconds, body in responses)
+            operations[operation] = {
+                "requests": len(responses),
+                "throughput_per_s": round(len(responses) / elapsed, 1) if elapsed else None,
+                **latency_summary([seconds for _status, seconds, _body in responses]),
+                "outcomes": dict(sorted(outcomes.items())),
+            }
+        successful_orders = operations["order"]["outcomes"].get("ok", 0)
+        successful_ratings = operations["rating"]["outcomes"].get("ok", 0)
+        return {
+            "buyers": len(buyers),
+            "workers": options["workers"],
+            "pool": "process" if options["processes"] else "thread",
+            "requests": len(results),
+            "seconds": round(elapsed, 2),
+            "throughput_per_s": round(len(results) / elapsed, 1) if elapsed else None,
+            "operations": operations,
+            "lock_errors": server_errors.counts["database_locked"],
+            "server_errors": dict(sorted(server_errors.counts.items())),
+            "invariant_violations": self.check_invariants(products, successful_orders, successful_ratings),
+        }
+
+    def check_invariants(self, products, successful_orders, successful_ratings):
+        violations = []
+        sold = dict(
+            Order.objects.filter(product__in=products)
+            .values_list("product_id")
+            .annotate(total=Sum("quantity"))
+        )
+        ledger = {
+            row["product_id"]: row
+            for row in InventoryMovement.objects.filter(product__in=products)
+            .values("product_id")
+            .annotate(total=Sum("quantity"))
+        }
+        for product in Product.objects.filter(pk__in=[product.pk for product in products]):
+            quantity_sold = sold.get(product.pk, 0)
+            if quantity_sold > product.initial_stock:
+                violations.append(
+                    f"{product.vin}: oversold, {quantity_sold} ordered from {product.initial_stock} in stock."
+                )
+            if product.current_stock != product.initial_stock - quantity_sold:
+                violations.append(
+                    f"{product.vin}: stock is {product.current_stock}, orders imply "
+                    f"{product.initial_stock - quantity_sold}."
+                )
+            if product.current_stock is not None and product.current_stock < 0:
+                violations.append(f"{product.vin}: negative stock {product.current_stock}.")
+            ledger_total = ledger.get(product.pk, {}).get("total", 0)
+            if ledger_total != product.current_stock:
+                violations.append(
+                    f"{product.vin}: ledger sums to {ledger_total}, stock is {product.current_stock}."
+                )
+
+        order_count = Order.objects.filter(product__in=products).count()
+        if order_count != successful_orders:
+            violations.append(f"{successful_orders} orders were confirmed but {order_count} exist.")
+        unmatched_sales = (
+            Order.objects.filter(product__in=products)
+            .exclude(pk__in=InventoryMovement.objects.filter(kind=InventoryMovement.KIND_SALE).values("order_id"))
+            .count()
+        )
+        if unmatched_sales:
+            violations.append(f"{unmatched_sales} order(s) have no ledger sale.")
+
+        rating_count = ProductRating.objects.filter(product__in=products).count()
+        if rating_count != successful_ratings:
+            violations.append(f"{successful_ratings} ratings were confirmed but {rating_count} exist.")
+        duplicate_ratings = (
+            ProductRating.objects.filter(product__in=products)
+            .values("user_id", "product_id")
+            .annotate(rows=Count("id"))
+            .filter(rows__gt=1)
+            .count()
+        )
+        if duplicate_ratings:
+            violations.append(f"{duplicate_ratings} buyer/product pair(s) have more than one rating.")
+        return violations
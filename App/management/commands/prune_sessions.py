@@ -0,0 +1,55 @@
+import time
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    # Django's clearsessions deletes every expired row in one statement, which
+    # on SQLite holds the database write lock (and blocks checkouts) for as long
+    # as the delete takes once the table has grown.
+    help = (
+        "Delete expired rows from django_session in small batches, each in its own "
+        "short transaction, so the cleanup never holds the database write lock for "
+        "long. Unlike clearsessions it can also repeat on an interval. Only the db "
+        "and cached_db session engines store rows to prune."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of expired sessions deleted per transaction.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=0,
+            help="Repeat the cleanup every N seconds. 0 runs it once and exits.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        interval = max(0, options["interval"])
+
+        while True:
+            deleted = self.prune_expired_sessions(batch_size)
+            self.stdout.write(f"Deleted {deleted} expired session(s).")
+            if not interval:
+                return
+            time.sleep(interval)
+
+    def prune_expired_sessions(self, batch_size):
+        deleted = 0
+        now = timezone.now()
+        while True:
+            session_keys = list(
+                Session.objects.filter(expire_date__lt=now)
+                .values_list("session_key", flat=True)[:batch_size]
+            )
+            if not session_keys:
+                return deleted
+            Session.objects.filter(session_key__in=session_keys).delete()
+            deleted += len(session_keys)
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from App.tasks import TASK_BATCH_SIZE, prune_finished_tasks, run_pending_tasks
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued background tasks. Failed tasks are retried with exponential "
+        "backoff until they run out of attempts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=TASK_BATCH_SIZE,
+            help="Number of tasks claimed per query.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=0,
+            help="Poll for new tasks every N seconds. 0 drains the queue once and exits.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        interval = max(0, options["interval"])
+
+        while True:
+            result = run_pending_tasks(batch_size)
+            if result["succeeded"] or result["failed"] or not interval:
+                self.stdout.write(
+                    f"Ran {result['succeeded']} task(s), {result['failed']} failed."
+                )
+            prune_finished_tasks()
+            if not interval:
+                return
+            time.sleep(interval)
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from App.inventory import LOW_STOCK_SCAN_BATCH_SIZE, scan_low_stock
+
+
+class Command(BaseCommand):
+    help = (
+        "Open a low-stock alert for every active product at or below its reorder "
+        "level, resolve alerts for restocked products and send low_stock_detected "
+        "for the new ones."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=LOW_STOCK_SCAN_BATCH_SIZE,
+            help="Number of alert rows written per query.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=0,
+            help="Repeat the scan every N seconds. 0 runs it once and exits.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        interval = max(0, options["interval"])
+
+        while True:
+            result = scan_low_stock(batch_size=batch_size)
+            self.stdout.write(
+                f"{result['low_stock']} low-stock product(s): opened {result['opened']} "
+                f"alert(s), resolved {result['resolved']}."
+            )
+            if not interval:
+                return
+            time.sleep(interval)
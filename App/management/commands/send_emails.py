@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from App.outbox import EMAIL_BATCH_SIZE, prune_outbox, send_pending_emails
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver queued outbox emails over a single mail connection, retrying "
+        "failed messages with exponential backoff. Sent and failed emails older "
+        "than 30 days are deleted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=EMAIL_BATCH_SIZE,
+            help="Number of emails claimed per query.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=0,
+            help="Check the outbox every N seconds. 0 sends what is queued and exits.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        interval = max(0, options["interval"])
+
+        while True:
+            result = send_pending_emails(batch_size)
+            if result["sent"] or result["failed"] or not interval:
+                self.stdout.write(f"Sent {result['sent']} email(s), {result['failed']} failed.")
+            prune_outbox()
+            if not interval:
+                return
+            time.sleep(interval)
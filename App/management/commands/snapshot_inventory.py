@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from App.inventory import INVENTORY_SNAPSHOT_BATCH_SIZE, take_inventory_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Store yesterday's closing stock for every product, so point-in-time stock "
+        "can start from the latest snapshot instead of replaying the whole ledger."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=INVENTORY_SNAPSHOT_BATCH_SIZE,
+            help="Number of snapshot rows written per insert.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=0,
+            help="Repeat the snapshot every N seconds. 0 runs it once and exits.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        interval = max(0, options["interval"])
+
+        while True:
+            written = take_inventory_snapshot(batch_size=batch_size)
+            self.stdout.write(f"Stored {written} new product snapshot(s).")
+            if not interval:
+                return
+            time.sleep(interval)
@@ -0,0 +1,282 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+
+
+METRICS_FLUSH_INTERVAL = 1.0
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 15, 20, 30, 50, 100)
+# Counts of exited workers, kept so the summed series never go down.
+EXITED_SNAPSHOT_NAME = "_exited.json"
+EXITED_LOCK_NAME = "_exited.lock"
+
+# name: (type, help, histogram buckets)
+METRICS = {
+    "webapp_request_duration_seconds": (
+        "histogram",
+        "Time from the first middleware to the response, by URL name.",
+        LATENCY_BUCKETS,
+    ),
+    "webapp_request_db_queries": (
+        "histogram",
+        "SQL statements run per request, by URL name.",
+        QUERY_COUNT_BUCKETS,
+    ),
+    "webapp_db_query_seconds_total": ("counter", "Time spent in SQL, by URL name.", None),
+    "webapp_template_render_seconds": (
+        "histogram",
+        "Template rendering time per request, by URL name.",
+        LATENCY_BUCKETS,
+    ),
+    "webapp_cache_requests_total": ("counter", "Cache reads by cache alias and result (hit or miss).", None),
+    "webapp_session_writes_total": ("counter", "Sessions saved to the session store.", None),
+    "webapp_checkout_total": (
+        "counter",
+        "Order submissions by outcome (success, insufficient_stock, unavailable, rejected, lock_error).",
+        None,
+    ),
+    "webapp_checkout_lock_retries_total": (
+        "counter",
+        "Checkout transactions retried because the database was locked.",
+        None,
+    ),
+}
+
+
+class MetricsRegistry:
+    # Counters and histograms of this process. Each process writes a snapshot to
+    # METRICS_DIR/<pid>.json at most once per METRICS_FLUSH_INTERVAL, and a scrape
+    # adds up every snapshot, so all gunicorn workers show up whichever one
+    # serves /metrics/.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = defaultdict(float)
+        self.histograms = {}
+        self.last_flush = 0.0
+
+    def inc(self, name, labels=(), value=1):
+        with self.lock:
+            self.counters[name, labels] += value
+
+    def observe(self, name, value, labels=()):
+        buckets = METRICS[name][2]
+        with self.lock:
+            series = self.histograms.get((name, labels))
+            if series is None:
+                series = self.histograms[name, labels] = [0] * (len(buckets) + 2)
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    series[index] += 1
+                    break
+            else:
+                series[len(buckets)] += 1
+            series[-1] += value
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "counters": [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+                "histograms": [[name, list(labels), list(series)] for (name, labels), series in self.histograms.items()],
+            }
+
+    def flush(self, force=False):
+        now = time.monotonic()
+        if not force and now - self.last_flush < METRICS_FLUSH_INTERVAL:
+            return
+        self.last_flush = now
+        directory = Path(settings.METRICS_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{os.getpid()}.json"
+        temporary = path.with_name(f"{os.getpid()}.{threading.get_ident()}.tmp")
+        temporary.write_text(json.dumps(self.snapshot()), encoding="utf-8")
+        os.replace(temporary, path)
+
+
+registry = MetricsRegistry()
+
+
+def _labels(**labels):
+    return tuple(sorted(labels.items()))
+
+
+def observe_request(data):
+    view = data["view"] or "unmatched"
+    registry.observe(
+        "webapp_request_duration_seconds",
+        data["total_ms"] / 1000,
+        _labels(view=view, method=data["method"], status=str(data["status"])),
+    )
+    registry.observe("webapp_request_db_queries", data["sql_count"], _labels(view=view))
+    registry.inc("webapp_db_query_seconds_total", _labels(view=view), data["sql_ms"] / 1000)
+    registry.observe("webapp_template_render_seconds", data["template_ms"] / 1000, _labels(view=view))
+    registry.flush()
+
+
+def record_checkout(outcome):
+    registry.inc("webapp_checkout_total", _labels(outcome=outcome))
+
+
+def record_checkout_lock_retry():
+    registry.inc("webapp_checkout_lock_retries_total")
+
+
+def record_cache_reads(alias, hits=0, misses=0):
+    if hits:
+        registry.inc("webapp_cache_requests_total", _labels(cache=alias, result="hit"), hits)
+    if misses:
+        registry.inc("webapp_cache_requests_total", _labels(cache=alias, result="miss"), misses)
+
+
+def record_session_write():
+    registry.inc("webapp_session_writes_total")
+
+
+def _merge(snapshots):
+    counters = defaultdict(float)
+    histograms = {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot.get("counters", []):
+            counters[name, tuple(map(tuple, labels))] += value
+        for name, labels, series in snapshot.get("histograms", []):
+            key = (name, tuple(map(tuple, labels)))
+            if key not in histograms:
+                histograms[key] = [0] * len(series)
+            histograms[key] = [total + value for total, value in zip(histograms[key], series)]
+    return counters, histograms
+
+
+def _process_is_running(pid):
+    # Signal 0 only checks that the process exists. On Windows os.kill() would
+    # terminate it instead, so there every snapshot is treated as live.
+    if os.name != "posix":
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _snapshot_from_totals(counters, histograms):
+    return {
+        "counters": [[name, [list(label) for label in labels], value] for (name, labels), value in counters.items()],
+        "histograms": [
+            [name, [list(label) for label in labels], series] for (name, labels), series in histograms.items()
+        ],
+    }
+
+
+def _fold_exited_snapshots(directory, paths):
+    # Dropping an exited worker's file would make the summed series fall, and
+    # Prometheus would read the fall as a reset and count every live worker's
+    # total as new growth. Its counts are folded into EXITED_SNAPSHOT_NAME
+    # first, so the totals only ever go up. The lock stops two scrapes from
+    # folding the same file twice; only POSIX gets here, so fcntl is available.
+    import fcntl
+
+    with open(directory / EXITED_LOCK_NAME, "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            exited_path = directory / EXITED_SNAPSHOT_NAME
+            snapshots = []
+            if exited_path.exists():
+                snapshots.append(json.loads(exited_path.read_text(encoding="utf-8")))
+            folded = []
+            for path in paths:
+                try:
+                    snapshots.append(json.loads(path.read_text(encoding="utf-8")))
+                except FileNotFoundError:
+                    # Another scrape folded it while this one waited for the lock.
+                    continue
+                folded.append(path)
+            if not folded:
+                return
+            temporary = exited_path.with_name(f"{EXITED_SNAPSHOT_NAME}.{os.getpid()}.tmp")
+            temporary.write_text(json.dumps(_snapshot_from_totals(*_merge(snapshots))), encoding="utf-8")
+            os.replace(temporary, exited_path)
+            for path in folded:
+                path.unlink(missing_ok=True)
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def collect_snapshots():
+    registry.flush(force=True)
+    directory = Path(settings.METRICS_DIR)
+    for path in directory.glob("*.tmp"):
+        pid = path.name.split(".", 1)[0]
+        if pid.isdigit() and not _process_is_running(int(pid)):
+            path.unlink(missing_ok=True)
+    exited = [
+        path
+        for path in directory.glob("*.json")
+        if path.stem.isdigit() and not _process_is_running(int(path.stem))
+    ]
+    if exited:
+        _fold_exited_snapshots(directory, exited)
+
+    snapshots = []
+    for path in directory.glob("*.json"):
+        try:
+            snapshots.append(json.loads(path.read_text(encoding="utf-8")))
+        except (OSError, ValueError):
+            # A worker may be replacing its file right now; it is picked up next scrape.
+            continue
+    return snapshots
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _format_number(value):
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+def render_metrics(snapshots):
+    counters, histograms = _merge(snapshots)
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        if kind == "counter":
+            for (series_name, labels), value in sorted(counters.items()):
+                if series_name == name:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_number(value)}")
+            continue
+        for (series_name, labels), series in sorted(histograms.items()):
+            if series_name != name:
+                continue
+            cumulative = 0
+            for bound, count in zip((*buckets, "+Inf"), series):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels((*labels, ('le', str(bound))))} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_number(series[-1])}")
+            lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+
+    # Ratios are easier to alert on than two counters.
+    lines.append("# HELP webapp_cache_hit_ratio Share of cache reads that were hits, by cache alias.")
+    lines.append("# TYPE webapp_cache_hit_ratio gauge")
+    reads = defaultdict(lambda: {"hit": 0, "miss": 0})
+    for (series_name, labels), value in counters.items():
+        if series_name == "webapp_cache_requests_total":
+            labels = dict(labels)
+            reads[labels["cache"]][labels["result"]] += value
+    for alias, counts in sorted(reads.items()):
+        total = counts["hit"] + counts["miss"]
+        ratio = counts["hit"] / total if total else 0
+        lines.append(f"webapp_cache_hit_ratio{_format_labels((('cache', alias),))} {round(ratio, 4)}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,50 @@
+# Generated by Django 6.0.2 on 2026-10-19 16:47
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('App', '0019_accountregistration_oem_authorization_certificate'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('receipt', 'Receipt'), ('sale', 'Sale'), ('cancellation', 'Cancellation'), ('adjustment', 'Adjustment')], max_length=16)),
+                ('quantity', models.IntegerField()),
+                ('stock_after', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('order', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='inventory_movements', to='App.order')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inventory_movements', to='App.product')),
+                ('vendor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inventory_movements', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ('created_at', 'id'),
+                'indexes': [models.Index(fields=['product', 'created_at'], name='App_invento_product_d86fac_idx'), models.Index(fields=['vendor', 'created_at'], name='App_invento_vendor__5ae2b9_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='InventorySnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('taken_on', models.DateField()),
+                ('stock', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inventory_snapshots', to='App.product')),
+                ('vendor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inventory_snapshots', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ('-taken_on',),
+                'indexes': [models.Index(fields=['vendor', 'taken_on'], name='App_invento_vendor__e996b8_idx')],
+                'constraints': [models.UniqueConstraint(fields=('product', 'taken_on'), name='unique_product_snapshot_day')],
+            },
+        ),
+    ]
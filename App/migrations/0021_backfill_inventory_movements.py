@@ -0,0 +1,72 @@
+from django.db import migrations
+
+
+BATCH_SIZE = 500
+
+
+def forwards(apps, schema_editor):
+    # Rebuild each product's history from what is already stored: one receipt for
+    # everything it ever held (current stock plus all ordered quantity) at creation
+    # time, then one sale per existing order, so the running stock ends at today's.
+    Product = apps.get_model("App", "Product")
+    Order = apps.get_model("App", "Order")
+    InventoryMovement = apps.get_model("App", "InventoryMovement")
+
+    movements = []
+    products = Product.objects.only(
+        "id", "vendor_id", "current_stock", "initial_stock", "created_at"
+    ).order_by("id")
+    for product in products.iterator(chunk_size=BATCH_SIZE):
+        orders = list(
+            Order.objects.filter(product_id=product.id)
+            .only("id", "quantity", "created_at")
+            .order_by("created_at", "id")
+        )
+        current_stock = (
+            product.current_stock if product.current_stock is not None else product.initial_stock
+        )
+        stock = current_stock + sum(order.quantity for order in orders)
+        movements.append(
+            InventoryMovement(
+                product_id=product.id,
+                vendor_id=product.vendor_id,
+                kind="receipt",
+                quantity=stock,
+                stock_after=stock,
+                created_at=product.created_at,
+            )
+        )
+        for order in orders:
+            stock -= order.quantity
+            movements.append(
+                InventoryMovement(
+                    product_id=product.id,
+                    vendor_id=product.vendor_id,
+                    order_id=order.id,
+                    kind="sale",
+                    quantity=-order.quantity,
+                    stock_after=stock,
+                    created_at=max(order.created_at, product.created_at),
+                )
+            )
+        if len(movements) >= BATCH_SIZE:
+            InventoryMovement.objects.bulk_create(movements)
+            movements = []
+    if movements:
+        InventoryMovement.objects.bulk_create(movements)
+
+
+def backwards(apps, schema_editor):
+    InventoryMovement = apps.get_model("App", "InventoryMovement")
+    InventoryMovement.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("App", "0020_inventory_ledger"),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 6.0.2 on 2026-10-19 17:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('App', '0021_backfill_inventory_movements'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LowStockAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stock', models.PositiveIntegerField()),
+                ('reorder_level', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('resolved_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ('-created_at',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('current_stock__lte', models.F('reorder_level')), ('is_active', True)), fields=['vendor', 'current_stock'], name='product_low_stock_idx'),
+        ),
+        migrations.AddField(
+            model_name='lowstockalert',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='low_stock_alerts', to='App.product'),
+        ),
+        migrations.AddField(
+            model_name='lowstockalert',
+            name='vendor',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='low_stock_alerts', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='lowstockalert',
+            index=models.Index(fields=['vendor', 'resolved_at'], name='App_lowstoc_vendor__340837_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='lowstockalert',
+            constraint=models.UniqueConstraint(condition=models.Q(('resolved_at__isnull', True)), fields=('product',), name='unique_open_low_stock_alert'),
+        ),
+    ]
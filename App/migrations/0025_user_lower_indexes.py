@@ -0,0 +1,20 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("App", "0024_email_outbox"),
+        ("auth", "0012_alter_user_first_name_max_length"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="CREATE INDEX auth_user_username_lower_idx ON auth_user (LOWER(username));",
+            reverse_sql="DROP INDEX auth_user_username_lower_idx;",
+        ),
+        migrations.RunSQL(
+            sql="CREATE INDEX auth_user_email_lower_idx ON auth_user (LOWER(email));",
+            reverse_sql="DROP INDEX auth_user_email_lower_idx;",
+        ),
+    ]
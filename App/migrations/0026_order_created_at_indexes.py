@@ -0,0 +1,23 @@
+# Generated by Django 6.0.2 on 2026-10-19 18:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('App', '0025_user_lower_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['created_at'], name='App_order_created_eb94df_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['buyer', 'created_at'], name='App_order_buyer_i_c3e34a_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 6.0.2 on 2026-10-19 18:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def redact_sent_reset_emails(apps, schema_editor):
+    # Reset emails queued before this migration carry a live token in the body.
+    OutboundEmail = apps.get_model("App", "OutboundEmail")
+    OutboundEmail.objects.filter(subject="Reset your Wahid parts password").exclude(
+        status="pending"
+    ).update(body="")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('App', '0026_order_created_at_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboundemail',
+            name='password_reset_user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(redact_sent_reset_emails, migrations.RunPython.noop),
+    ]
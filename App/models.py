@@ -4,6 +4,7 @@ from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.core.validators import MaxValueValidator, MinValueValidator, RegexValidator
 from django.db import models
+from django.utils import timezone
 
 
 class AccountRegistration(models.Model):
@@ -70,6 +71,13 @@ class Product(models.Model):
         indexes = [
             models.Index(fields=["vendor", "category"]),
             models.Index(fields=["vendor", "is_active"]),
+            # Only rows at or below their reorder level are indexed, so low-stock
+            # lookups grow with the number of low-stock items, not the catalog.
+            models.Index(
+                fields=["vendor", "current_stock"],
+                condition=models.Q(is_active=True, current_stock__lte=models.F("reorder_level")),
+                name="product_low_stock_idx",
+            ),
         ]
         constraints = [
             models.UniqueConstraint(fields=["vendor", "name"], name="unique_vendor_product_name"),
@@ -143,11 +151,180 @@ class Order(models.Model):
     is_delivered = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at"]),
+            models.Index(fields=["buyer", "created_at"]),
+        ]
+
     def __str__(self):
         return f"Order #{self.id} - {self.product.name} x {self.quantity} for {self.buyer.username}"
         return f"Order #{self.id} - {self.product.name} x {self.quantity} for {self.buyer.username}"
 
 
+class InventoryMovement(models.Model):
+    KIND_RECEIPT = "receipt"
+    KIND_SALE = "sale"
+    KIND_CANCELLATION = "cancellation"
+    KIND_ADJUSTMENT = "adjustment"
+    KIND_CHOICES = (
+        (KIND_RECEIPT, "Receipt"),
+        (KIND_SALE, "Sale"),
+        (KIND_CANCELLATION, "Cancellation"),
+        (KIND_ADJUSTMENT, "Adjustment"),
+    )
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="inventory_movements")
+    vendor = models.ForeignKey(User, on_delete=models.CASCADE, related_name="inventory_movements")
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="inventory_movements",
+    )
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    quantity = models.IntegerField()
+    stock_after = models.PositiveIntegerField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ("created_at", "id")
+        indexes = [
+            models.Index(fields=["product", "created_at"]),
+            models.Index(fields=["vendor", "created_at"]),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise ValidationError("Inventory movements are append-only.")
+        return super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.quantity:+d} for product #{self.product_id}"
+
+
+class InventorySnapshot(models.Model):
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="inventory_snapshots")
+    vendor = models.ForeignKey(User, on_delete=models.CASCADE, related_name="inventory_snapshots")
+    taken_on = models.DateField()
+    stock = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ("-taken_on",)
+        indexes = [
+            models.Index(fields=["vendor", "taken_on"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["product", "taken_on"], name="unique_product_snapshot_day"),
+        ]
+
+    def __str__(self):
+        return f"Product #{self.product_id} had {self.stock} on {self.taken_on}"
+
+
+class LowStockAlert(models.Model):
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="low_stock_alerts")
+    vendor = models.ForeignKey(User, on_delete=models.CASCADE, related_name="low_stock_alerts")
+    stock = models.PositiveIntegerField()
+    reorder_level = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    resolved_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ("-created_at",)
+        indexes = [
+            models.Index(fields=["vendor", "resolved_at"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["product"],
+                condition=models.Q(resolved_at__isnull=True),
+                name="unique_open_low_stock_alert",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Product #{self.product_id} at {self.stock} (reorder level {self.reorder_level})"
+
+
+class BackgroundTask(models.Model):
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = (
+        (STATUS_PENDING, "Pending"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+    )
+
+    name = models.CharField(max_length=120)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=32, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ("run_after", "id")
+        indexes = [
+            models.Index(fields=["status", "run_after"]),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
+
+
+class OutboundEmail(models.Model):
+    STATUS_PENDING = "pending"
+    STATUS_SENDING = "sending"
+    STATUS_SENT = "sent"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = (
+        (STATUS_PENDING, "Pending"),
+        (STATUS_SENDING, "Sending"),
+        (STATUS_SENT, "Sent"),
+        (STATUS_FAILED, "Failed"),
+    )
+
+    to_email = models.EmailField(max_length=254)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    password_reset_user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=32, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ("-created_at",)
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.to_email} ({self.status})"
+
+
 class ProductCategory(models.Model):
     name = models.CharField(max_length=80, unique=True)
     description = models.TextField(blank=True)
@@ -0,0 +1,223 @@
+import logging
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.tokens import default_token_generator
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from .catalog import seller_display_name
+from .models import OutboundEmail
+
+
+logger = logging.getLogger(__name__)
+
+EMAIL_BATCH_SIZE = 50
+EMAIL_RETRY_BASE_SECONDS = 60
+EMAIL_LOCK_TIMEOUT = timedelta(minutes=10)
+EMAIL_RETENTION = timedelta(days=30)
+# Reset links are stored with this in place of the token. The real token is only
+# signed when the message is sent, so the outbox never holds a usable link.
+PASSWORD_RESET_TOKEN_PLACEHOLDER = "__token__"
+
+
+def _queue_outbound(emails):
+    # Rows are written after the caller's transaction commits, so a rolled-back
+    # request sends nothing.
+    emails = [email for email in emails if email.to_email]
+    if emails:
+        transaction.on_commit(lambda: OutboundEmail.objects.bulk_create(emails))
+
+
+def queue_emails(messages):
+    # messages: (to_email, subject, body) tuples.
+    _queue_outbound(
+        OutboundEmail(to_email=to_email, subject=subject, body=body) for to_email, subject, body in messages
+    )
+
+
+def queue_template_email(to_email, subject, template_name, context):
+    queue_emails([(to_email, subject, render_to_string(template_name, context))])
+
+
+def queue_password_reset_email(request, user):
+    reset_url = request.build_absolute_uri(
+        reverse(
+            "reset_password",
+            kwargs={
+                "uidb64": urlsafe_base64_encode(force_bytes(user.pk)),
+                "token": PASSWORD_RESET_TOKEN_PLACEHOLDER,
+            },
+        )
+    )
+    body = render_to_string(
+        "emails/password_reset.txt",
+        {
+            "user_name": seller_display_name(user.first_name, user.last_name, user.username),
+            "reset_url": reset_url,
+        },
+    )
+    _queue_outbound(
+        [
+            OutboundEmail(
+                to_email=user.email,
+                subject="Reset your Wahid parts password",
+                body=body,
+                password_reset_user=user,
+            )
+        ]
+    )
+
+
+def queue_order_placed_emails(request, buyer, orders):
+    orders_url = request.build_absolute_uri(reverse("buyer_orders"))
+    vendor_orders_url = request.build_absolute_uri(reverse("vendor_orders"))
+    messages = [
+        (
+            buyer.email,
+            "Your Wahid parts order was received",
+            render_to_string(
+                "emails/order_placed_buyer.txt",
+                {
+                    "buyer_name": seller_display_name(buyer.first_name, buyer.last_name, buyer.username),
+                    "orders": orders,
+                    "total": sum(order.total_price for order in orders),
+                    "orders_url": orders_url,
+                },
+            ),
+        )
+    ]
+    orders_by_vendor = {}
+    for order in orders:
+        orders_by_vendor.setdefault(order.product.vendor, []).append(order)
+    for vendor, vendor_orders in orders_by_vendor.items():
+        messages.append(
+            (
+                vendor.email,
+                "New order on Wahid parts",
+                render_to_string(
+                    "emails/order_placed_vendor.txt",
+                    {
+                        "vendor_name": seller_display_name(vendor.first_name, vendor.last_name, vendor.username),
+                        "orders": vendor_orders,
+                        "orders_url": vendor_orders_url,
+                    },
+                ),
+            )
+        )
+    queue_emails(messages)
+
+
+def queue_seller_approved_email(request, user):
+    queue_template_email(
+        user.email,
+        "Your Wahid parts seller account is approved",
+        "emails/seller_approved.txt",
+        {
+            "seller_name": seller_display_name(user.first_name, user.last_name, user.username),
+            "login_url": request.build_absolute_uri(reverse("login")),
+        },
+    )
+
+
+def _claim_emails(limit):
+    now = timezone.now()
+    OutboundEmail.objects.filter(
+        status=OutboundEmail.STATUS_SENDING,
+        locked_at__lt=now - EMAIL_LOCK_TIMEOUT,
+    ).update(status=OutboundEmail.STATUS_PENDING, locked_by="")
+
+    email_ids = list(
+        OutboundEmail.objects.filter(status=OutboundEmail.STATUS_PENDING, next_attempt_at__lte=now)
+        .order_by("next_attempt_at", "id")
+        .values_list("id", flat=True)[:limit]
+    )
+    if not email_ids:
+        return []
+    token = uuid.uuid4().hex
+    OutboundEmail.objects.filter(pk__in=email_ids, status=OutboundEmail.STATUS_PENDING).update(
+        status=OutboundEmail.STATUS_SENDING,
+        locked_by=token,
+        locked_at=now,
+        attempts=F("attempts") + 1,
+    )
+    return list(
+        OutboundEmail.objects.filter(locked_by=token, status=OutboundEmail.STATUS_SENDING)
+        .select_related("password_reset_user")
+        .order_by("next_attempt_at", "id")
+    )
+
+
+def _message_body(email):
+    if email.password_reset_user is None:
+        return email.body
+    token = default_token_generator.make_token(email.password_reset_user)
+    return email.body.replace(PASSWORD_RESET_TOKEN_PLACEHOLDER, token)
+
+
+def _mark_failed(email, error_text):
+    if email.attempts >= email.max_attempts:
+        changes = {"status": OutboundEmail.STATUS_FAILED}
+    else:
+        delay = EMAIL_RETRY_BASE_SECONDS * 2 ** (email.attempts - 1)
+        changes = {
+            "status": OutboundEmail.STATUS_PENDING,
+            "next_attempt_at": timezone.now() + timedelta(seconds=delay),
+        }
+    OutboundEmail.objects.filter(pk=email.pk).update(locked_by="", last_error=error_text, **changes)
+
+
+def send_pending_emails(batch_size=EMAIL_BATCH_SIZE):
+    sent = failed = 0
+    # One connection serves every message in the run; it is only reopened after
+    # a failure may have left it unusable.
+    connection = get_connection(fail_silently=False)
+    try:
+        while True:
+            emails = _claim_emails(batch_size)
+            if not emails:
+                break
+            sent_ids = []
+            for email in emails:
+                message = EmailMessage(
+                    email.subject,
+                    _message_body(email),
+                    settings.DEFAULT_FROM_EMAIL,
+                    [email.to_email],
+                    connection=connection,
+                )
+                try:
+                    connection.open()
+                    message.send()
+                except Exception as exc:
+                    logger.warning("Sending email #%s to %s failed: %s", email.pk, email.to_email, exc)
+                    connection.close()
+                    _mark_failed(email, f"{type(exc).__name__}: {exc}")
+                    failed += 1
+                    continue
+                sent_ids.append(email.pk)
+            if sent_ids:
+                OutboundEmail.objects.filter(pk__in=sent_ids).update(
+                    status=OutboundEmail.STATUS_SENT,
+                    locked_by="",
+                    last_error="",
+                    sent_at=timezone.now(),
+                )
+                sent += len(sent_ids)
+    finally:
+        connection.close()
+    return {"sent": sent, "failed": failed}
+
+
+def prune_outbox():
+    return OutboundEmail.objects.filter(
+        status__in=[OutboundEmail.STATUS_SENT, OutboundEmail.STATUS_FAILED],
+        created_at__lt=timezone.now() - EMAIL_RETENTION,
+    ).delete()[0]
@@ -0,0 +1,452 @@
+import csv
+import io
+import os
+import zipfile
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from PIL import Image, UnidentifiedImageError
+
+from .catalog import invalidate_product_caches
+from .models import InventoryMovement, Product, ProductCategory
+
+
+PRODUCT_IMPORT_EXTENSIONS = (".csv", ".xlsx")
+PRODUCT_IMPORT_MAX_BYTES = 50 * 1024 * 1024
+# Rows are validated and uniqueness-checked this many at a time; each batch is
+# inserted in its own transaction so a late failure never rolls back earlier work.
+PRODUCT_IMPORT_BATCH_SIZE = 1000
+PRODUCT_IMPORT_MAX_REPORTED_ERRORS = 200
+
+PRODUCT_IMPORT_COLUMNS = (
+    "name",
+    "sku",
+    "category",
+    "price",
+    "initial_stock",
+    "current_stock",
+    "reorder_level",
+    "description",
+)
+PRODUCT_IMPORT_REQUIRED_COLUMNS = ("name", "sku", "category", "price", "initial_stock", "description")
+PRODUCT_IMPORT_COLUMN_ALIASES = {
+    "vin": "sku",
+    "part_number": "sku",
+    "stock": "initial_stock",
+    "quantity": "initial_stock",
+    "reorder": "reorder_level",
+}
+
+PRODUCT_IMAGE_ARCHIVE_MAX_BYTES = 200 * 1024 * 1024
+PRODUCT_IMAGE_ARCHIVE_MAX_ENTRIES = 5000
+PRODUCT_IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+PRODUCT_IMAGE_MAX_BYTES = 5 * 1024 * 1024
+PRODUCT_IMAGE_BATCH_SIZE = 200
+
+PRICE_LIMIT = Decimal("100000000")
+PRICE_STEP = Decimal("0.01")
+
+
+class ProductImportError(Exception):
+    pass
+
+
+def _normalize_header(value):
+    key = str(value or "").strip().lower().replace(" ", "_").replace("-", "_")
+    return PRODUCT_IMPORT_COLUMN_ALIASES.get(key, key)
+
+
+def _iter_csv_rows(uploaded_file):
+    text_stream = io.TextIOWrapper(uploaded_file, encoding="utf-8-sig", newline="")
+    try:
+        yield from csv.reader(text_stream)
+    except (UnicodeDecodeError, csv.Error) as exc:
+        raise ProductImportError(f"Could not read the CSV file: {exc}") from exc
+    finally:
+        text_stream.detach()
+
+
+def _xlsx_cell_value(value):
+    if value is None:
+        return ""
+    # Excel stores every number as a float, so a numeric SKU or stock cell comes
+    # back as 12345.0.
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _iter_xlsx_rows(uploaded_file):
+    try:
+        from openpyxl import load_workbook
+    except ImportError as exc:
+        raise ProductImportError(
+            "XLSX import requires the openpyxl package. Upload a CSV file instead."
+        ) from exc
+
+    try:
+        workbook = load_workbook(uploaded_file, read_only=True, data_only=True)
+    except Exception as exc:
+        raise ProductImportError("Could not read the XLSX file.") from exc
+    try:
+        sheet = workbook.worksheets[0]
+        for values in sheet.iter_rows(values_only=True):
+            yield [_xlsx_cell_value(value) for value in values]
+    finally:
+        workbook.close()
+
+
+def iter_import_records(uploaded_file):
+    ext = os.path.splitext(uploaded_file.name or "")[1].lower()
+    if ext == ".csv":
+        rows = _iter_csv_rows(uploaded_file)
+    elif ext == ".xlsx":
+        rows = _iter_xlsx_rows(uploaded_file)
+    else:
+        raise ProductImportError("Only CSV or XLSX files can be imported.")
+
+    header = None
+    for row_number, values in enumerate(rows, start=1):
+        if header is None:
+            header = [_normalize_header(value) for value in values]
+            missing = [column for column in PRODUCT_IMPORT_REQUIRED_COLUMNS if column not in header]
+            if missing:
+                raise ProductImportError(f"Missing required columns: {', '.join(missing)}.")
+            continue
+        if not any(str(value).strip() for value in values):
+            continue
+        yield row_number, {
+            column: str(value).strip()
+            for column, value in zip(header, values)
+            if column in PRODUCT_IMPORT_COLUMNS
+        }
+    if header is None:
+        raise ProductImportError("The file is empty.")
+
+
+def _parse_count(value, label, default=None):
+    if value in ("", None):
+        if default is None:
+            raise ValueError(f"{label} is required.")
+        return default
+    try:
+        number = Decimal(value)
+    except InvalidOperation:
+        raise ValueError(f"{label} must be a whole number.") from None
+    if number != number.to_integral_value() or number < 0:
+        raise ValueError(f"{label} must be a whole number of 0 or more.")
+    return int(number)
+
+
+def parse_product_price(value):
+    try:
+        price = Decimal(value)
+    except InvalidOperation:
+        raise ValueError("Price must be a number.") from None
+    if not price.is_finite() or price < PRICE_STEP or price >= PRICE_LIMIT:
+        raise ValueError("Price must be between 0.01 and 99999999.99.")
+    if price != price.quantize(PRICE_STEP):
+        raise ValueError("Price can have at most 2 decimal places.")
+    return price.quantize(PRICE_STEP)
+
+
+def _build_product(vendor, record, category_names):
+    # Mirrors ProductForm and Product.clean() without touching the database; the
+    # uniqueness checks run afterwards for the whole batch at once.
+    name = record.get("name", "")
+    if len(name) < 3 or len(name) > 160:
+        raise ValueError("Name must be 3 to 160 characters.")
+
+    sku = record.get("sku", "").upper()
+    try:
+        Product.vin_validator(sku)
+    except ValidationError as exc:
+        raise ValueError(exc.messages[0]) from None
+
+    category = record.get("category", "")
+    if category not in category_names:
+        raise ValueError(f"Unknown category '{category}'.")
+
+    description = record.get("description", "")
+    if len(description) < 10:
+        raise ValueError("Description must be at least 10 characters.")
+    if len(description) > 500:
+        raise ValueError("Description must be 500 characters or less.")
+
+    initial_stock = _parse_count(record.get("initial_stock"), "Initial stock")
+    return Product(
+        vendor=vendor,
+        name=name,
+        vin=sku,
+        category=category,
+        price=parse_product_price(record.get("price", "")),
+        initial_stock=initial_stock,
+        current_stock=_parse_count(record.get("current_stock"), "Current stock", initial_stock),
+        reorder_level=_parse_count(record.get("reorder_level"), "Reorder level", 0),
+        description=description,
+        # Imported rows have no image yet; they stay off the storefront until the
+        # image archive import attaches one (see ProductImageImport).
+        is_active=False,
+    )
+
+
+class ProductImport:
+    def __init__(self, vendor):
+        self.vendor = vendor
+        self.category_names = set(
+            ProductCategory.objects.filter(is_visible=True).values_list("name", flat=True)
+        )
+        self.seen_skus = set()
+        self.seen_names = set()
+        self.total_rows = 0
+        self.created_count = 0
+        self.error_count = 0
+        self.errors = []
+
+    def add_error(self, row_number, message):
+        self.error_count += 1
+        if len(self.errors) < PRODUCT_IMPORT_MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row_number, "message": message})
+
+    def run(self, uploaded_file):
+        batch = []
+        try:
+            for row_number, record in iter_import_records(uploaded_file):
+                self.total_rows += 1
+                batch.append((row_number, record))
+                if len(batch) >= PRODUCT_IMPORT_BATCH_SIZE:
+                    self._import_batch(batch)
+                    batch = []
+        except ProductImportError as exc:
+            # Earlier batches are already committed, so report how far we got.
+            if not self.total_rows:
+                raise
+            self.add_error(row_number + 1, str(exc))
+        if batch:
+            self._import_batch(batch)
+        return self.report()
+
+    def _import_batch(self, batch):
+        candidates = []
+        for row_number, record in batch:
+            try:
+                product = _build_product(self.vendor, record, self.category_names)
+            except ValueError as exc:
+                self.add_error(row_number, str(exc))
+                continue
+            if product.vin in self.seen_skus:
+                self.add_error(row_number, f"SKU '{product.vin}' appears more than once in the file.")
+                continue
+            if product.name in self.seen_names:
+                self.add_error(row_number, f"Name '{product.name}' appears more than once in the file.")
+                continue
+            self.seen_skus.add(product.vin)
+            self.seen_names.add(product.name)
+            candidates.append((row_number, product))
+        if not candidates:
+            return
+
+        skus = [product.vin for _row_number, product in candidates]
+        names = [product.name for _row_number, product in candidates]
+        taken_skus = set(Product.objects.filter(vin__in=skus).values_list("vin", flat=True))
+        taken_names = set(
+            Product.objects.filter(vendor=self.vendor, name__in=names).values_list("name", flat=True)
+        )
+
+        products = []
+        for row_number, product in candidates:
+            if product.vin in taken_skus:
+                self.add_error(row_number, f"SKU '{product.vin}' already exists.")
+            elif product.name in taken_names:
+                self.add_error(row_number, f"You already have a product named '{product.name}'.")
+            else:
+                products.append((row_number, product))
+        if not products:
+            return
+
+        try:
+            with transaction.atomic():
+                created = Product.objects.bulk_create([product for _row_number, product in products])
+                InventoryMovement.objects.bulk_create(
+                    [
+                        InventoryMovement(
+                            product_id=product.pk,
+                            vendor_id=product.vendor_id,
+                            kind=InventoryMovement.KIND_RECEIPT,
+                            quantity=product.current_stock,
+                            stock_after=product.current_stock,
+                        )
+                        for product in created
+                        if product.current_stock
+                    ]
+                )
+        except IntegrityError:
+            # Another request claimed one of these SKUs or names after the check.
+            for row_number, _product in products:
+                self.add_error(row_number, "Conflicts with a product saved during the import.")
+            return
+        self.created_count += len(products)
+        invalidate_product_caches([product.vin for _row_number, product in products])
+
+    def report(self):
+        return {
+            "total_rows": self.total_rows,
+            "created_count": self.created_count,
+            "error_count": self.error_count,
+            "errors": self.errors,
+        }
+
+
+def import_vendor_products(vendor, uploaded_file):
+    return ProductImport(vendor).run(uploaded_file)
+
+
+def product_import_template_csv():
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(PRODUCT_IMPORT_COLUMNS)
+    writer.writerow(
+        ("Brake Pads Set", "BRK1001", "Brakes", "49.99", "25", "", "5", "Front ceramic brake pads.")
+    )
+    return buffer.getvalue()
+
+
+def _archive_image_entries(archive):
+    entries = [info for info in archive.infolist() if not info.is_dir()]
+    if len(entries) > PRODUCT_IMAGE_ARCHIVE_MAX_ENTRIES:
+        raise ProductImportError(
+            f"The archive has more than {PRODUCT_IMAGE_ARCHIVE_MAX_ENTRIES} files."
+        )
+    for info in entries:
+        basename = os.path.basename(info.filename)
+        # Skip the metadata folders and dotfiles that macOS and Windows add.
+        if not basename or basename.startswith(".") or "__MACOSX/" in info.filename:
+            continue
+        yield info, basename
+
+
+def _read_archive_image(archive, info, ext):
+    if ext not in PRODUCT_IMAGE_EXTENSIONS:
+        raise ValueError("Only JPG or PNG files are allowed.")
+    # file_size comes from the central directory; the read below is capped too in
+    # case the archive lies about it.
+    if info.file_size > PRODUCT_IMAGE_MAX_BYTES:
+        raise ValueError("Image must be 5MB or smaller.")
+    with archive.open(info) as entry:
+        data = entry.read(PRODUCT_IMAGE_MAX_BYTES + 1)
+    if len(data) > PRODUCT_IMAGE_MAX_BYTES:
+        raise ValueError("Image must be 5MB or smaller.")
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image.verify()
+    except (UnidentifiedImageError, OSError, SyntaxError):
+        raise ValueError("File is not a valid image.") from None
+    return data
+
+
+def _delete_stored_files(names):
+    for name in names:
+        if name:
+            default_storage.delete(name)
+
+
+class ProductImageImport:
+    def __init__(self, vendor):
+        self.vendor = vendor
+        self.seen_skus = set()
+        self.total_entries = 0
+        self.updated_count = 0
+        self.error_count = 0
+        self.errors = []
+
+    def add_error(self, filename, message):
+        self.error_count += 1
+        if len(self.errors) < PRODUCT_IMPORT_MAX_REPORTED_ERRORS:
+            self.errors.append({"file": filename, "message": message})
+
+    def run(self, uploaded_file):
+        try:
+            archive = zipfile.ZipFile(uploaded_file)
+        except (zipfile.BadZipFile, OSError):
+            raise ProductImportError("Could not read the ZIP archive.") from None
+        with archive:
+            batch = []
+            for info, basename in _archive_image_entries(archive):
+                self.total_entries += 1
+                batch.append((info, basename))
+                if len(batch) >= PRODUCT_IMAGE_BATCH_SIZE:
+                    self._import_batch(archive, batch)
+                    batch = []
+            if batch:
+                self._import_batch(archive, batch)
+        return self.report()
+
+    def _import_batch(self, archive, batch):
+        entries_by_sku = {}
+        for info, basename in batch:
+            stem, ext = os.path.splitext(basename)
+            sku = stem.strip().upper()
+            if sku in self.seen_skus:
+                self.add_error(basename, f"More than one image for SKU '{sku}'.")
+                continue
+            self.seen_skus.add(sku)
+            entries_by_sku[sku] = (info, basename, ext.lower())
+        if not entries_by_sku:
+            return
+
+        products = {
+            product.vin: product
+            for product in self.vendor.products.filter(vin__in=entries_by_sku).only(
+                "id", "vendor_id", "vin", "product_image", "is_active"
+            )
+        }
+        updated = []
+        replaced_files = []
+        try:
+            for sku, (info, basename, ext) in entries_by_sku.items():
+                product = products.get(sku)
+                if product is None:
+                    self.add_error(basename, f"None of your products has SKU '{sku}'.")
+                    continue
+                try:
+                    data = _read_archive_image(archive, info, ext)
+                except ValueError as exc:
+                    self.add_error(basename, str(exc))
+                    continue
+                if product.product_image:
+                    replaced_files.append(product.product_image.name)
+                else:
+                    # First image for a product created by the spreadsheet import.
+                    product.is_active = True
+                product.product_image.save(f"{sku}{ext}", File(io.BytesIO(data)), save=False)
+                product.updated_at = timezone.now()
+                updated.append(product)
+            if not updated:
+                return
+
+            with transaction.atomic():
+                Product.objects.bulk_update(updated, ["product_image", "is_active", "updated_at"])
+                # Old images are only removed once nothing can roll the rows back.
+                transaction.on_commit(lambda: _delete_stored_files(replaced_files))
+        except BaseException:
+            # Files written for this batch are not referenced by any row.
+            _delete_stored_files(product.product_image.name for product in updated)
+            raise
+        self.updated_count += len(updated)
+        invalidate_product_caches([product.vin for product in updated])
+
+    def report(self):
+        return {
+            "total_entries": self.total_entries,
+            "updated_count": self.updated_count,
+            "error_count": self.error_count,
+            "errors": self.errors,
+        }
+
+
+def import_vendor_product_images(vendor, uploaded_file):
+    return ProductImageImport(vendor).run(uploaded_file)
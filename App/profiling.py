@@ -0,0 +1,266 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import ExitStack
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, connections
+from django.urls import reverse
+from django.utils import timezone
+
+from .instrumentation import (
+    collect_request_metrics,
+    current_request_metrics,
+    install_instrumentation,
+    suspend_request_metrics,
+)
+
+
+PROFILE_TRIGGER_PARAM = "_profile"
+PROFILE_TRIGGER_HEADER = "X-Profile"
+PROFILE_SAMPLE_INTERVAL = 0.002
+PROFILE_EXPLAIN_LIMIT = 50
+PROFILE_STATS_LINES = 80
+PROFILE_ID_RE = re.compile(r"\d{8}-\d{6}-[0-9a-f]{8}")
+
+
+def requested_profiler(request):
+    value = (
+        request.GET.get(PROFILE_TRIGGER_PARAM) or request.headers.get(PROFILE_TRIGGER_HEADER) or ""
+    ).strip().lower()
+    if value in ("1", "true", "sample"):
+        return "sample"
+    if value == "cprofile":
+        return "cprofile"
+    return None
+
+
+def _frame_label(code):
+    filename = code.co_filename
+    base_dir = str(settings.BASE_DIR)
+    if filename.startswith(base_dir):
+        filename = os.path.relpath(filename, base_dir)
+    elif "site-packages" in filename:
+        filename = filename.split("site-packages" + os.sep, 1)[-1]
+    else:
+        filename = os.path.basename(filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    # Samples every thread and keeps them apart; the report only keeps the threads
+    # that did work for the profiled request (see RequestProfile.thread_ids).
+    def __init__(self, interval=PROFILE_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.samples = Counter()
+        self._labels = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    label = self._labels.get(frame.f_code)
+                    if label is None:
+                        label = self._labels[frame.f_code] = _frame_label(frame.f_code)
+                    stack.append(label)
+                    frame = frame.f_back
+                self.samples[thread_id, ";".join(reversed(stack))] += 1
+
+    def collapsed(self, thread_ids):
+        # Brendan Gregg's folded format: "outer;inner;leaf count" per line.
+        stacks = Counter()
+        for (thread_id, stack), count in self.samples.items():
+            if thread_id in thread_ids:
+                stacks[stack] += count
+        return "\n".join(f"{stack} {count}" for stack, count in stacks.most_common())
+
+
+def _explain(query):
+    connection = connections[query["alias"]]
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"{connection.ops.explain_query_prefix()} {query['sql']}", query["params"])
+            return [" | ".join(str(value) for value in row) for row in cursor.fetchall()]
+    except DatabaseError as exc:
+        return [f"EXPLAIN failed: {exc}"]
+
+
+def explain_queries(queries, limit=PROFILE_EXPLAIN_LIMIT):
+    plans = {}
+    report = []
+    for query in queries:
+        entry = {
+            "alias": query["alias"],
+            "sql": query["sql"],
+            "params": query["params"],
+            "ms": query["ms"],
+        }
+        key = (query["alias"], query["sql"])
+        explainable = not query["many"] and query["sql"].lstrip()[:6].upper() == "SELECT"
+        if explainable and (key in plans or len(plans) < limit):
+            if key not in plans:
+                plans[key] = _explain(query)
+            entry["explain"] = plans[key]
+        report.append(entry)
+    return report
+
+
+class RequestProfile:
+    def __init__(self, request, profiler):
+        self.request = request
+        self.profiler = profiler
+        self.profile_id = f"{timezone.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}"
+        self.thread_ids = {threading.get_ident()}
+        self.sampler = StackSampler() if profiler == "sample" else None
+        self.cprofile = cProfile.Profile() if profiler == "cprofile" else None
+
+    def start(self, metrics):
+        self.metrics = metrics
+        metrics.queries = []
+        self.started = time.perf_counter()
+        if self.sampler:
+            self.sampler.start()
+        else:
+            self.cprofile.enable()
+
+    def stop(self):
+        if self.sampler:
+            self.sampler.stop()
+        else:
+            self.cprofile.disable()
+        self.elapsed = time.perf_counter() - self.started
+        # Async views run on an event loop thread and their queries on
+        # sync_to_async threads.
+        self.thread_ids |= self.metrics.threads
+
+    def _stats_text(self):
+        stream = io.StringIO()
+        stats = pstats.Stats(self.cprofile, stream=stream)
+        stats.sort_stats("cumulative").print_stats(PROFILE_STATS_LINES)
+        return stream.getvalue()
+
+    def save(self, response):
+        with suspend_request_metrics():
+            queries = explain_queries(self.metrics.queries)
+        self.metrics.queries = None
+        match = self.request.resolver_match
+        data = {
+            "id": self.profile_id,
+            "created_at": timezone.now().isoformat(),
+            "method": self.request.method,
+            "path": self.request.get_full_path(),
+            "view": match.view_name if match else "",
+            "status": response.status_code,
+            "profiler": self.profiler,
+            "total_ms": round(self.elapsed * 1000, 2),
+            "sql_count": len(queries),
+            "sql_ms": round(sum(query["ms"] for query in queries), 2),
+        }
+        if self.sampler:
+            data["sample_interval_ms"] = self.sampler.interval * 1000
+            data["stacks"] = self.sampler.collapsed(self.thread_ids)
+        else:
+            data["stats"] = self._stats_text()
+        data["queries"] = queries
+
+        directory = Path(settings.REQUEST_PROFILE_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"{self.profile_id}.json").write_text(
+            json.dumps(data, indent=2, default=str), encoding="utf-8"
+        )
+        response["X-Profile-Id"] = self.profile_id
+        response["X-Profile-Url"] = reverse("admin_request_profile", args=[self.profile_id])
+
+
+def load_request_profile(profile_id):
+    if not PROFILE_ID_RE.fullmatch(profile_id):
+        return None
+    path = Path(settings.REQUEST_PROFILE_DIR) / f"{profile_id}.json"
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+
+
+class RequestProfilerMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_PROFILER_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        install_instrumentation()
+
+    # The user lookup behind the superuser check is profiler overhead, so it is
+    # kept out of the request's query count and budget.
+    @staticmethod
+    def _is_superuser(request):
+        with suspend_request_metrics():
+            return request.user.is_superuser
+
+    @staticmethod
+    async def _ais_superuser(request):
+        with suspend_request_metrics():
+            return (await request.auser()).is_superuser
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        profiler = requested_profiler(request)
+        if profiler is None or not self._is_superuser(request):
+            return self.get_response(request)
+
+        profile = RequestProfile(request, profiler)
+        with ExitStack() as stack:
+            metrics = current_request_metrics() or stack.enter_context(collect_request_metrics())
+            profile.start(metrics)
+            try:
+                response = self.get_response(request)
+            finally:
+                profile.stop()
+        profile.save(response)
+        return response
+
+    async def __acall__(self, request):
+        profiler = requested_profiler(request)
+        if profiler is None or not await self._ais_superuser(request):
+            return await self.get_response(request)
+
+        profile = RequestProfile(request, profiler)
+        with ExitStack() as stack:
+            metrics = current_request_metrics() or stack.enter_context(collect_request_metrics())
+            profile.start(metrics)
+            try:
+                response = await self.get_response(request)
+            finally:
+                profile.stop()
+        await sync_to_async(profile.save)(response)
+        return response
@@ -0,0 +1,8 @@
+from ..metrics import record_session_write
+
+
+class MeteredSessionMixin:
+    def save(self, *args, **kwargs):
+        result = super().save(*args, **kwargs)
+        record_session_write()
+        return result
@@ -0,0 +1,7 @@
+from django.contrib.sessions.backends import cache
+
+from . import MeteredSessionMixin
+
+
+class SessionStore(MeteredSessionMixin, cache.SessionStore):
+    pass
@@ -0,0 +1,7 @@
+from django.contrib.sessions.backends import cached_db
+
+from . import MeteredSessionMixin
+
+
+class SessionStore(MeteredSessionMixin, cached_db.SessionStore):
+    pass
@@ -0,0 +1,7 @@
+from django.contrib.sessions.backends import db
+
+from . import MeteredSessionMixin
+
+
+class SessionStore(MeteredSessionMixin, db.SessionStore):
+    pass
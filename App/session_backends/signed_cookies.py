@@ -0,0 +1,7 @@
+from django.contrib.sessions.backends import signed_cookies
+
+from . import MeteredSessionMixin
+
+
+class SessionStore(MeteredSessionMixin, signed_cookies.SessionStore):
+    pass
@@ -0,0 +1,304 @@
+import math
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from .models import (
+    AccountRegistration,
+    InventoryMovement,
+    Order,
+    Product,
+    ProductCategory,
+    ProductRating,
+)
+
+
+SYNTHETIC_USERNAME_PREFIX = "synthetic_"
+SYNTHETIC_SKU_PREFIX = "SYN"
+SYNTHETIC_BATCH_SIZE = 1000
+SYNTHETIC_PASSWORD = "synthetic-pass-123"
+# Part numbers may not contain I, O or Q.
+_SKU_ALPHABET = "0123456789ABCDEFGHJKLMNPRSTUVWXYZ"
+
+CATEGORY_NAMES = (
+    "Brakes",
+    "Filters",
+    "Suspension",
+    "Engine",
+    "Electrical",
+    "Lighting",
+    "Exhaust",
+    "Cooling",
+    "Transmission",
+    "Steering",
+    "Body Parts",
+    "Interior",
+    "Wheels & Tyres",
+    "Fuel System",
+    "Ignition",
+    "Belts & Hoses",
+    "Batteries",
+    "Wipers",
+    "Clutch",
+    "Sensors",
+)
+PART_WORDS = (
+    "Pad Set",
+    "Disc",
+    "Filter",
+    "Shock Absorber",
+    "Mount",
+    "Pump",
+    "Sensor",
+    "Bulb",
+    "Gasket",
+    "Belt",
+    "Hose",
+    "Kit",
+)
+GRADE_WORDS = ("Standard", "Premium", "Heavy Duty", "OEM", "Performance", "Economy")
+# Rough share of 1..5 star ratings on marketplaces: mostly positive, few 1-2s.
+RATING_WEIGHTS = (5, 7, 15, 33, 40)
+
+
+def _sku(number):
+    digits = []
+    while True:
+        number, remainder = divmod(number, len(_SKU_ALPHABET))
+        digits.append(_SKU_ALPHABET[remainder])
+        if not number:
+            break
+    return SYNTHETIC_SKU_PREFIX + "".join(reversed(digits))
+
+
+def _skewed_weights(rng, count, exponent=1.1):
+    # Zipf-like popularity: a few items take most of the traffic, in random order.
+    weights = [1 / math.pow(rank, exponent) for rank in range(1, count + 1)]
+    rng.shuffle(weights)
+    return weights
+
+
+def _create_users(rng, role, count, password_hash, batch_size):
+    offset = User.objects.filter(username__startswith=f"{SYNTHETIC_USERNAME_PREFIX}{role}_").count()
+    users = []
+    for index in range(offset, offset + count):
+        username = f"{SYNTHETIC_USERNAME_PREFIX}{role}_{index:06d}"
+        users.append(
+            User(
+                username=username,
+                email=f"{username}@example.com",
+                first_name=rng.choice(("Abebe", "Sara", "Dawit", "Hana", "Yonas", "Meron", "Kebede", "Liya")),
+                last_name=rng.choice(("Tesfaye", "Alemu", "Bekele", "Girma", "Haile", "Mulugeta")),
+                password=password_hash,
+            )
+        )
+    users = User.objects.bulk_create(users, batch_size=batch_size)
+    account_type = (
+        AccountRegistration.ACCOUNT_TYPE_SELLER if role == "seller" else AccountRegistration.ACCOUNT_TYPE_BUYER
+    )
+    AccountRegistration.objects.bulk_create(
+        [
+            AccountRegistration(
+                user_id=user.pk,
+                account_type=account_type,
+                phone_number=f"+2519{rng.randint(10000000, 99999999)}",
+                # A small share of sellers is still waiting for approval.
+                is_verified=role == "buyer" or rng.random() < 0.9,
+            )
+            for user in users
+        ],
+        batch_size=batch_size,
+    )
+    return users
+
+
+def _create_categories(count):
+    names = list(CATEGORY_NAMES[:count])
+    names += [f"Category {index}" for index in range(len(names) + 1, count + 1)]
+    ProductCategory.objects.bulk_create(
+        [ProductCategory(name=name, description=f"{name} for passenger and commercial vehicles.") for name in names],
+        ignore_conflicts=True,
+    )
+    return names
+
+
+def _create_products(rng, sellers, categories, count, batch_size):
+    offset = Product.objects.filter(vin__startswith=SYNTHETIC_SKU_PREFIX).count()
+    # Seller catalogue sizes follow a long tail: most sellers list a few parts,
+    # a handful list thousands.
+    seller_weights = [rng.paretovariate(1.2) for _seller in sellers]
+    category_weights = _skewed_weights(rng, len(categories), exponent=0.8)
+    vendors = rng.choices(sellers, weights=seller_weights, k=count)
+    product_categories = rng.choices(categories, weights=category_weights, k=count)
+    products = []
+    for index, (vendor, category) in enumerate(zip(vendors, product_categories), start=offset):
+        price = min(max(rng.lognormvariate(3.5, 0.9), 1), 5000)
+        initial_stock = int(rng.expovariate(1 / 40)) + 1
+        products.append(
+            Product(
+                vendor_id=vendor.pk,
+                name=f"{rng.choice(GRADE_WORDS)} {category} {rng.choice(PART_WORDS)} {index}",
+                vin=_sku(index),
+                category=category,
+                price=Decimal(str(round(price, 2))),
+                initial_stock=initial_stock,
+                current_stock=initial_stock,
+                reorder_level=rng.choice((0, 2, 5, 10)),
+                description=f"Synthetic {category.lower()} part for load and benchmark runs.",
+                product_image="product_images/synthetic.jpg",
+                is_active=rng.random() < 0.95,
+            )
+        )
+    return Product.objects.bulk_create(products, batch_size=batch_size)
+
+
+def _create_orders(rng, buyers, products, count, months, batch_size):
+    now = timezone.now()
+    window_seconds = int(months * 30 * 24 * 3600)
+    product_weights = _skewed_weights(rng, len(products))
+    buyer_weights = [rng.paretovariate(1.5) for _buyer in buyers]
+    stock = {product.pk: product.initial_stock for product in products}
+
+    orders = []
+    created_times = []
+    picks = zip(
+        rng.choices(products, weights=product_weights, k=count),
+        rng.choices(buyers, weights=buyer_weights, k=count),
+    )
+    for product, buyer in picks:
+        if stock[product.pk] <= 0:
+            continue
+        quantity = min(stock[product.pk], 1 + int(rng.expovariate(1.2)))
+        stock[product.pk] -= quantity
+        created_at = now - timedelta(seconds=rng.randint(0, window_seconds))
+        created_times.append(created_at)
+        orders.append(
+            Order(
+                buyer_id=buyer.pk,
+                product_id=product.pk,
+                quantity=quantity,
+                total_price=product.price * quantity,
+                is_delivered=(now - created_at).days > 14 and rng.random() < 0.85,
+            )
+        )
+
+    orders = Order.objects.bulk_create(orders, batch_size=batch_size)
+    # created_at is auto_now_add, so the spread-out timestamps are written after
+    # the insert.
+    for order, created_at in zip(orders, created_times):
+        order.created_at = created_at
+    Order.objects.bulk_update(orders, ["created_at"], batch_size=batch_size)
+
+    for product in products:
+        product.current_stock = stock[product.pk]
+    Product.objects.bulk_update(products, ["current_stock"], batch_size=batch_size)
+    return orders, now - timedelta(seconds=window_seconds + 86400)
+
+
+def _create_ledger(products, orders, received_at, batch_size):
+    movements = [
+        InventoryMovement(
+            product_id=product.pk,
+            vendor_id=product.vendor_id,
+            kind=InventoryMovement.KIND_RECEIPT,
+            quantity=product.initial_stock,
+            stock_after=product.initial_stock,
+            created_at=received_at,
+        )
+        for product in products
+    ]
+    products_by_id = {product.pk: product for product in products}
+    running_stock = {product.pk: product.initial_stock for product in products}
+    for order in sorted(orders, key=lambda order: order.created_at):
+        running_stock[order.product_id] -= order.quantity
+        movements.append(
+            InventoryMovement(
+                product_id=order.product_id,
+                vendor_id=products_by_id[order.product_id].vendor_id,
+                order_id=order.pk,
+                kind=InventoryMovement.KIND_SALE,
+                quantity=-order.quantity,
+                stock_after=running_stock[order.product_id],
+                created_at=order.created_at,
+            )
+        )
+    InventoryMovement.objects.bulk_create(movements, batch_size=batch_size)
+
+
+def _create_ratings(rng, buyers, products, orders, count, batch_size):
+    ordered_pairs = list({(order.buyer_id, order.product_id) for order in orders})
+    rng.shuffle(ordered_pairs)
+    # Most ratings come from buyers who ordered the part; the rest are random.
+    pairs = set(ordered_pairs[: int(count * 0.7)])
+    attempts = 0
+    while len(pairs) < count and attempts < count * 3:
+        pairs.add((rng.choice(buyers).pk, rng.choice(products).pk))
+        attempts += 1
+    ratings = [
+        ProductRating(user_id=user_id, product_id=product_id, rating=rng.choices(range(1, 6), RATING_WEIGHTS)[0])
+        for user_id, product_id in pairs
+    ]
+    return ProductRating.objects.bulk_create(ratings, batch_size=batch_size, ignore_conflicts=True)
+
+
+def generate_marketplace(
+    sellers,
+    buyers,
+    categories,
+    products,
+    orders,
+    ratings,
+    months=12,
+    seed=None,
+    batch_size=SYNTHETIC_BATCH_SIZE,
+):
+    rng = random.Random(seed)
+    password_hash = make_password(SYNTHETIC_PASSWORD)
+    with transaction.atomic():
+        seller_users = _create_users(rng, "seller", max(1, sellers), password_hash, batch_size)
+        buyer_users = _create_users(rng, "buyer", max(1, buyers), password_hash, batch_size)
+        category_names = _create_categories(max(1, categories))
+        product_rows = _create_products(rng, seller_users, category_names, products, batch_size)
+        order_rows, received_at = (
+            _create_orders(rng, buyer_users, product_rows, orders, months, batch_size)
+            if product_rows
+            else ([], timezone.now())
+        )
+        _create_ledger(product_rows, order_rows, received_at, batch_size)
+        rating_rows = (
+            _create_ratings(rng, buyer_users, product_rows, order_rows, ratings, batch_size)
+            if product_rows
+            else []
+        )
+    return {
+        "sellers": len(seller_users),
+        "buyers": len(buyer_users),
+        "categories": len(category_names),
+        "products": len(product_rows),
+        "orders": len(order_rows),
+        "ratings": len(rating_rows),
+    }
+
+
+def marketplace_scale(products):
+    # Proportions used for benchmark sizes: one seller per 50 parts, one buyer
+    # per 10, three orders and one rating per part.
+    return {
+        "sellers": max(1, products // 50),
+        "buyers": max(1, products // 10),
+        "categories": len(CATEGORY_NAMES),
+        "products": products,
+        "orders": products * 3,
+        "ratings": products,
+    }
+
+
+def delete_synthetic_data():
+    with transaction.atomic():
+        deleted, _details = User.objects.filter(username__startswith=SYNTHETIC_USERNAME_PREFIX).delete()
+    return deleted
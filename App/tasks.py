@@ -0,0 +1,186 @@
+import logging
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .catalog import invalidate_product_caches
+from .models import BackgroundTask, Product
+
+
+logger = logging.getLogger(__name__)
+
+TASK_BATCH_SIZE = 20
+TASK_RETRY_BASE_SECONDS = 30
+# A running task whose worker has not finished it within this window is
+# assumed lost (worker killed) and handed out again.
+TASK_LOCK_TIMEOUT = timedelta(minutes=15)
+TASK_RETENTION = timedelta(days=7)
+
+_task_handlers = {}
+
+
+def background_task(name, max_attempts=5):
+    def decorator(func):
+        _task_handlers[name] = (func, max_attempts)
+        return func
+
+    return decorator
+
+
+def enqueue_task(name, run_after=None, **payload):
+    if name not in _task_handlers:
+        raise LookupError(f"Unknown background task '{name}'.")
+    _func, max_attempts = _task_handlers[name]
+
+    def create_task():
+        if getattr(settings, "BACKGROUND_TASKS_EAGER", False):
+            try:
+                _func(**payload)
+                return
+            except Exception:
+                # The response is already committed, so a failure here must not
+                # turn into a 500. Keep the task for `run_tasks` to retry instead.
+                logger.exception("Background task %s failed when run eagerly.", name)
+                BackgroundTask.objects.create(
+                    name=name,
+                    payload=payload,
+                    max_attempts=max_attempts,
+                    attempts=1,
+                    last_error=traceback.format_exc(),
+                    run_after=timezone.now() + timedelta(seconds=TASK_RETRY_BASE_SECONDS),
+                )
+                return
+        BackgroundTask.objects.create(
+            name=name,
+            payload=payload,
+            max_attempts=max_attempts,
+            run_after=run_after or timezone.now(),
+        )
+
+    # Queued only once the caller's transaction commits, so a worker never picks
+    # up a task for rows it cannot see yet, and a rollback drops the task too.
+    transaction.on_commit(create_task)
+
+
+def _claim_tasks(limit):
+    now = timezone.now()
+    BackgroundTask.objects.filter(
+        status=BackgroundTask.STATUS_RUNNING,
+        locked_at__lt=now - TASK_LOCK_TIMEOUT,
+    ).update(status=BackgroundTask.STATUS_PENDING, locked_by="", updated_at=now)
+
+    task_ids = list(
+        BackgroundTask.objects.filter(status=BackgroundTask.STATUS_PENDING, run_after__lte=now)
+        .order_by("run_after", "id")
+        .values_list("id", flat=True)[:limit]
+    )
+    if not task_ids:
+        return []
+    # The status check in the UPDATE makes the claim atomic: when two workers
+    # race for the same rows, each row is stamped with exactly one token.
+    token = uuid.uuid4().hex
+    BackgroundTask.objects.filter(pk__in=task_ids, status=BackgroundTask.STATUS_PENDING).update(
+        status=BackgroundTask.STATUS_RUNNING,
+        locked_by=token,
+        locked_at=now,
+        attempts=F("attempts") + 1,
+        updated_at=now,
+    )
+    return list(
+        BackgroundTask.objects.filter(locked_by=token, status=BackgroundTask.STATUS_RUNNING).order_by(
+            "run_after", "id"
+        )
+    )
+
+
+def _run_task(task):
+    handler = _task_handlers.get(task.name)
+    try:
+        if handler is None:
+            raise LookupError(f"Unknown background task '{task.name}'.")
+        handler[0](**task.payload)
+    except Exception:
+        now = timezone.now()
+        error_text = traceback.format_exc()
+        logger.exception("Background task %s #%s failed.", task.name, task.pk)
+        if task.attempts >= task.max_attempts:
+            changes = {"status": BackgroundTask.STATUS_FAILED}
+        else:
+            delay = TASK_RETRY_BASE_SECONDS * 2 ** (task.attempts - 1)
+            changes = {
+                "status": BackgroundTask.STATUS_PENDING,
+                "run_after": now + timedelta(seconds=delay),
+            }
+        BackgroundTask.objects.filter(pk=task.pk).update(
+            locked_by="", last_error=error_text, updated_at=now, **changes
+        )
+        return False
+    BackgroundTask.objects.filter(pk=task.pk).update(
+        status=BackgroundTask.STATUS_DONE,
+        locked_by="",
+        last_error="",
+        updated_at=timezone.now(),
+    )
+    return True
+
+
+def run_pending_tasks(batch_size=TASK_BATCH_SIZE):
+    succeeded = failed = 0
+    while True:
+        tasks = _claim_tasks(batch_size)
+        if not tasks:
+            return {"succeeded": succeeded, "failed": failed}
+        for task in tasks:
+            if _run_task(task):
+                succeeded += 1
+            else:
+                failed += 1
+
+
+def prune_finished_tasks():
+    return BackgroundTask.objects.filter(
+        status=BackgroundTask.STATUS_DONE,
+        updated_at__lt=timezone.now() - TASK_RETENTION,
+    ).delete()[0]
+
+
+@background_task("set_seller_products_active")
+def set_seller_products_active(vendor_id, is_active):
+    products = Product.objects.filter(vendor_id=vendor_id).exclude(is_active=is_active)
+    if is_active:
+        # Imported products without an image stay hidden until one is uploaded.
+        products = products.exclude(product_image="")
+    skus = list(products.values_list("vin", flat=True))
+    products.update(is_active=is_active, updated_at=timezone.now())
+    invalidate_product_caches(skus)
+
+
+def unsold_seller_products(vendor_id):
+    return (
+        Product.objects.filter(
+            vendor_id=vendor_id,
+            is_active=True,
+            current_stock__gt=0,
+        )
+        .annotate(
+            delivered_qty=Coalesce(
+                Sum("orders__quantity", filter=Q(orders__is_delivered=True)),
+                0,
+            )
+        )
+        .filter(delivered_qty=0)
+    )
+
+
+@background_task("purge_unsold_seller_products")
+def purge_unsold_seller_products(vendor_id):
+    rows = list(unsold_seller_products(vendor_id).values_list("id", "vin"))
+    with transaction.atomic():
+        Product.objects.filter(pk__in=[product_id for product_id, _sku in rows]).delete()
+    invalidate_product_caches([sku for _product_id, sku in rows])
@@ -0,0 +1,19 @@
+from django import template
+
+from ..catalog import render_product_cards
+from ..i18n import get_ui_text_bundle
+
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def product_cards(context, products, versions):
+    language = context.get("shop_language") or ""
+    return render_product_cards(
+        products,
+        versions or {},
+        language,
+        context.get("ui_text") or {},
+        get_ui_text_bundle(language)["version"],
+    )
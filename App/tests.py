@@ -1,3 +1,1087 @@
-from django.test import TestCase
+import io
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import zipfile
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from importlib import import_module
+from importlib.util import find_spec
+from pathlib import Path
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.apps import apps as django_apps
+from django.contrib.auth.models import User
+from django.contrib.auth.tokens import default_token_generator
+from django.contrib.sessions.models import Session
+from django.core import mail
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.db.models import Sum
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils import timezone
+from PIL import Image
+
+from .accounts import users_with_email, users_with_username
+from .catalog import _product_card_context
+from .context_processors import seller_order_notifications
+from .forms import ProductForm
+from .instrumentation import view_query_budget
+from .inventory import (
+    apply_stock_adjustments,
+    low_stock_detected,
+    product_stock_at,
+    record_stock_movements,
+    scan_low_stock,
+    stock_movement,
+    take_inventory_snapshot,
+    vendor_stock_at,
+)
+from .loadtest import latency_summary, percentile
+from .metrics import EXITED_SNAPSHOT_NAME, collect_snapshots, render_metrics
+from .models import (
+    AccountRegistration,
+    BackgroundTask,
+    InventoryMovement,
+    InventorySnapshot,
+    LowStockAlert,
+    Order,
+    OutboundEmail,
+    Product,
+    ProductCategory,
+    ProductRating,
+)
+from .outbox import PASSWORD_RESET_TOKEN_PLACEHOLDER, prune_outbox, send_pending_emails
+from .product_import import ProductImportError, import_vendor_product_images, import_vendor_products
+from .synthetic import SYNTHETIC_SKU_PREFIX, delete_synthetic_data, generate_marketplace, marketplace_scale
+from .tasks import enqueue_task, run_pending_tasks
+from .views import HomeView
+
+
+TEST_CACHES = {
+    "default": {
+        "BACKEND": "App.cache_backends.MeteredLocMemCache",
+        "LOCATION": "tests-default",
+        "METRICS_LABEL": "default",
+    },
+    "sessions": {
+        "BACKEND": "App.cache_backends.MeteredLocMemCache",
+        "LOCATION": "tests-sessions",
+        "METRICS_LABEL": "sessions",
+    },
+    "fragments": {
+        "BACKEND": "App.cache_backends.MeteredLocMemCache",
+        "LOCATION": "tests-fragments",
+        "METRICS_LABEL": "fragments",
+    },
+}
+# Keeps test traffic out of the development server's /metrics/ counters.
+TEST_METRICS_DIR = Path(tempfile.gettempdir()) / "webapp-test-metrics"
+
+
+@override_settings(CACHES=TEST_CACHES, METRICS_DIR=TEST_METRICS_DIR)
+class WebAppTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+        for alias in TEST_CACHES:
+            caches[alias].clear()
+
+    @staticmethod
+    def create_account(username, account_type, is_verified=True, **user_fields):
+        user = User.objects.create_user(username, f"{username}@example.com", "pass-12345", **user_fields)
+        AccountRegistration.objects.create(user=user, account_type=account_type, is_verified=is_verified)
+        return user
+
+    @classmethod
+    def create_seller(cls, username="seller", **kwargs):
+        kwargs.setdefault("first_name", "Sam")
+        return cls.create_account(username, AccountRegistration.ACCOUNT_TYPE_SELLER, **kwargs)
+
+    @classmethod
+    def create_buyer(cls, username="buyer", **kwargs):
+        return cls.create_account(username, AccountRegistration.ACCOUNT_TYPE_BUYER, **kwargs)
+
+    @staticmethod
+    def create_admin(username="admin"):
+        return User.objects.create_superuser(username, f"{username}@example.com", "pass-12345")
+
+    @staticmethod
+    def create_product(vendor, sku, **fields):
+        stock = fields.pop("stock", 10)
+        values = {
+            "name": f"Part {sku}",
+            "category": "Brakes",
+            "price": 25,
+            "initial_stock": stock,
+            "current_stock": stock,
+            "description": "Front ceramic brake pads.",
+            "product_image": "product_images/brake.jpg",
+        }
+        values.update(fields)
+        return Product.objects.create(vendor=vendor, vin=sku, **values)
+
+    def use_temporary_directory(self, setting_name):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(**{setting_name: Path(directory.name)})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        return Path(directory.name)
+
+
+def png_upload(name, size=(4, 4)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, "red").save(buffer, format="PNG")
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+
+class QueryBudgetTestMixin:
+    def assertWithinQueryBudget(self, budget, label, func, *args, **kwargs):
+        with CaptureQueriesContext(connection) as queries:
+            result = func(*args, **kwargs)
+        if len(queries) > budget:
+            statements = "\n".join(f"  {query['sql']}" for query in queries.captured_queries)
+            self.fail(f"{label} ran {len(queries)} queries, budget is {budget}:\n{statements}")
+        return result
+
+    def assertViewWithinQueryBudget(self, client, url_name, *args, **kwargs):
+        url = reverse(url_name, args=args)
+        budget = view_query_budget(resolve(url).func)
+        self.assertIsNotNone(budget, f"{url_name} does not declare a query_budget.")
+        response = self.assertWithinQueryBudget(budget, url_name, client.get, url, **kwargs)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+
+class HotPathQueryBudgetTests(QueryBudgetTestMixin, WebAppTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = cls.create_seller()
+        cls.buyer = cls.create_buyer()
+        cls.admin = cls.create_admin()
+        ProductCategory.objects.create(name="Brakes")
+        cls.create_products(5)
+
+    @classmethod
+    def create_products(cls, count, start=0):
+        for index in range(start, start + count):
+            product = cls.create_product(
+                cls.seller,
+                f"BRK{index:04d}",
+                name=f"Brake Pad {index}",
+                price=10 + index,
+                initial_stock=20,
+                current_stock=index % 4,
+                reorder_level=2,
+            )
+            Order.objects.create(buyer=cls.buyer, product=product, quantity=1, total_price=product.price)
+            Order.objects.create(
+                buyer=cls.buyer, product=product, quantity=2, total_price=product.price * 2, is_delivered=True
+            )
+
+    def test_storefront_pages_stay_within_budget(self):
+        for client_user in (None, self.buyer, self.seller):
+            if client_user:
+                self.client.force_login(client_user)
+            for url_name in ("home", "category_products", "search_products"):
+                with self.subTest(user=client_user, view=url_name):
+                    self.assertViewWithinQueryBudget(self.client, url_name)
+
+    def test_vendor_pages_stay_within_budget(self):
+        self.client.force_login(self.seller)
+        for url_name in ("vendor_dashboard", "vendor_products", "vendor_orders"):
+            with self.subTest(view=url_name):
+                self.assertViewWithinQueryBudget(self.client, url_name)
+
+    def test_buyer_and_admin_pages_stay_within_budget(self):
+        self.client.force_login(self.buyer)
+        self.assertViewWithinQueryBudget(self.client, "buyer_orders")
+        self.client.force_login(self.admin)
+        self.assertViewWithinQueryBudget(self.client, "admin_dashboard")
+
+    def test_vendor_dashboard_queries_do_not_grow_with_catalog(self):
+        self.client.force_login(self.seller)
+        url = reverse("vendor_dashboard")
+        with CaptureQueriesContext(connection) as before:
+            self.client.get(url)
+        self.create_products(20, start=100)
+        with CaptureQueriesContext(connection) as after:
+            self.client.get(url)
+        self.assertEqual(len(before), len(after))
+
+    def test_seller_order_notifications_stays_within_budget(self):
+        budget = view_query_budget(seller_order_notifications)
+        for user in (self.seller, self.admin):
+            request = RequestFactory().get("/")
+            request.user = user
+            with self.subTest(user=user.username):
+                context = self.assertWithinQueryBudget(
+                    budget, "seller_order_notifications", seller_order_notifications, request
+                )
+                if user is self.seller:
+                    self.assertEqual(context["seller_notification_count"], 5)
+
+
+class RequestInstrumentationTests(WebAppTestCase):
+    def test_response_carries_server_timing(self):
+        response = self.client.get(reverse("home"))
+        timing = response["Server-Timing"]
+        for metric in ("sql;dur=", "tpl;dur=", "ctx;dur=", "total;dur="):
+            self.assertIn(metric, timing)
+
+    def test_request_metrics_are_logged(self):
+        with self.assertLogs("App.instrumentation", level=logging.INFO) as logs:
+            self.client.get(reverse("home"))
+        self.assertIn('"view": "home"', logs.output[0])
+        self.assertIn('"sql_count": ', logs.output[0])
+
+    def test_request_over_budget_logs_warning(self):
+        with mock.patch.object(HomeView, "query_budget", -1):
+            with self.assertLogs("App.instrumentation", level=logging.WARNING) as logs:
+                self.client.get(reverse("home"))
+        self.assertIn('"query_budget": -1', logs.output[0])
+
+
+class RequestProfilerTests(WebAppTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = cls.create_admin()
+        cls.buyer = cls.create_buyer()
+
+    def setUp(self):
+        super().setUp()
+        self.use_temporary_directory("REQUEST_PROFILE_DIR")
+
+    def test_superuser_request_is_profiled_with_explain_plans(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse("admin_dashboard"), {"_profile": "1"})
+        self.assertEqual(response.status_code, 200)
+        profile = self.client.get(response["X-Profile-Url"]).json()
+        self.assertEqual(profile["view"], "admin_dashboard")
+        self.assertIn("stacks", profile)
+        self.assertTrue(profile["queries"])
+        self.assertTrue(any(query.get("explain") for query in profile["queries"]))
+
+    def test_cprofile_mode_via_header(self):
+        self.client.force_login(self.admin)
+        with self.assertNoLogs("App.instrumentation", level="WARNING"):
+            response = self.client.get(reverse("home"), headers={"X-Profile": "cprofile"})
+        profile = self.client.get(response["X-Profile-Url"]).json()
+        self.assertEqual(profile["profiler"], "cprofile")
+        self.assertIn("cumulative", profile["stats"])
+        self.assertLessEqual(profile["sql_count"], HomeView.query_budget)
+
+    def test_other_users_are_not_profiled(self):
+        for user in (None, self.buyer):
+            if user:
+                self.client.force_login(user)
+            with self.subTest(user=user):
+                response = self.client.get(reverse("home"), {"_profile": "1"})
+                self.assertNotIn("X-Profile-Id", response)
+
+
+class MetricsEndpointTests(WebAppTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.buyer = cls.create_buyer()
+
+    def setUp(self):
+        super().setUp()
+        self.metrics_dir = self.use_temporary_directory("METRICS_DIR")
+        settings_override = override_settings(METRICS_TOKEN="secret")
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def scrape(self):
+        response = self.client.get(reverse("metrics"), headers={"Authorization": "Bearer secret"})
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_request_latency_and_checkout_outcomes_are_exported(self):
+        self.client.get(reverse("home"))
+        self.client.force_login(self.buyer)
+        self.client.post(
+            reverse("order_create"),
+            json.dumps({"items": [{"sku": "MISSING1", "qty": 1}]}),
+            content_type="application/json",
+        )
+        body = self.scrape()
+        self.assertIn('webapp_request_duration_seconds_bucket{method="GET",status="200",view="home",le="+Inf"}', body)
+        self.assertIn('webapp_request_db_queries_count{view="home"}', body)
+        self.assertIn('webapp_checkout_total{outcome="unavailable"}', body)
+        self.assertIn('webapp_cache_requests_total{cache="sessions",result="hit"}', body)
+        self.assertIn("webapp_session_writes_total", body)
+        self.assertIn('webapp_cache_hit_ratio{cache="default"}', body)
+
+    def test_snapshots_of_other_workers_are_added_up(self):
+        (self.metrics_dir / f"{os.getppid()}.json").write_text(
+            json.dumps({"counters": [["webapp_checkout_total", [["outcome", "lock_error"]], 4]], "histograms": []})
+        )
+        self.assertIn('webapp_checkout_total{outcome="lock_error"} 4', self.scrape())
+
+    @skipUnless(os.name == "posix", "dead workers are only detected on POSIX")
+    def test_counts_of_exited_workers_are_kept_after_their_file_is_removed(self):
+        exited = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"], capture_output=True, text=True)
+        snapshot = self.metrics_dir / f"{exited.stdout.strip()}.json"
+        snapshot.write_text(
+            json.dumps({"counters": [["webapp_checkout_total", [["outcome", "lock_error"]], 4]], "histograms": []})
+        )
+        for _scrape in range(2):
+            self.assertIn('webapp_checkout_total{outcome="lock_error"} 4', render_metrics(collect_snapshots()))
+        self.assertFalse(snapshot.exists())
+        self.assertTrue((self.metrics_dir / EXITED_SNAPSHOT_NAME).exists())
+        self.assertTrue((self.metrics_dir / f"{os.getpid()}.json").exists())
+
+    def test_scrapes_need_the_token_outside_debug(self):
+        url = reverse("metrics")
+        self.assertEqual(self.client.get(url, headers={"Authorization": "Bearer wrong"}).status_code, 403)
+        with override_settings(METRICS_TOKEN=""):
+            self.assertEqual(self.client.get(url, REMOTE_ADDR="127.0.0.1").status_code, 403)
+            with override_settings(DEBUG=True):
+                self.assertEqual(self.client.get(url, REMOTE_ADDR="127.0.0.1").status_code, 200)
+                self.assertEqual(self.client.get(url, REMOTE_ADDR="10.0.0.5").status_code, 403)
+
+
+class ProductCardFragmentTests(WebAppTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seller = cls.create_seller()
+        cls.buyer = cls.create_buyer()
+        for index in range(3):
+            cls.create_product(
+                seller,
+                f"FLT{index:04d}",
+                name=f"Oil Filter {index}",
+                category="Filters",
+                price=25 + index,
+            )
+
+    def render_home(self):
+        with mock.patch("App.catalog._product_card_context", wraps=_product_card_context) as card_context:
+            response = self.client.get(reverse("home"))
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode(), [call.args[0]["sku"] for call in card_context.call_args_list]
+
+    def test_listing_is_stitched_from_cached_cards(self):
+        html, rendered = self.render_home()
+        self.assertEqual(sorted(rendered), ["FLT0000", "FLT0001", "FLT0002"])
+        self.assertEqual(html.count('class="product-card"'), 3)
+        self.assertIn("26.00 ETB", html)
+
+        html, rendered = self.render_home()
+        self.assertEqual(rendered, [])
+        self.assertEqual(html.count('class="product-card"'), 3)
+
+    def test_only_changed_cards_are_rendered_again(self):
+        self.render_home()
+        self.client.force_login(self.buyer)
+        response = self.client.post(
+            reverse("order_create"),
+            json.dumps({"items": [{"sku": "FLT0001", "qty": 3}]}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+
+        html, rendered = self.render_home()
+        self.assertEqual(rendered, ["FLT0001"])
+        card = html[html.index('data-sku="FLT0001"'):]
+        self.assertIn("<b>7</b>", card[: card.index("js-rate-slot")])
+
+
+class AsyncStorefrontViewTests(WebAppTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = cls.create_seller()
+        cls.buyer = cls.create_buyer()
+        ProductCategory.objects.create(name="Brakes")
+        cls.create_product(cls.seller, "BRK0001", name="Brake Disc")
+        cls.create_product(cls.seller, "FLT0001", name="Oil Filter", category="Filters")
+
+    async def test_storefront_pages_render_under_asgi(self):
+        await self.async_client.aforce_login(self.buyer)
+        cases = (
+            ("home", {}, "shop_products", 2),
+            ("category_products", {"category": "Filters"}, "category_products", 1),
+            ("search_products", {"q": "disc"}, "search_products", 1),
+        )
+        for url_name, params, context_name, count in cases:
+            with self.subTest(view=url_name):
+                response = await self.async_client.get(reverse(url_name), params)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.context[context_name]), count)
+                self.assertTrue(response.context["shop_rating_context"]["can_rate"])
+                self.assertEqual(response.context["shop_category_options"], [{"value": "Brakes", "label": "Brakes"}])
+
+    async def test_rating_is_stored_once_per_buyer(self):
+        url = reverse("product_rate", kwargs={"sku": "BRK0001"})
+        response = await self.async_client.post(url, {"rating": 4}, content_type="application/json")
+        self.assertEqual(response.status_code, 401)
+
+        await self.async_client.aforce_login(self.buyer)
+        response = await self.async_client.post(url, {"rating": 4}, content_type="application/json")
+        self.assertEqual(response.json()["reviews"], 1)
+        self.assertEqual(response.json()["rating"], 4.0)
+        response = await self.async_client.post(url, {"rating": 5}, content_type="application/json")
+        self.assertEqual(response.status_code, 409)
+
+    async def test_sellers_cannot_rate_their_own_products(self):
+        await self.async_client.aforce_login(self.seller)
+        response = await self.async_client.post(
+            reverse("product_rate", kwargs={"sku": "BRK0001"}), {"rating": 5}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 403)
+
+
+class AdminProductCacheTests(WebAppTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = cls.create_seller()
+        cls.buyer = cls.create_buyer()
+        cls.admin = cls.create_admin()
+        cls.product = cls.create_product(cls.seller, "BRK0001", name="Brake Disc")
+
+    def lookup(self):
+        return self.client.get(reverse("product_lookup"), {"sku": "BRK0001"}).json()
+
+    def test_product_changes_in_admin_clear_cached_entries(self):
+        self.assertIn("BRK0001", self.lookup()["products"])
+        self.client.force_login(self.admin)
+        response = self.client.post(
+            reverse("admin:App_product_change", args=[self.product.pk]),
+            {
+                "vendor": self.seller.pk,
+                "name": "Brake Disc",
+                "vin": "BRK0001",
+                "category": "Brakes",
+                "price": "25.00",
+                "initial_stock": 10,
+                "current_stock": 10,
+                "reorder_level": 0,
+                "description": "Front ceramic brake pads.",
+                # is_active left out: the product is deactivated.
+            },
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.lookup()["missing"], ["BRK0001"])
+
+    def test_rating_deleted_in_admin_clears_cached_detail(self):
+        rating = ProductRating.objects.create(user=self.buyer, product=self.product, rating=5)
+        detail_url = reverse("product_detail", kwargs={"sku": "BRK0001"})
+        self.assertEqual(self.client.get(detail_url).json()["product"]["reviews"], 1)
+        self.client.force_login(self.admin)
+        self.client.post(reverse("admin:App_productrating_delete", args=[rating.pk]), {"post": "yes"})
+        self.assertEqual(self.client.get(detail_url).json()["product"]["reviews"], 0)
+
+
+class LanguageNegotiationTests(WebAppTestCase):
+    def test_header_language_varies_on_accept_language(self):
+        response = self.client.get(reverse("home"), headers={"Accept-Language": "am-ET,am;q=0.9"})
+        self.assertEqual(response.context["shop_language"], "am")
+        self.assertIn("Accept-Language", response["Vary"])
+        self.assertNotIn("sessionid", response.cookies)
+
+    def test_picked_language_is_kept_in_the_session(self):
+        response = self.client.get(reverse("home"), {"lang": "am"})
+        self.assertEqual(response.context["shop_language"], "am")
+        self.assertNotIn("Accept-Language", response.get("Vary", ""))
+
+        response = self.client.get(reverse("home"), headers={"Accept-Language": "en"})
+        self.assertEqual(response.context["shop_language"], "am")
+        self.assertNotIn("Accept-Language", response.get("Vary", ""))
+        self.assertIn("Cookie", response["Vary"])
+
+
+class PruneSessionsCommandTests(WebAppTestCase):
+    def test_only_expired_sessions_are_deleted(self):
+        now = timezone.now()
+        for index in range(3):
+            Session.objects.create(session_key=f"expired{index}", session_data="", expire_date=now - timedelta(days=1))
+        Session.objects.create(session_key="live", session_data="", expire_date=now + timedelta(days=1))
+        call_command("prune_sessions", batch_size=2, stdout=io.StringIO())
+        self.assertEqual(list(Session.objects.values_list("session_key", flat=True)), ["live"])
+
+
+class ProductCatalogFilterTests(WebAppTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seller = cls.create_seller()
+        buyer = cls.create_buyer()
+        for index in range(5):
+            product = cls.create_product(
+                seller,
+                f"BRK{index:04d}",
+                category="Brakes" if index % 2 else "Filters",
+                price=100 * (index + 1),
+                current_stock=index + 1,
+            )
+            ProductRating.objects.create(user=buyer, product=product, rating=index + 1)
+
+    def catalog(self, **params):
+        response = self.client.get(reverse("product_catalog"), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_filters_sort_and_facets(self):
+        data = self.catalog(category="Brakes", sort="priceDesc")
+        self.assertEqual([product["sku"] for product in data["products"]], ["BRK0003", "BRK0001"])
+        self.assertEqual(
+            data["facets"]["categories"], [{"value": "Brakes", "count": 2}, {"value": "Filters", "count": 3}]
+        )
+        self.assertEqual(self.catalog(rating="4")["count"], 2)
+        self.assertEqual(self.catalog(min_price="150", max_price="350")["count"], 2)
+        self.assertEqual(self.catalog(stock="Low")["count"], 5)
+
+    def test_page_past_the_end_returns_the_last_page(self):
+        for page in ("99999999999999999999", "4", "-3", "x"):
+            with self.subTest(page=page):
+                data = self.catalog(page=page, page_size="2")
+                expected = 1 if page in ("-3", "x") else 3
+                self.assertEqual((data["page"], data["num_pages"]), (expected, 3))
+                self.assertTrue(data["products"])
+
+    def test_non_numeric_filters_are_ignored(self):
+        for params in ({"rating": "nan"}, {"rating": "inf"}, {"min_price": "nan"}, {"max_price": "abc"}):
+            with self.subTest(**params):
+                self.assertEqual(self.catalog(**params)["count"], 5)
+
+
+class ProductImportTests(WebAppTestCase):
+    header = "name,sku,category,price,initial_stock,current_stock,reorder_level,description\n"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = cls.create_seller()
+        ProductCategory.objects.create(name="Brakes")
+        cls.create_product(cls.seller, "BRK0001", name="Existing Disc")
+
+    def import_csv(self, rows):
+        upload = SimpleUploadedFile("products.csv", (self.header + "".join(rows)).encode())
+        return import_vendor_products(self.seller, upload)
+
+    def test_valid_rows_are_created_hidden_with_a_ledger_receipt(self):
+        report = self.import_csv(["Rear Pad Set,brk0002,Brakes,49.99,25,,5,Rear ceramic brake pads.\n"])
+        self.assertEqual((report["created_count"], report["error_count"]), (1, 0))
+        product = Product.objects.get(vin="BRK0002")
+        self.assertFalse(product.is_active)
+        self.assertEqual((product.current_stock, product.reorder_level), (25, 5))
+        self.assertEqual(
+            list(InventoryMovement.objects.filter(product=product).values_list("kind", "quantity")),
+            [(InventoryMovement.KIND_RECEIPT, 25)],
+        )
+
+    def test_bad_and_duplicate_rows_are_reported(self):
+        report = self.import_csv(
+            [
+                "Rear Pad Set,BRK0002,Brakes,49.99,25,,,Rear ceramic brake pads.\n",
+                "Other Pad Set,BRK0002,Brakes,49.99,25,,,Rear ceramic brake pads.\n",
+                "Disc Copy,BRK0001,Brakes,10,1,,,Copy of an existing part.\n",
+                "Cheap Pads,BRK0003,Brakes,0,1,,,Price is below the minimum.\n",
+                "Filter,FLT0001,Filters,10,1,,,Category is not in the catalog.\n",
+                "Odd Stock,BRK0004,Brakes,10,1.5,,,Stock must be a whole number.\n",
+                "Bad Sku,BRK-0005,Brakes,10,1,,,Part numbers have no dashes.\n",
+            ]
+        )
+        self.assertEqual((report["total_rows"], report["created_count"], report["error_count"]), (7, 1, 6))
+        errors = {error["row"]: error["message"] for error in report["errors"]}
+        self.assertEqual(sorted(errors), [3, 4, 5, 6, 7, 8])
+        self.assertIn("more than once", errors[3])
+        self.assertIn("already exists", errors[4])
+        self.assertIn("Unknown category", errors[6])
+        self.assertEqual(Product.objects.filter(vendor=self.seller).count(), 2)
+
+    def test_duplicates_are_caught_across_batches(self):
+        rows = [f"Pad Set {index},BRK{index:04d},Brakes,10,1,,,Front ceramic brake pads.\n" for index in range(2, 7)]
+        rows.append("Pad Set Again,BRK0003,Brakes,10,1,,,Front ceramic brake pads.\n")
+        with mock.patch("App.product_import.PRODUCT_IMPORT_BATCH_SIZE", 2):
+            report = self.import_csv(rows)
+        self.assertEqual((report["created_count"], report["error_count"]), (5, 1))
+        self.assertEqual(report["errors"][0]["row"], 7)
+
+    def test_missing_columns_reject_the_file(self):
+        upload = SimpleUploadedFile("products.csv", b"name,sku\nPads,BRK0002\n")
+        with self.assertRaisesMessage(ProductImportError, "Missing required columns"):
+            import_vendor_products(self.seller, upload)
+
+    def test_uploading_an_image_in_the_edit_form_publishes_an_imported_product(self):
+        self.use_temporary_directory("MEDIA_ROOT")
+        self.import_csv(["Rear Pad Set,BRK0002,Brakes,49.99,25,,,Rear ceramic brake pads.\n"])
+        product = Product.objects.get(vin="BRK0002")
+        data = {field: getattr(product, field) for field in ("name", "vin", "category", "price", "initial_stock")}
+        data.update(current_stock=25, reorder_level=0, description=product.description)
+        form = ProductForm(data, {"product_image": png_upload("pads.png")}, vendor=self.seller, instance=product)
+        self.assertTrue(form.is_valid(), form.errors)
+        form.save()
+        product.refresh_from_db()
+        self.assertTrue(product.is_active)
+        self.assertTrue(product.product_image.name.startswith("product_images/pads"))
+
+    @skipUnless(find_spec("openpyxl"), "openpyxl is not installed")
+    def test_xlsx_numeric_cells_are_read_as_whole_numbers(self):
+        from openpyxl import Workbook
+
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(["Name", "Part Number", "Category", "Price", "Stock", "Description"])
+        sheet.append(["Numeric Sku Pads", 12345, "Brakes", 49.5, 25, "Front ceramic brake pads."])
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+        report = import_vendor_products(self.seller, SimpleUploadedFile("products.xlsx", buffer.getvalue()))
+        self.assertEqual(report["error_count"], 0, report["errors"])
+        product = Product.objects.get(vin="12345")
+        self.assertEqual((product.price, product.initial_stock), (Decimal("49.50"), 25))
+
+
+class ProductImageImportTests(WebAppTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = cls.create_seller()
+        cls.hidden = cls.create_product(cls.seller, "BRK0001")
+        # As left by the spreadsheet import, which bypasses Product.full_clean().
+        Product.objects.filter(pk=cls.hidden.pk).update(product_image="", is_active=False)
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = self.use_temporary_directory("MEDIA_ROOT")
+
+    def archive(self, files):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as archive:
+            for name, data in files.items():
+                archive.writestr(name, data)
+        return SimpleUploadedFile("images.zip", buffer.getvalue())
+
+    def stored_images(self):
+        return sorted(path.name for path in (self.media_root / "product_images").glob("*"))
+
+    def test_images_are_matched_by_sku(self):
+        upload = self.archive(
+            {
+                "brk0001.png": png_upload("x.png").read(),
+                "BRK9999.png": png_upload("x.png").read(),
+                "notes.txt": b"not an image",
+                "__MACOSX/._brk0001.png": b"",
+            }
+        )
+        report = import_vendor_product_images(self.seller, upload)
+        self.assertEqual((report["total_entries"], report["updated_count"], report["error_count"]), (3, 1, 2))
+        self.hidden.refresh_from_db()
+        self.assertTrue(self.hidden.is_active)
+        self.assertEqual(self.stored_images(), ["BRK0001.png"])
+
+    def test_failed_update_removes_the_stored_files(self):
+        upload = self.archive({"BRK0001.png": png_upload("x.png").read()})
+        with mock.patch.object(Product.objects, "bulk_update", side_effect=DatabaseError("disk I/O error")):
+            with self.assertRaises(DatabaseError):
+                import_vendor_product_images(self.seller, upload)
+        self.assertEqual(self.stored_images(), [])
+        self.hidden.refresh_from_db()
+        self.assertFalse(self.hidden.product_image)
+
+    def test_replaced_image_is_deleted_after_commit(self):
+        for _attempt in range(2):
+            with self.captureOnCommitCallbacks(execute=True):
+                import_vendor_product_images(self.seller, self.archive({"BRK0001.png": png_upload("x.png").read()}))
+        self.hidden.refresh_from_db()
+        self.assertEqual(self.stored_images(), [Path(self.hidden.product_image.name).name])
+
+
+class OrderExportTests(WebAppTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = cls.create_seller()
+        cls.buyer = cls.create_buyer(first_name="=HYPERLINK(\"http://evil\")", last_name="")
+        cls.other_buyer = cls.create_buyer("other-buyer")
+        product = cls.create_product(cls.seller, "BRK0001", name="+Brake Disc")
+        cls.old_order = Order.objects.create(buyer=cls.buyer, product=product, quantity=1, total_price=25)
+        cls.new_order = Order.objects.create(
+            buyer=cls.buyer, product=product, quantity=2, total_price=50, is_delivered=True
+        )
+        Order.objects.create(buyer=cls.other_buyer, product=product, quantity=3, total_price=75)
+        Order.objects.filter(pk=cls.old_order.pk).update(created_at=timezone.now() - timedelta(days=10))
+
+    def export_lines(self, response):
+        return b"".join(response.streaming_content).decode().splitlines()
+
+    def test_vendor_csv_neutralises_formula_cells(self):
+        self.client.force_login(self.seller)
+        response = self.client.get(reverse("vendor_orders_export"), {"status": "delivered"})
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        self.assertIn('attachment; filename="vendor-orders-', response["Content-Disposition"])
+        header, *rows = self.export_lines(response)
+        self.assertEqual(header.split(","), ["order_id", "created_at", "status", "product_name", "sku",
+                                             "quantity", "total_price", "buyer_name", "buyer_email"])
+        self.assertEqual(len(rows), 1)
+        self.assertIn(",'+Brake Disc,", rows[0])
+        self.assertIn(',"\'=HYPERLINK(""http://evil"")",', rows[0])
+
+    def test_buyer_export_is_scoped_and_filtered_by_date(self):
+        self.client.force_login(self.buyer)
+        date_from = (timezone.localdate() - timedelta(days=1)).isoformat()
+        response = self.client.get(reverse("buyer_orders_export"), {"format": "jsonl", "date_from": date_from})
+        rows = [json.loads(line) for line in self.export_lines(response)]
+        self.assertEqual([row["order_id"] for row in rows], [self.new_order.id])
+        self.assertEqual(rows[0]["product_name"], "+Brake Disc")
+
+        response = self.client.get(reverse("buyer_orders_export"), {"format": "jsonl"})
+        rows = [json.loads(line) for line in self.export_lines(response)]
+        self.assertEqual([row["order_id"] for row in rows], [self.old_order.id, self.new_order.id])
+
+    def test_admin_sales_export_requires_superuser(self):
+        self.client.force_login(self.seller)
+        self.assertNotEqual(self.client.get(reverse("admin_sales_export")).status_code, 200)
+        self.client.force_login(self.create_admin())
+        response = self.client.get(reverse("admin_sales_export"))
+        self.assertEqual(len(self.export_lines(response)), 2)
+
+    async def test_export_streams_asynchronously_under_asgi(self):
+        await self.async_client.aforce_login(self.seller)
+        response = await self.async_client.get(reverse("vendor_orders_export"))
+        self.assertTrue(response.is_async)
+        lines = b"".join([chunk async for chunk in response.streaming_content]).decode().splitlines()
+        self.assertEqual(len(lines), 4)
+
+
+class StockAdjustmentTests(WebAppTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = cls.create_seller()
+        cls.other_seller = cls.create_seller("other-seller")
+        cls.pads = cls.create_product(cls.seller, "BRK0001", stock=5)
+        cls.disc = cls.create_product(cls.seller, "BRK0002", stock=8)
+        cls.create_product(cls.other_seller, "FLT0001", stock=3)
+
+    def stock_levels(self):
+        return dict(Product.objects.values_list("vin", "current_stock"))
+
+    def test_valid_rows_are_applied_and_recorded(self):
+        results = apply_stock_adjustments(
+            self.seller,
+            [{"sku": "brk0001", "delta": -2}, {"sku": "BRK0002", "stock": 12, "price": "30.50"}],
+        )
+        self.assertEqual(
+            results,
+            [
+                {"sku": "BRK0001", "ok": True, "previous_stock": 5, "stock": 3, "price": "25.00"},
+                {"sku": "BRK0002", "ok": True, "previous_stock": 8, "stock": 12, "price": "30.50"},
+            ],
+        )
+        self.assertEqual(self.stock_levels(), {"BRK0001": 3, "BRK0002": 12, "FLT0001": 3})
+        self.assertEqual(
+            list(InventoryMovement.objects.filter(kind=InventoryMovement.KIND_ADJUSTMENT)
+                 .order_by("product__vin").values_list("product__vin", "quantity", "stock_after")),
+            [("BRK0001", -2, 3), ("BRK0002", 4, 12)],
+        )
+
+    def test_stock_cannot_go_negative(self):
+        results = apply_stock_adjustments(
+            self.seller, [{"sku": "BRK0001", "delta": -6}, {"sku": "BRK0002", "delta": 1}]
+        )
+        self.assertEqual(
+            results[0],
+            {"sku": "BRK0001", "ok": False, "message": "Stock cannot go below 0 (current stock is 5)."},
+        )
+        self.assertTrue(results[1]["ok"])
+        self.assertEqual(self.stock_levels(), {"BRK0001": 5, "BRK0002": 9, "FLT0001": 3})
+
+    def test_unknown_and_foreign_skus_are_rejected(self):
+        results = apply_stock_adjustments(
+            self.seller, [{"sku": "NOPE0001", "stock": 1}, {"sku": "FLT0001", "stock": 1}, {"stock": 1}]
+        )
+        self.assertEqual([result["ok"] for result in results], [False, False, False])
+        self.assertEqual(results[0]["message"], "None of your products has this SKU.")
+        self.assertEqual(results[1]["message"], "None of your products has this SKU.")
+        self.assertEqual(results[2]["message"], "SKU is required.")
+        self.assertEqual(self.stock_levels(), {"BRK0001": 5, "BRK0002": 8, "FLT0001": 3})
+        self.assertFalse(InventoryMovement.objects.exists())
+
+    def test_duplicate_sku_keeps_the_first_row(self):
+        results = apply_stock_adjustments(
+            self.seller, [{"sku": "BRK0001", "stock": 7}, {"sku": "brk0001", "stock": 1}]
+        )
+        self.assertTrue(results[0]["ok"])
+        self.assertEqual(results[1], {"sku": "BRK0001", "ok": False, "message": "SKU appears more than once."})
+        self.assertEqual(self.stock_levels()["BRK0001"], 7)
+
+    def test_failed_write_rolls_back_the_whole_batch(self):
+        with mock.patch.object(
+            InventoryMovement.objects, "bulk_create", side_effect=DatabaseError("disk I/O error")
+        ):
+            with self.assertRaises(DatabaseError):
+                apply_stock_adjustments(
+                    self.seller, [{"sku": "BRK0001", "stock": 1}, {"sku": "BRK0002", "stock": 2}]
+                )
+        self.assertEqual(self.stock_levels(), {"BRK0001": 5, "BRK0002": 8, "FLT0001": 3})
+
+
+class InventoryLedgerTests(WebAppTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = cls.create_seller()
+        cls.buyer = cls.create_buyer()
+        cls.product = cls.create_product(cls.seller, "BRK0001", stock=10)
+
+    def ledger(self):
+        return list(
+            InventoryMovement.objects.order_by("id").values_list("kind", "quantity", "stock_after", "order_id")
+        )
+
+    def test_backfill_rebuilds_history_from_orders(self):
+        order = Order.objects.create(buyer=self.buyer, product=self.product, quantity=3, total_price=75)
+        backfill = import_module("App.migrations.0021_backfill_inventory_movements")
+        backfill.forwards(django_apps, None)
+        self.assertEqual(
+            self.ledger(),
+            [(InventoryMovement.KIND_RECEIPT, 13, 13, None), (InventoryMovement.KIND_SALE, -3, 10, order.id)],
+        )
+
+    def test_checkout_and_cancellation_are_recorded(self):
+        self.client.force_login(self.buyer)
+        response = self.client.post(
+            reverse("order_create"), {"items": [{"sku": "BRK0001", "qty": 4}]}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 200)
+        order = Order.objects.get()
+        self.assertEqual(self.ledger(), [(InventoryMovement.KIND_SALE, -4, 6, order.id)])
+
+        self.client.post(reverse("buyer_order_cancel", kwargs={"pk": order.pk}))
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(self.ledger()[-1], (InventoryMovement.KIND_CANCELLATION, 4, 10, None))
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.current_stock, 10)
+
+    def test_monthly_added_quantity_counts_active_products_only(self):
+        hidden = self.create_product(self.seller, "BRK0002", is_active=False)
+        record_stock_movements(
+            [
+                stock_movement(self.product, InventoryMovement.KIND_RECEIPT, 10, 10),
+                stock_movement(hidden, InventoryMovement.KIND_RECEIPT, 7, 7),
+            ]
+        )
+        self.client.force_login(self.seller)
+        response = self.client.get(reverse("vendor_dashboard"))
+        self.assertEqual(response.context["monthly_added_chart_data"][-1]["y"], 10)
+
+    def test_snapshot_stores_one_row_per_product_and_day(self):
+        yesterday = timezone.localdate() - timedelta(days=1)
+        received_at = timezone.now() - timedelta(days=2)
+        Product.objects.filter(pk=self.product.pk).update(created_at=received_at)
+        record_stock_movements(
+            [stock_movement(self.product, InventoryMovement.KIND_RECEIPT, 10, 10, created_at=received_at)]
+        )
+        self.assertEqual(take_inventory_snapshot(), 1)
+        self.assertEqual(take_inventory_snapshot(), 0)
+        self.assertEqual(
+            list(InventorySnapshot.objects.values_list("product__vin", "taken_on", "stock")),
+            [("BRK0001", yesterday, 10)],
+        )
+
+    def test_point_in_time_stock_matches_the_ledger(self):
+        day = timezone.localdate() - timedelta(days=3)
+        start = timezone.make_aware(datetime.combine(day, time.min))
+        disc = self.create_product(self.seller, "BRK0002", stock=4)
+        Product.objects.filter(pk__in=[self.product.pk, disc.pk]).update(created_at=start - timedelta(hours=1))
+        history = (
+            (self.product, InventoryMovement.KIND_RECEIPT, 10, 10, 1),
+            (disc, InventoryMovement.KIND_RECEIPT, 4, 4, 2),
+            (self.product, InventoryMovement.KIND_SALE, -3, 7, 25),
+            (disc, InventoryMovement.KIND_ADJUSTMENT, -4, 0, 26),
+            (self.product, InventoryMovement.KIND_RECEIPT, 5, 12, 49),
+        )
+        record_stock_movements(
+            [
+                stock_movement(product, kind, quantity, stock_after, created_at=start + timedelta(hours=hours))
+                for product, kind, quantity, stock_after, hours in history
+            ]
+        )
+        self.assertEqual(take_inventory_snapshot(day), 2)
+        self.assertEqual(take_inventory_snapshot(day + timedelta(days=1)), 2)
+        closing = InventorySnapshot.objects.filter(taken_on=day + timedelta(days=1))
+        self.assertEqual(dict(closing.values_list("product__vin", "stock")), {"BRK0001": 7, "BRK0002": 0})
+
+        just_after_snapshot = start + timedelta(days=2, seconds=1)
+        cases = (
+            (start, 0, 0),
+            (start + timedelta(minutes=90), 10, 0),
+            (start + timedelta(hours=25, minutes=30), 7, 4),
+            (start + timedelta(hours=26), 7, 0),
+            (just_after_snapshot, 7, 0),
+            (start + timedelta(hours=50), 12, 0),
+        )
+        for moment, product_stock, disc_stock in cases:
+            with self.subTest(moment=moment):
+                self.assertEqual(product_stock_at(self.product.pk, moment), product_stock)
+                self.assertEqual(product_stock_at(disc.pk, moment), disc_stock)
+                self.assertEqual(vendor_stock_at(self.seller.pk, moment), product_stock + disc_stock)
+
+        # Past the boundary the total starts from the snapshot, not the ledger.
+        InventorySnapshot.objects.filter(taken_on=day + timedelta(days=1), product=self.product).update(stock=100)
+        self.assertEqual(vendor_stock_at(self.seller.pk, just_after_snapshot), 100)
+
+
+class SellerProductTaskTests(WebAppTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = cls.create_admin()
+        cls.seller = cls.create_seller(is_active=False)
+        cls.account = AccountRegistration.objects.get(user=cls.seller)
+        cls.create_product(cls.seller, "BRK0001", is_active=False)
+        cls.create_product(cls.seller, "BRK0002", is_active=False)
+        Product.objects.filter(vin="BRK0002").update(product_image="")
+
+    def enable_seller(self):
+        self.client.force_login(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("admin_seller_verification_update", kwargs={"pk": self.account.pk}), {"action": "enable"}
+            )
+        self.assertEqual(response.status_code, 200)
+
+    def active_skus(self):
+        return list(Product.objects.filter(is_active=True).values_list("vin", flat=True))
+
+    @override_settings(BACKGROUND_TASKS_EAGER=True)
+    def test_eager_mode_flips_products_after_commit(self):
+        self.enable_seller()
+        self.assertEqual(self.active_skus(), ["BRK0001"])
+        self.assertFalse(BackgroundTask.objects.exists())
+
+    @override_settings(BACKGROUND_TASKS_EAGER=False)
+    def test_worker_mode_queues_the_task(self):
+        self.enable_seller()
+        self.assertEqual(self.active_skus(), [])
+        task = BackgroundTask.objects.get()
+        self.assertEqual(task.payload, {"vendor_id": self.seller.id, "is_active": True})
+
+        self.assertEqual(run_pending_tasks(), {"succeeded": 1, "failed": 0})
+        self.assertEqual(self.active_skus(), ["BRK0001"])
+
+    @override_settings(BACKGROUND_TASKS_EAGER=True)
+    def test_eager_failure_is_logged_and_kept_for_retry(self):
+        with mock.patch.object(Product.objects, "filter", side_effect=DatabaseError("database is locked")):
+            with self.assertLogs("App.tasks", level="ERROR"):
+                with self.captureOnCommitCallbacks(execute=True):
+                    enqueue_task("set_seller_products_active", vendor_id=self.seller.id, is_active=True)
+        task = BackgroundTask.objects.get()
+        self.assertEqual((task.status, task.attempts), (BackgroundTask.STATUS_PENDING, 1))
+        self.assertIn("database is locked", task.last_error)
+
+
+class EmailOutboxTests(WebAppTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.buyer = cls.create_buyer()
+
+    def request_reset(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("forgot_password"), {"email": "buyer@example.com"})
+        return OutboundEmail.objects.get()
+
+    def test_reset_token_is_signed_at_send_time(self):
+        email = self.request_reset()
+        self.assertIn(f"/{PASSWORD_RESET_TOKEN_PLACEHOLDER}/", email.body)
+
+        self.assertEqual(send_pending_emails(), {"sent": 1, "failed": 0})
+        self.assertEqual(len(mail.outbox), 1)
+        reset_path = next(line for line in mail.outbox[0].body.splitlines() if "/reset-password/" in line)
+        match = resolve(reset_path.strip().removeprefix("http://testserver"))
+        self.assertTrue(default_token_generator.check_token(self.buyer, match.kwargs["token"]))
+        email.refresh_from_db()
+        self.assertNotIn(match.kwargs["token"], email.body)
+
+    def test_old_finished_emails_are_pruned(self):
+        OutboundEmail.objects.bulk_create(
+            [
+                OutboundEmail(to_email="a@example.com", subject="Sent", body="x", status=OutboundEmail.STATUS_SENT),
+                OutboundEmail(to_email="b@example.com", subject="Failed", body="x", status=OutboundEmail.STATUS_FAILED),
+                OutboundEmail(to_email="c@example.com", subject="Pending", body="x"),
+            ]
+        )
+        OutboundEmail.objects.update(created_at=timezone.now() - timedelta(days=31))
+        self.assertEqual(prune_outbox(), 2)
+        self.assertEqual(list(OutboundEmail.objects.values_list("subject", flat=True)), ["Pending"])
+
+    def test_admin_does_not_show_the_body(self):
+        email = self.request_reset()
+        self.client.force_login(self.create_admin())
+        response = self.client.get(reverse("admin:App_outboundemail_change", args=[email.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, "/reset-password/")
+
+
+class MarketplaceBenchmarkHelperTests(WebAppTestCase):
+    def test_latency_summary_interpolates_percentiles(self):
+        self.assertEqual(percentile([1.0, 2.0, 3.0, 4.0], 0.5), 2.5)
+        self.assertEqual(
+            latency_summary([0.004, 0.001, 0.002, 0.003]),
+            {"p50_ms": 2.5, "p90_ms": 3.7, "p99_ms": 3.97, "max_ms": 4.0, "mean_ms": 2.5},
+        )
+        self.assertEqual(latency_summary([]), {})
+
+    def test_synthetic_marketplace_matches_the_requested_scale(self):
+        scale = marketplace_scale(20)
+        counts = generate_marketplace(seed=3, batch_size=7, **scale)
+        # Orders stop once a part is sold out, so fewer than requested may exist.
+        self.assertLessEqual(counts.pop("orders"), scale["orders"])
+        self.assertEqual(counts, {key: scale[key] for key in counts})
+        self.assertEqual(Product.objects.filter(vin__startswith=SYNTHETIC_SKU_PREFIX).count(), 20)
+        ledger = dict(
+            InventoryMovement.objects.values("product__vin").annotate(stock=Sum("quantity")).values_list(
+                "product__vin", "stock"
+            )
+        )
+        self.assertEqual(ledger, dict(Product.objects.values_list("vin", "current_stock")))
+
+        delete_synthetic_data()
+        self.assertFalse(Product.objects.exists())
+
+
+class AccountLookupTests(WebAppTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.buyer = cls.create_buyer("Buyer.One")
+
+    def test_lookups_ignore_case_and_whitespace(self):
+        self.assertEqual(list(users_with_username(" buyer.one ")), [self.buyer])
+        self.assertEqual(list(users_with_email("BUYER.ONE@example.COM")), [self.buyer])
+        self.assertFalse(users_with_email("").exists())
+
+    def test_lookups_use_the_expression_indexes(self):
+        for queryset, index_name in (
+            (users_with_username("buyer.one"), "auth_user_username_lower_idx"),
+            (users_with_email("buyer.one@example.com"), "auth_user_email_lower_idx"),
+        ):
+            with self.subTest(index=index_name):
+                self.assertIn(index_name, queryset.explain())
+
+
+class LowStockScanTests(WebAppTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = cls.create_seller()
+        cls.low = cls.create_product(cls.seller, "BRK0001", stock=2, reorder_level=5)
+        cls.create_product(cls.seller, "BRK0002", stock=20, reorder_level=5)
+        cls.create_product(cls.seller, "BRK0003", stock=0, reorder_level=5, is_active=False)
+
+    def test_scan_opens_one_alert_per_product_and_resolves_on_restock(self):
+        received = []
+
+        def handler(sender, alerts, **kwargs):
+            received.extend(alerts)
+
+        low_stock_detected.connect(handler)
+        self.addCleanup(low_stock_detected.disconnect, handler)
+
+        self.assertEqual(scan_low_stock(), {"opened": 1, "resolved": 0, "low_stock": 1})
+        self.assertEqual(scan_low_stock(), {"opened": 0, "resolved": 0, "low_stock": 1})
+        self.assertEqual([alert.product_id for alert in received], [self.low.pk])
+
+        Product.objects.filter(pk=self.low.pk).update(current_stock=9)
+        self.assertEqual(scan_low_stock(), {"opened": 0, "resolved": 1, "low_stock": 0})
+        self.assertIsNotNone(LowStockAlert.objects.get().resolved_at)
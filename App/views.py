@@ -1,28 +1,80 @@
 ﻿import json
+import time
 from decimal import Decimal
 from datetime import date
 
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import login, logout, update_session_auth_hash
+from django.contrib.auth.forms import SetPasswordForm
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.auth.tokens import default_token_generator
 from django.contrib.auth.models import User
 from django.core.paginator import Paginator
-from django.http import HttpResponse, HttpResponseRedirect, JsonResponse
+from django.http import Http404, HttpResponse, HttpResponseNotModified, HttpResponseRedirect, JsonResponse
 from django.shortcuts import get_object_or_404
 from django.shortcuts import redirect
-from django.db import IntegrityError, transaction
+from django.db import IntegrityError, OperationalError, transaction
 from django.db.models import Avg, Count, F, FloatField, Q, Sum, Value
 from django.db.models.functions import Coalesce, TruncMonth
 from django.utils import timezone
 from django.template.loader import render_to_string
 from django.urls import reverse, reverse_lazy
+from django.utils.crypto import constant_time_compare
+from django.utils.http import urlencode, urlsafe_base64_decode
 from django.views.generic import FormView, TemplateView, View
 from django_htmx.http import HttpResponseClientRedirect
 
+from .catalog import (
+    PRODUCT_LOOKUP_MAX_SKUS,
+    aget_product_detail,
+    ainvalidate_product_caches,
+    alookup_products,
+    aquery_catalog,
+    invalidate_product_caches,
+    parse_catalog_filters,
+    parse_lookup_skus,
+    serialize_shop_product,
+    shop_card_version,
+    shop_products_queryset,
+)
+from .accounts import users_with_email, users_with_username
+from .announcements import aget_active_site_announcement, invalidate_site_announcement
+from .exports import (
+    ADMIN_SALES_EXPORT_COLUMNS,
+    BUYER_ORDER_EXPORT_COLUMNS,
+    VENDOR_ORDER_EXPORT_COLUMNS,
+    iter_admin_sales_rows,
+    iter_buyer_order_rows,
+    iter_vendor_order_rows,
+    parse_order_export_filters,
+    streaming_export_response,
+)
+from .inventory import (
+    STOCK_ADJUSTMENT_MAX_ENTRIES,
+    apply_stock_adjustments,
+    low_stock_products,
+    monthly_inventory_flows,
+    record_stock_movements,
+    stock_movement,
+)
+from .outbox import (
+    queue_order_placed_emails,
+    queue_password_reset_email,
+    queue_seller_approved_email,
+)
+from .metrics import collect_snapshots, record_checkout, record_checkout_lock_retry, render_metrics
+from .profiling import load_request_profile
+from .tasks import enqueue_task, unsold_seller_products
+from .product_import import (
+    ProductImportError,
+    import_vendor_product_images,
+    import_vendor_products,
+    product_import_template_csv,
+)
 from .i18n import (
     SESSION_LANGUAGE_KEY,
-    get_request_language,
-    get_ui_text,
+    get_ui_text_bundle,
     normalize_language,
 )
 from .forms import (
@@ -30,6 +82,8 @@ from .forms import (
     LoginForm,
     ProductCategoryForm,
     ProductForm,
+    ProductImageArchiveForm,
+    ProductImportForm,
     SignupForm,
     SiteAnnouncementForm,
     SystemAdminCreateForm,
@@ -37,6 +91,7 @@ from .forms import (
 from .models import (
     AccountRegistration,
     ContactMessage,
+    InventoryMovement,
     Order,
     Product,
     ProductCategory,
@@ -53,107 +108,46 @@ def _redirect_superuser_home(request):
 
 
 def _build_shop_products(category_name=None, search_term=None):
-    filters = {
-        "is_active": True,
-        "current_stock__gt": 0,
-        "vendor__is_active": True,
-        "vendor__account_registration__is_verified": True,
-    }
-    if category_name:
-        filters["category"] = category_name
-    if search_term:
-        term = search_term.strip()
-        if term:
-            filters["name__isnull"] = False
-
-    products = (
-        Product.objects.filter(
-            **filters
-        )
-        .filter(
-            Q(vin__icontains=search_term) |
-            Q(name__icontains=search_term) |
-            Q(category__icontains=search_term)
-            if search_term
-            else Q()
-        )
-        .select_related("vendor", "vendor__account_registration")
-        .annotate(
-            rating_avg=Coalesce(
-                Avg("ratings__rating"),
-                Value(0.0),
-                output_field=FloatField(),
-            ),
-            rating_count=Coalesce(Count("ratings", distinct=True), 0),
-        )
-        .only(
-            "vin",
-            "name",
-            "category",
-            "price",
-            "current_stock",
-            "description",
-            "product_image",
-            "vendor__username",
-            "vendor__first_name",
-            "vendor__last_name",
-            "vendor__account_registration__profile_picture",
-        )
-        .order_by("-created_at")
-    )
-
-    shop_products = []
-    for product in products:
-        image_url = product.product_image.url if product.product_image else ""
-        stock = product.current_stock if product.current_stock is not None else 0
-        seller_name = product.vendor.get_full_name().strip() or product.vendor.username
-        seller_photo = ""
-        try:
-            account = product.vendor.account_registration
-            if account and account.profile_picture:
-                seller_photo = account.profile_picture.url
-        except AccountRegistration.DoesNotExist:
-            seller_photo = ""
-
-        stock_badges = []
-        if stock <= 5:
-            stock_badges.append("Low Stock")
-
-        shop_products.append(
-            {
-                "sku": product.vin,
-                "name": product.name,
-                "category": product.category,
-                "brand": seller_name,
-                "seller_name": seller_name,
-                "seller_photo": seller_photo,
-                "owner_id": product.vendor_id,
-                "condition": "New",
-                "rating": float(product.rating_avg or 0),
-                "reviews": int(product.rating_count or 0),
-                "price": float(product.price),
-                "stock": stock,
-                "badges": stock_badges,
-                "oem": product.vin,
-                "img": image_url,
-                "desc": product.description,
-            }
-        )
-
-    return shop_products
+    return [
+        serialize_shop_product(product)
+        for product in shop_products_queryset(category_name, search_term)
+    ]
+
+
+async def _abuild_shop_products(category_name=None, search_term=None):
+    products = []
+    card_versions = {}
+    async for product in shop_products_queryset(category_name, search_term):
+        products.append(serialize_shop_product(product))
+        card_versions[product.vin] = shop_card_version(product)
+    return products, card_versions
+
+
+async def _aget_shop_category_options():
+    category_options = [
+        {"value": category.name, "label": category.name}
+        async for category in ProductCategory.objects.filter(is_visible=True).order_by("name")
+    ]
+    if not category_options:
+        category_options = [
+            {"value": name, "label": name}
+            async for name in Product.objects.values_list("category", flat=True).distinct()
+            if name
+        ]
+    return category_options
 
 
-def _get_active_site_announcement():
-    announcement = (
-        SiteAnnouncement.objects
-        .only("message")
-        .order_by("-updated_at")
-        .first()
+async def _aget_storefront_account(user):
+    if not user.is_authenticated:
+        return None
+    return await (
+        AccountRegistration.objects.filter(user_id=user.id)
+        .only("account_type", "is_verified", "profile_picture")
+        .afirst()
     )
-    return announcement.message if announcement else ""
 
 
-def _build_public_nav_user_context(user):
+def _build_public_nav_user_context(user, account):
     nav_context = {
         "show_nav_user": False,
         "nav_user_name": "",
@@ -162,11 +156,6 @@ def _build_public_nav_user_context(user):
     if not user.is_authenticated:
         return nav_context
 
-    account = (
-        AccountRegistration.objects.filter(user_id=user.id)
-        .only("account_type", "is_verified", "profile_picture")
-        .first()
-    )
     if (
         account
         and account.account_type == AccountRegistration.ACCOUNT_TYPE_SELLER
@@ -181,155 +170,157 @@ def _build_public_nav_user_context(user):
     return nav_context
 
 
-class HomeView(TemplateView):
-    template_name = "index.html"
+def _build_shop_rating_context(user, account):
+    return {
+        "is_authenticated": user.is_authenticated,
+        "is_superadmin": user.is_authenticated and user.is_superuser,
+        "can_rate": user.is_authenticated
+        and (not user.is_superuser)
+        and account is not None,
+        "current_user_id": user.id if user.is_authenticated else None,
+        "login_url": reverse("login"),
+        "rate_url_template": reverse("product_rate", kwargs={"sku": "__SKU__"}),
+        "product_lookup_url": reverse("product_lookup"),
+        "product_detail_url_template": reverse("product_detail", kwargs={"sku": "__SKU__"}),
+    }
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        language = get_request_language(self.request)
-        context["shop_language"] = language
-        context["ui_text"] = get_ui_text(language)
-        nav_context = _build_public_nav_user_context(self.request.user)
 
-        shop_products = _build_shop_products()
+async def _aresolve_request_user(request):
+    user = await request.auser()
+    # Context processors read request.user while rendering; reuse the resolved user.
+    request.user = user
+    return user
+
+
+async def _abuild_storefront_context(request, products_awaitable):
+    # Async ORM calls run one at a time on Django's single thread-sensitive
+    # executor, so they are awaited in order; the async view only frees the
+    # worker while it waits.
+    user = await _aresolve_request_user(request)
+    account = await _aget_storefront_account(user)
+    announcement_note = await aget_active_site_announcement()
+    category_options = await _aget_shop_category_options()
+    products = await products_awaitable
+    context = {
+        "shop_category_options": category_options,
+        "shop_rating_context": _build_shop_rating_context(user, account),
+        "announcement_note": announcement_note,
+    }
+    context.update(_build_public_nav_user_context(user, account))
+    return context, products
 
-        category_options = [
-            {"value": category.name, "label": category.name}
-            for category in ProductCategory.objects.filter(is_visible=True).order_by("name")
-        ]
-        if not category_options:
-            category_options = [
-                {"value": name, "label": name}
-                for name in Product.objects.values_list("category", flat=True).distinct()
-                if name
-            ]
 
+class HomeView(TemplateView):
+    template_name = "index.html"
+    query_budget = 8
+
+    async def get(self, request, *args, **kwargs):
+        context = self.get_context_data(**kwargs)
+        storefront_context, (shop_products, card_versions) = await _abuild_storefront_context(
+            request,
+            _abuild_shop_products(),
+        )
+        context.update(storefront_context)
         context["shop_products"] = shop_products
-        context["shop_category_options"] = category_options
+        context["shop_card_versions"] = card_versions
         context["shop_brand_options"] = sorted({p["brand"] for p in shop_products})
-        context["show_nav_user"] = nav_context["show_nav_user"]
-        context["nav_user_name"] = nav_context["nav_user_name"]
-        context["nav_user_photo_url"] = nav_context["nav_user_photo_url"]
-        has_registered_account = False
-        if self.request.user.is_authenticated:
-            has_registered_account = AccountRegistration.objects.filter(
-                user_id=self.request.user.id
-            ).exists()
-        context["shop_rating_context"] = {
-            "is_authenticated": self.request.user.is_authenticated,
-            "is_superadmin": self.request.user.is_authenticated
-            and self.request.user.is_superuser,
-            "can_rate": self.request.user.is_authenticated
-            and (not self.request.user.is_superuser)
-            and has_registered_account,
-            "current_user_id": self.request.user.id if self.request.user.is_authenticated else None,
-            "login_url": reverse("login"),
-            "rate_url_template": reverse("product_rate", kwargs={"sku": "__SKU__"}),
-        }
-        context["announcement_note"] = _get_active_site_announcement()
-        return context
+        return self.render_to_response(context)
 
 
 class CategoryProductsView(TemplateView):
     template_name = "category_products.html"
-
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        language = get_request_language(self.request)
-        context["shop_language"] = language
-        context["ui_text"] = get_ui_text(language)
-        selected_category = (self.request.GET.get("category") or "").strip()
-
-        nav_context = _build_public_nav_user_context(self.request.user)
-
-        category_options = [
-            {"value": category.name, "label": category.name}
-            for category in ProductCategory.objects.filter(is_visible=True).order_by("name")
-        ]
-        if not category_options:
-            category_options = [
-                {"value": name, "label": name}
-                for name in Product.objects.values_list("category", flat=True).distinct()
-                if name
-            ]
-
-        products = _build_shop_products(selected_category or None)
-        has_registered_account = False
-        if self.request.user.is_authenticated:
-            has_registered_account = AccountRegistration.objects.filter(
-                user_id=self.request.user.id
-            ).exists()
-
+    query_budget = 8
+
+    async def get(self, request, *args, **kwargs):
+        context = self.get_context_data(**kwargs)
+        selected_category = (request.GET.get("category") or "").strip()
+        storefront_context, (products, card_versions) = await _abuild_storefront_context(
+            request,
+            _abuild_shop_products(selected_category or None),
+        )
+        context.update(storefront_context)
         context["category_products"] = products
+        context["shop_card_versions"] = card_versions
         context["selected_category"] = selected_category or "All Categories"
-        context["shop_category_options"] = category_options
-        context["show_nav_user"] = nav_context["show_nav_user"]
-        context["nav_user_name"] = nav_context["nav_user_name"]
-        context["nav_user_photo_url"] = nav_context["nav_user_photo_url"]
-        context["shop_rating_context"] = {
-            "is_authenticated": self.request.user.is_authenticated,
-            "is_superadmin": self.request.user.is_authenticated
-            and self.request.user.is_superuser,
-            "can_rate": self.request.user.is_authenticated
-            and (not self.request.user.is_superuser)
-            and has_registered_account,
-            "current_user_id": self.request.user.id if self.request.user.is_authenticated else None,
-            "login_url": reverse("login"),
-            "rate_url_template": reverse("product_rate", kwargs={"sku": "__SKU__"}),
-        }
-        context["announcement_note"] = _get_active_site_announcement()
-        return context
+        return self.render_to_response(context)
 
 
 class SearchProductsView(TemplateView):
     template_name = "search_results.html"
+    query_budget = 8
+
+    async def get(self, request, *args, **kwargs):
+        context = self.get_context_data(**kwargs)
+        query = (request.GET.get("q") or "").strip()
+        storefront_context, (products, card_versions) = await _abuild_storefront_context(
+            request,
+            _abuild_shop_products(search_term=query or None),
+        )
+        context.update(storefront_context)
+        context["search_query"] = query
+        context["search_products"] = products
+        context["shop_card_versions"] = card_versions
+        return self.render_to_response(context)
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        language = get_request_language(self.request)
-        context["shop_language"] = language
-        context["ui_text"] = get_ui_text(language)
-        query = (self.request.GET.get("q") or "").strip()
 
-        nav_context = _build_public_nav_user_context(self.request.user)
+class ProductCatalogView(View):
+    http_method_names = ["get"]
 
-        category_options = [
-            {"value": category.name, "label": category.name}
-            for category in ProductCategory.objects.filter(is_visible=True).order_by("name")
-        ]
-        if not category_options:
-            category_options = [
-                {"value": name, "label": name}
-                for name in Product.objects.values_list("category", flat=True).distinct()
-                if name
-            ]
-
-        products = _build_shop_products(search_term=query or None)
-        has_registered_account = False
-        if self.request.user.is_authenticated:
-            has_registered_account = AccountRegistration.objects.filter(
-                user_id=self.request.user.id
-            ).exists()
+    async def get(self, request, *args, **kwargs):
+        filters = parse_catalog_filters(request.GET)
+        return JsonResponse(await aquery_catalog(filters))
 
-        context["search_query"] = query
-        context["search_products"] = products
-        context["shop_category_options"] = category_options
-        context["show_nav_user"] = nav_context["show_nav_user"]
-        context["nav_user_name"] = nav_context["nav_user_name"]
-        context["nav_user_photo_url"] = nav_context["nav_user_photo_url"]
-        context["shop_rating_context"] = {
-            "is_authenticated": self.request.user.is_authenticated,
-            "is_superadmin": self.request.user.is_authenticated
-            and self.request.user.is_superuser,
-            "can_rate": self.request.user.is_authenticated
-            and (not self.request.user.is_superuser)
-            and has_registered_account,
-            "current_user_id": self.request.user.id if self.request.user.is_authenticated else None,
-            "login_url": reverse("login"),
-            "rate_url_template": reverse("product_rate", kwargs={"sku": "__SKU__"}),
-        }
-        context["announcement_note"] = _get_active_site_announcement()
-        return context
+
+class ProductLookupView(View):
+    http_method_names = ["get"]
+
+    async def get(self, request, *args, **kwargs):
+        skus = parse_lookup_skus(request.GET)
+        if not skus:
+            return JsonResponse({"error": "At least one SKU is required."}, status=400)
+        if len(skus) > PRODUCT_LOOKUP_MAX_SKUS:
+            return JsonResponse(
+                {"error": f"Look up at most {PRODUCT_LOOKUP_MAX_SKUS} SKUs at a time."},
+                status=400,
+            )
+        return JsonResponse(await alookup_products(skus))
+
+
+class ProductDetailView(View):
+    http_method_names = ["get"]
+
+    async def get(self, request, *args, **kwargs):
+        sku = str(kwargs.get("sku", "")).strip().upper()
+        detail = await aget_product_detail(sku) if sku else None
+        if detail is None:
+            return JsonResponse({"error": "Product is not available."}, status=404)
+        response = JsonResponse({"product": detail})
+        response["Cache-Control"] = "public, max-age=60"
+        return response
+
+
+class ProductSuggestionsView(View):
+    http_method_names = ["get"]
+    max_suggestions = 6
+
+    async def get(self, request, *args, **kwargs):
+        query = (request.GET.get("q") or "").strip()
+        if not query:
+            return JsonResponse({"suggestions": []})
+
+        suggestions = []
+        async for product in shop_products_queryset(search_term=query)[: self.max_suggestions]:
+            item = serialize_shop_product(product)
+            suggestions.append(
+                {
+                    "sku": item["sku"],
+                    "name": item["name"],
+                    "category": item["category"],
+                    "brand": item["brand"],
+                    "price": item["price"],
+                }
+            )
+        return JsonResponse({"suggestions": suggestions})
 
 
 class SetLanguagePreferenceView(View):
@@ -338,11 +329,30 @@ class SetLanguagePreferenceView(View):
     def post(self, request, *args, **kwargs):
         requested = request.POST.get("lang")
         language = normalize_language(requested)
-        request.session["preferred_language"] = language
+        if request.session.get(SESSION_LANGUAGE_KEY) != language:
+            request.session[SESSION_LANGUAGE_KEY] = language
         next_url = request.POST.get("next") or request.META.get("HTTP_REFERER") or reverse("home")
         return redirect(next_url)
 
 
+class UiTextBundleView(View):
+    http_method_names = ["get"]
+
+    def get(self, request, *args, **kwargs):
+        bundle = get_ui_text_bundle(kwargs.get("language"))
+        etag = f'"{bundle["version"]}"'
+        if request.headers.get("If-None-Match") == etag:
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(bundle["body"], content_type="application/javascript; charset=utf-8")
+        response["ETag"] = etag
+        if kwargs.get("version") == bundle["version"]:
+            response["Cache-Control"] = "public, max-age=31536000, immutable"
+        else:
+            response["Cache-Control"] = "no-cache"
+        return response
+
+
 class VendorAccessMixin(LoginRequiredMixin):
     login_url = reverse_lazy("login")
 
@@ -410,6 +420,7 @@ class SuperuserRequiredMixin(LoginRequiredMixin):
 
 class VendorDashboardView(SellerAccountRequiredMixin, VendorAccessMixin, TemplateView):
     template_name = "vendors/index.html"
+    query_budget = 15
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -427,10 +438,7 @@ class VendorDashboardView(SellerAccountRequiredMixin, VendorAccessMixin, Templat
             product__vendor_id=self.request.user.id,
             is_delivered=True,
         ).aggregate(total=Coalesce(Sum("quantity"), 0))["total"]
-        context["low_stock_count"] = active_products.filter(
-            current_stock__isnull=False,
-            current_stock__lte=F("reorder_level"),
-        ).count()
+        context["low_stock_count"] = low_stock_products(self.request.user.id).count()
 
         # Build a continuous 6-month window (oldest -> newest).
         today = timezone.localdate()
@@ -445,34 +453,14 @@ class VendorDashboardView(SellerAccountRequiredMixin, VendorAccessMixin, Templat
         next_month_index = current_month_start.year * 12 + current_month_start.month
         next_month_start = date((next_month_index // 12), (next_month_index % 12) + 1, 1)
 
-        # "Added quantity" = not ordered (current stock) + ordered quantity.
-        added_by_month = {month_start: 0 for month_start in month_starts}
-        added_products = (
-            active_products.filter(
-                created_at__date__gte=month_starts[0],
-                created_at__date__lt=next_month_start,
-            )
-            .annotate(month=TruncMonth("created_at"))
-            .annotate(total_ordered_quantity=Coalesce(Sum("orders__quantity"), 0))
-            .values(
-                "id",
-                "month",
-                "current_stock",
-                "initial_stock",
-                "total_ordered_quantity",
-            )
-        )
-        for row in added_products:
-            month_key = row["month"].date()
-            not_ordered_quantity = (
-                int(row["current_stock"])
-                if row["current_stock"] is not None
-                else int(row["initial_stock"] or 0)
-            )
-            ordered_quantity = int(row["total_ordered_quantity"] or 0)
-            added_by_month[month_key] = added_by_month.get(month_key, 0) + (
-                not_ordered_quantity + ordered_quantity
-            )
+        # "Added quantity" = stock received into the ledger (receipts and upward
+        # adjustments) for active products, read from the (vendor, created_at) index.
+        added_by_month = {
+            month_start: flows["received"]
+            for month_start, flows in monthly_inventory_flows(
+                self.request.user.id, month_starts[0], next_month_start, active_only=True
+            ).items()
+        }
         delivered_by_month = {
             row["month"].date(): int(row["total_quantity"] or 0)
             for row in (
@@ -508,6 +496,7 @@ class VendorDashboardView(SellerAccountRequiredMixin, VendorAccessMixin, Templat
 
 class AdminDashboardView(SuperuserRequiredMixin, TemplateView):
     template_name = "admin/dashboard.html"
+    query_budget = 12
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -574,6 +563,56 @@ class AdminDashboardView(SuperuserRequiredMixin, TemplateView):
         return context
 
 
+class AdminSalesExportView(SuperuserRequiredMixin, View):
+    http_method_names = ["get"]
+
+    def get(self, request, *args, **kwargs):
+        filters = parse_order_export_filters(request.GET, default_status="delivered")
+        return streaming_export_response(
+            request,
+            "sales",
+            ADMIN_SALES_EXPORT_COLUMNS,
+            iter_admin_sales_rows(filters),
+            filters["format"],
+        )
+
+
+class MetricsView(View):
+    http_method_names = ["get"]
+
+    def get(self, request, *args, **kwargs):
+        if settings.METRICS_TOKEN:
+            allowed = constant_time_compare(
+                request.headers.get("Authorization", ""), f"Bearer {settings.METRICS_TOKEN}"
+            )
+        else:
+            # Behind a reverse proxy on the same host every request arrives from
+            # loopback, so the address alone only counts in development.
+            allowed = settings.DEBUG and request.META.get("REMOTE_ADDR") in ("127.0.0.1", "::1")
+        if not allowed:
+            return HttpResponse("Forbidden", status=403, content_type="text/plain")
+        return HttpResponse(
+            render_metrics(collect_snapshots()),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
+
+
+class AdminRequestProfileView(SuperuserRequiredMixin, View):
+    http_method_names = ["get"]
+
+    def get(self, request, *args, **kwargs):
+        profile = load_request_profile(kwargs["profile_id"])
+        if profile is None:
+            raise Http404("Profile not found.")
+        if request.GET.get("format") == "text":
+            # Folded stacks feed flamegraph.pl or speedscope directly.
+            return HttpResponse(
+                profile.get("stacks") or profile.get("stats", ""),
+                content_type="text/plain; charset=utf-8",
+            )
+        return JsonResponse(profile)
+
+
 class AdminSellerManagementView(SuperuserRequiredMixin, TemplateView):
     template_name = "admin/seller_management.html"
 
@@ -618,23 +657,26 @@ class AdminSellerVerificationUpdateView(SuperuserRequiredMixin, View):
         if action not in {"approve", "reject", "disable", "enable", "delete"}:
             return JsonResponse({"ok": False, "message": "Invalid action."}, status=400)
 
+        products_active = None
+        notify_approval = False
         if action == "approve":
+            notify_approval = not account.is_verified
             account.is_verified = True
             account.user.is_active = True
-            Product.objects.filter(vendor_id=account.user_id).update(is_active=True)
+            products_active = True
             message = "Seller approved and verified successfully."
         elif action == "reject":
             account.is_verified = False
             account.user.is_active = False
-            Product.objects.filter(vendor_id=account.user_id).update(is_active=False)
+            products_active = False
             message = "Seller rejected and account disabled."
         elif action == "disable":
             account.user.is_active = False
-            Product.objects.filter(vendor_id=account.user_id).update(is_active=False)
+            products_active = False
             message = "Seller account disabled."
         elif action == "enable":
             account.user.is_active = True
-            Product.objects.filter(vendor_id=account.user_id).update(is_active=True)
+            products_active = True
             message = "Seller account enabled."
         else:
             if account.user.is_active:
@@ -643,24 +685,9 @@ class AdminSellerVerificationUpdateView(SuperuserRequiredMixin, View):
                     status=400,
                 )
 
-            unsold_products_qs = (
-                Product.objects.filter(
-                    vendor_id=account.user_id,
-                    is_active=True,
-                    current_stock__gt=0,
-                )
-                .annotate(
-                    delivered_qty=Coalesce(
-                        Sum("orders__quantity", filter=Q(orders__is_delivered=True)),
-                        0,
-                    )
-                )
-                .filter(delivered_qty=0)
-            )
-            deleted_products_count = unsold_products_qs.count()
+            deleted_products_count = unsold_seller_products(account.user_id).count()
             user = account.user
             with transaction.atomic():
-                unsold_products_qs.delete()
                 account.delete()
                 user.is_active = False
                 user.set_unusable_password()
@@ -676,18 +703,27 @@ class AdminSellerVerificationUpdateView(SuperuserRequiredMixin, View):
                         "last_name",
                     ]
                 )
+                enqueue_task("purge_unsold_seller_products", vendor_id=user.id)
             return JsonResponse(
                 {
                     "ok": True,
                     "deleted": True,
                     "account_id": kwargs.get("pk"),
-                    "message": f"Seller account removed. Deleted {deleted_products_count} available unsold product(s).",
+                    "message": f"Seller account removed. {deleted_products_count} available unsold product(s) will be deleted.",
                 }
             )
 
         with transaction.atomic():
             account.save(update_fields=["is_verified", "updated_at"])
             account.user.save(update_fields=["is_active"])
+            # Flipping every product of a large seller is left to the task worker.
+            enqueue_task(
+                "set_seller_products_active",
+                vendor_id=account.user_id,
+                is_active=products_active,
+            )
+            if notify_approval:
+                queue_seller_approved_email(request, account.user)
 
         row_html = render_to_string(
             "admin/partials/seller_row.html",
@@ -899,6 +935,7 @@ class AdminSiteAnnouncementSaveView(SuperuserRequiredMixin, View):
             announcement = form.save()
             # Keep a single announcement row; new saves replace the current message.
             SiteAnnouncement.objects.exclude(pk=announcement.pk).delete()
+            invalidate_site_announcement()
             if is_ajax:
                 return JsonResponse(
                     {
@@ -1058,6 +1095,7 @@ class AdminMessagesInboxView(SuperuserRequiredMixin, TemplateView):
 
 class VendorOrdersView(SellerAccountRequiredMixin, VendorAccessMixin, TemplateView):
     template_name = "vendors/orders.html"
+    query_budget = 9
     paginate_by = 20
 
     def get_context_data(self, **kwargs):
@@ -1092,6 +1130,20 @@ class VendorOrdersView(SellerAccountRequiredMixin, VendorAccessMixin, TemplateVi
         return context
 
 
+class VendorOrdersExportView(SellerAccountRequiredMixin, VendorAccessMixin, View):
+    http_method_names = ["get"]
+
+    def get(self, request, *args, **kwargs):
+        filters = parse_order_export_filters(request.GET)
+        return streaming_export_response(
+            request,
+            "vendor-orders",
+            VENDOR_ORDER_EXPORT_COLUMNS,
+            iter_vendor_order_rows(request.user.id, filters),
+            filters["format"],
+        )
+
+
 class VendorOrderDeliveredUpdateView(SellerAccountRequiredMixin, VendorAccessMixin, View):
     http_method_names = ["post"]
 
@@ -1129,13 +1181,26 @@ class VendorOrderUnacceptView(SellerAccountRequiredMixin, VendorAccessMixin, Vie
         with transaction.atomic():
             product = (
                 Product.objects.select_for_update()
-                .only("id", "current_stock", "initial_stock")
+                .only("id", "vendor_id", "current_stock", "initial_stock")
                 .get(pk=order.product_id)
             )
             current_stock = (
                 product.current_stock if product.current_stock is not None else product.initial_stock
             )
-            Product.objects.filter(pk=product.pk).update(current_stock=current_stock + order.quantity)
+            Product.objects.filter(pk=product.pk).update(
+                current_stock=current_stock + order.quantity,
+                updated_at=timezone.now(),
+            )
+            record_stock_movements(
+                [
+                    stock_movement(
+                        product,
+                        InventoryMovement.KIND_CANCELLATION,
+                        order.quantity,
+                        current_stock + order.quantity,
+                    )
+                ]
+            )
             order.delete()
 
         if request.headers.get("x-requested-with") == "XMLHttpRequest":
@@ -1149,27 +1214,120 @@ class VendorOrderUnacceptView(SellerAccountRequiredMixin, VendorAccessMixin, Vie
         return redirect("vendor_orders")
 
 
+VENDOR_PRODUCTS_PAGE_SIZE = 20
+VENDOR_PRODUCTS_PAGE_SIZE_CHOICES = (10, 20, 50, 100)
+VENDOR_PRODUCTS_SORT_ORDERING = {
+    "newest": ("-created_at", "-id"),
+    "low_stock": ("stock_gap", "stock_level", "-id"),
+    "stock_asc": ("stock_level", "-id"),
+    "stock_desc": ("-stock_level", "-id"),
+    "price_asc": ("price", "-id"),
+    "price_desc": ("-price", "-id"),
+}
+VENDOR_PRODUCTS_VISIBILITY_CHOICES = ("listed", "hidden")
+
+
+def _parse_vendor_products_filters(params):
+    sort = params.get("sort") or "newest"
+    if sort not in VENDOR_PRODUCTS_SORT_ORDERING:
+        sort = "newest"
+    visibility = params.get("visibility") or ""
+    if visibility not in VENDOR_PRODUCTS_VISIBILITY_CHOICES:
+        visibility = ""
+    try:
+        per_page = int(params.get("per_page") or VENDOR_PRODUCTS_PAGE_SIZE)
+    except (TypeError, ValueError):
+        per_page = VENDOR_PRODUCTS_PAGE_SIZE
+    if per_page not in VENDOR_PRODUCTS_PAGE_SIZE_CHOICES:
+        per_page = VENDOR_PRODUCTS_PAGE_SIZE
+    return {
+        "q": (params.get("q") or "").strip()[:80],
+        "category": (params.get("category") or "").strip()[:80],
+        "visibility": visibility,
+        "sort": sort,
+        "per_page": per_page,
+    }
+
+
+def _build_vendor_products_page_data(user, page_number, filters):
+    # Every filter is scoped by vendor first so the (vendor, category) and
+    # (vendor, is_active) indexes drive the lookup and the COUNT for the pager.
+    products_qs = user.products.all()
+    if filters["category"]:
+        products_qs = products_qs.filter(category=filters["category"])
+    if filters["visibility"]:
+        products_qs = products_qs.filter(is_active=filters["visibility"] == "listed")
+    search = filters["q"]
+    if search:
+        products_qs = products_qs.filter(
+            Q(name__icontains=search)
+            | Q(vin__startswith=search.upper())
+            | Q(category__icontains=search)
+        )
+
+    products_qs = (
+        products_qs.only(
+            "id",
+            "vendor_id",
+            "name",
+            "category",
+            "current_stock",
+            "initial_stock",
+            "reorder_level",
+            "price",
+            "description",
+            "vin",
+            "product_image",
+        )
+        .annotate(stock_level=Coalesce("current_stock", "initial_stock"))
+        .annotate(stock_gap=F("stock_level") - F("reorder_level"))
+        .order_by(*VENDOR_PRODUCTS_SORT_ORDERING[filters["sort"]])
+    )
+    paginator = Paginator(products_qs, filters["per_page"])
+    page_obj = paginator.get_page(page_number)
+
+    query = {
+        key: value
+        for key, value in filters.items()
+        if value and not (key == "sort" and value == "newest")
+        and not (key == "per_page" and value == VENDOR_PRODUCTS_PAGE_SIZE)
+    }
+    return {
+        "paginator": paginator,
+        "page_obj": page_obj,
+        "products": page_obj.object_list,
+        "filters": filters,
+        "filter_query": urlencode(query),
+    }
+
+
+def _build_vendor_products_table_context(request):
+    filters = _parse_vendor_products_filters(request.GET)
+    page_data = _build_vendor_products_page_data(
+        user=request.user,
+        page_number=request.GET.get("page"),
+        filters=filters,
+    )
+    return {
+        "products": page_data["products"],
+        "page_obj": page_data["page_obj"],
+        "is_paginated": page_data["page_obj"].has_other_pages(),
+        "matching_products_total": page_data["paginator"].count,
+        "product_filters": page_data["filters"],
+        "product_filter_query": page_data["filter_query"],
+    }
+
+
 class VendorProductsView(SellerAccountRequiredMixin, VendorAccessMixin, TemplateView):
     template_name = "vendors/products.html"
+    query_budget = 12
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["products"] = (
-            self.request.user.products.only(
-                "id",
-                "name",
-                "category",
-                "vin",
-                "current_stock",
-                "initial_stock",
-                "reorder_level",
-                "price",
-                "description",
-                "product_image",
-            )
-            .order_by("-created_at")
-        )
+        context.update(_build_vendor_products_table_context(self.request))
+        context["products_total"] = self.request.user.products.count()
         context["product_category_rows"] = ProductCategory.objects.filter(is_visible=True).order_by("name")
+        context["product_page_size_choices"] = VENDOR_PRODUCTS_PAGE_SIZE_CHOICES
         return context
 
 
@@ -1177,45 +1335,36 @@ class VendorProductRowsView(SellerAccountRequiredMixin, VendorAccessMixin, View)
     http_method_names = ["get"]
 
     def get(self, request, *args, **kwargs):
-        products = (
-            request.user.products.only(
-                "id",
-                "name",
-                "category",
-                "current_stock",
-                "initial_stock",
-                "reorder_level",
-                "price",
-                "description",
-                "vin",
-                "product_image",
-            )
-            .order_by("-created_at")
-        )
-        rows_html = render_to_string(
-            "vendors/partials/product_rows.html",
-            {"products": products},
+        table_context = _build_vendor_products_table_context(request)
+        table_html = render_to_string(
+            "vendors/partials/product_table.html",
+            table_context,
             request=request,
         )
-        return HttpResponse(rows_html)
+        response = HttpResponse(table_html)
+        if getattr(request, "htmx", False):
+            products_url = reverse("vendor_products")
+            query = table_context["product_filter_query"]
+            page_number = table_context["page_obj"].number
+            if page_number > 1:
+                query = f"{query}&page={page_number}" if query else f"page={page_number}"
+            response["HX-Push-Url"] = f"{products_url}?{query}" if query else products_url
+        return response
+
+
+def _render_vendor_product_row(request, product):
+    return render_to_string(
+        "vendors/partials/product_row.html",
+        {"product": product},
+        request=request,
+    )
 
 
-def _vendor_products_queryset(user):
-    return (
-        user.products.only(
-            "id",
-            "name",
-            "category",
-            "current_stock",
-            "initial_stock",
-            "reorder_level",
-            "price",
-            "description",
-            "vin",
-            "product_image",
-        )
-        .order_by("-created_at")
-    )
+def _vendor_product_row_trigger(event_name, message, product_id, count=None):
+    detail = {"message": message, "product_id": product_id}
+    if count is not None:
+        detail["count"] = count
+    return json.dumps({event_name: detail})
 
 
 class VendorAnalyticsView(SellerAccountRequiredMixin, VendorAccessMixin, TemplateView):
@@ -1303,6 +1452,7 @@ class BuyerDashboardView(BuyerAccountRequiredMixin, VendorAccessMixin, TemplateV
 
 class BuyerOrdersView(BuyerAccountRequiredMixin, VendorAccessMixin, TemplateView):
     template_name = "vendors/buyer/buyer_order.html"
+    query_budget = 8
     paginate_by = 20
 
     def get_context_data(self, **kwargs):
@@ -1321,6 +1471,20 @@ class BuyerOrdersView(BuyerAccountRequiredMixin, VendorAccessMixin, TemplateView
         return context
 
 
+class BuyerOrdersExportView(BuyerAccountRequiredMixin, VendorAccessMixin, View):
+    http_method_names = ["get"]
+
+    def get(self, request, *args, **kwargs):
+        filters = parse_order_export_filters(request.GET)
+        return streaming_export_response(
+            request,
+            "my-orders",
+            BUYER_ORDER_EXPORT_COLUMNS,
+            iter_buyer_order_rows(request.user.id, filters),
+            filters["format"],
+        )
+
+
 class BuyerOrderCancelView(BuyerAccountRequiredMixin, VendorAccessMixin, View):
     http_method_names = ["post"]
 
@@ -1334,13 +1498,26 @@ class BuyerOrderCancelView(BuyerAccountRequiredMixin, VendorAccessMixin, View):
         with transaction.atomic():
             product = (
                 Product.objects.select_for_update()
-                .only("id", "current_stock", "initial_stock")
+                .only("id", "vendor_id", "current_stock", "initial_stock")
                 .get(pk=order.product_id)
             )
             current_stock = (
                 product.current_stock if product.current_stock is not None else product.initial_stock
             )
-            Product.objects.filter(pk=product.pk).update(current_stock=current_stock + order.quantity)
+            Product.objects.filter(pk=product.pk).update(
+                current_stock=current_stock + order.quantity,
+                updated_at=timezone.now(),
+            )
+            record_stock_movements(
+                [
+                    stock_movement(
+                        product,
+                        InventoryMovement.KIND_CANCELLATION,
+                        order.quantity,
+                        current_stock + order.quantity,
+                    )
+                ]
+            )
             order.delete()
 
         return JsonResponse({"ok": True, "message": "Order canceled successfully."})
@@ -1349,20 +1526,21 @@ class BuyerOrderCancelView(BuyerAccountRequiredMixin, VendorAccessMixin, View):
 class ProductRatingCreateView(View):
     http_method_names = ["post"]
 
-    def post(self, request, *args, **kwargs):
-        if request.user.is_authenticated and request.user.is_superuser:
+    async def post(self, request, *args, **kwargs):
+        user = await request.auser()
+        if user.is_authenticated and user.is_superuser:
             return JsonResponse({"error": "System admins cannot rate products."}, status=403)
 
-        if not request.user.is_authenticated:
+        if not user.is_authenticated:
             return JsonResponse(
                 {"error": "Please log in with a registered account to rate."},
                 status=401,
             )
 
-        account = (
-            AccountRegistration.objects.filter(user_id=request.user.id)
+        account = await (
+            AccountRegistration.objects.filter(user_id=user.id)
             .only("id")
-            .first()
+            .afirst()
         )
         if not account:
             return JsonResponse(
@@ -1374,15 +1552,15 @@ class ProductRatingCreateView(View):
         if not sku:
             return JsonResponse({"error": "Invalid product identifier."}, status=400)
 
-        product = Product.objects.filter(
+        product = await Product.objects.filter(
             vin=sku,
             is_active=True,
             vendor__is_active=True,
             vendor__account_registration__is_verified=True,
-        ).first()
+        ).only("id", "vendor_id").afirst()
         if not product:
             return JsonResponse({"error": "Product is not available for rating."}, status=404)
-        if product.vendor_id == request.user.id:
+        if product.vendor_id == user.id:
             return JsonResponse(
                 {"error": "You cannot rate your own product."},
                 status=403,
@@ -1401,15 +1579,15 @@ class ProductRatingCreateView(View):
         if rating_value < 1 or rating_value > 5:
             return JsonResponse({"error": "Rating must be between 1 and 5."}, status=400)
 
-        if ProductRating.objects.filter(user_id=request.user.id, product_id=product.id).exists():
+        if await ProductRating.objects.filter(user_id=user.id, product_id=product.id).aexists():
             return JsonResponse(
                 {"error": "You already rated this product. You can only rate once."},
                 status=409,
             )
 
         try:
-            ProductRating.objects.create(
-                user=request.user,
+            await ProductRating.objects.acreate(
+                user=user,
                 product=product,
                 rating=rating_value,
             )
@@ -1419,7 +1597,8 @@ class ProductRatingCreateView(View):
                 status=409,
             )
 
-        aggregates = ProductRating.objects.filter(product_id=product.id).aggregate(
+        await ainvalidate_product_caches([sku])
+        aggregates = await ProductRating.objects.filter(product_id=product.id).aaggregate(
             avg=Coalesce(Avg("rating"), Value(0.0), output_field=FloatField()),
             count=Coalesce(Count("id"), 0),
         )
@@ -1470,17 +1649,26 @@ class ContactMessageCreateView(View):
         return JsonResponse({"ok": True, "message": "Message submitted successfully."})
 
 
+# SQLite refuses a second writer with "database is locked" instead of waiting
+# when two checkouts upgrade their read locks at once; the whole transaction is
+# simply run again.
+ORDER_LOCK_RETRIES = 3
+ORDER_LOCK_RETRY_DELAY = 0.05
+
+
 class OrderCreateView(View):
     http_method_names = ["post"]
 
     def post(self, request, *args, **kwargs):
         if request.user.is_authenticated and request.user.is_superuser:
+            record_checkout("rejected")
             return JsonResponse(
                 {"error": "System admins cannot place orders."},
                 status=403,
             )
 
         if not request.user.is_authenticated:
+            record_checkout("rejected")
             return JsonResponse(
                 {
                     "error": "Please log in to submit an order.",
@@ -1495,6 +1683,7 @@ class OrderCreateView(View):
             .first()
         )
         if not account or account.account_type != AccountRegistration.ACCOUNT_TYPE_BUYER:
+            record_checkout("rejected")
             return JsonResponse(
                 {"error": "Only buyer accounts can submit orders."},
                 status=403,
@@ -1503,10 +1692,12 @@ class OrderCreateView(View):
         try:
             payload = json.loads(request.body or "{}")
         except json.JSONDecodeError:
+            record_checkout("rejected")
             return JsonResponse({"error": "Invalid request payload."}, status=400)
 
         items = payload.get("items")
         if not isinstance(items, list) or not items:
+            record_checkout("rejected")
             return JsonResponse({"error": "Cart is empty."}, status=400)
 
         quantity_by_sku = {}
@@ -1524,18 +1715,51 @@ class OrderCreateView(View):
             quantity_by_sku[sku] = quantity_by_sku.get(sku, 0) + qty
 
         if not quantity_by_sku:
+            record_checkout("rejected")
             return JsonResponse({"error": "No valid order items found."}, status=400)
 
+        for attempt in range(ORDER_LOCK_RETRIES + 1):
+            try:
+                outcome, response = self.place_orders(request, quantity_by_sku)
+                break
+            except OperationalError as exc:
+                if "locked" not in str(exc):
+                    raise
+                if attempt == ORDER_LOCK_RETRIES:
+                    outcome, response = "lock_error", JsonResponse(
+                        {"error": "Checkout is busy right now. Please try again."},
+                        status=503,
+                    )
+                    break
+                record_checkout_lock_retry()
+                time.sleep(ORDER_LOCK_RETRY_DELAY * 2**attempt)
+        record_checkout(outcome)
+        return response
+
+    def place_orders(self, request, quantity_by_sku):
         with transaction.atomic():
             products = (
                 Product.objects.select_for_update()
                 .filter(vin__in=quantity_by_sku.keys(), is_active=True)
-                .only("id", "vin", "name", "price", "current_stock", "initial_stock")
+                .select_related("vendor")
+                .only(
+                    "id",
+                    "vendor_id",
+                    "vin",
+                    "name",
+                    "price",
+                    "current_stock",
+                    "initial_stock",
+                    "vendor__username",
+                    "vendor__email",
+                    "vendor__first_name",
+                    "vendor__last_name",
+                )
             )
             products_by_vin = {product.vin: product for product in products}
             missing_skus = [sku for sku in quantity_by_sku.keys() if sku not in products_by_vin]
             if missing_skus:
-                return JsonResponse(
+                return "unavailable", JsonResponse(
                     {"error": f"Some items are unavailable: {', '.join(missing_skus)}."},
                     status=400,
                 )
@@ -1554,11 +1778,13 @@ class OrderCreateView(View):
                     )
 
             if stock_errors:
-                return JsonResponse(
+                return "insufficient_stock", JsonResponse(
                     {"error": "Insufficient stock.", "details": stock_errors},
                     status=400,
                 )
 
+            movements = []
+            orders = []
             for sku, qty in quantity_by_sku.items():
                 product = products_by_vin[sku]
                 available = (
@@ -1567,16 +1793,25 @@ class OrderCreateView(View):
                     else product.initial_stock
                 )
                 new_stock = available - qty
-                Product.objects.filter(pk=product.pk).update(current_stock=new_stock)
+                Product.objects.filter(pk=product.pk).update(
+                    current_stock=new_stock,
+                    updated_at=timezone.now(),
+                )
 
-                Order.objects.create(
+                order = Order.objects.create(
                     buyer=request.user,
                     product=product,
                     quantity=qty,
                     total_price=product.price * qty,
                 )
+                orders.append(order)
+                movements.append(
+                    stock_movement(product, InventoryMovement.KIND_SALE, -qty, new_stock, order=order)
+                )
+            record_stock_movements(movements)
+            queue_order_placed_emails(request, request.user, orders)
 
-        return JsonResponse(
+        return "success", JsonResponse(
             {
                 "message": "Order submitted successfully.",
                 "created_count": len(quantity_by_sku),
@@ -1622,28 +1857,21 @@ class VendorProductCreateView(SellerAccountRequiredMixin, VendorAccessMixin, Vie
             product = form.save()
 
         success_message = f"Product '{product.name}' was added successfully."
+        product_count = request.user.products.count()
         if is_htmx:
-            row_html = render_to_string(
-                "vendors/partials/product_row.html",
-                {"product": product},
-                request=request,
+            response = HttpResponse(_render_vendor_product_row(request, product))
+            response["HX-Trigger"] = _vendor_product_row_trigger(
+                "product:create:success", success_message, product.id, product_count
             )
-            response = HttpResponse(row_html)
-            response["HX-Trigger"] = json.dumps({"product:create:success": {"message": success_message}})
             return response
         if is_ajax:
-            products = _vendor_products_queryset(request.user)
-            rows_html = render_to_string(
-                "vendors/partials/product_rows.html",
-                {"products": products},
-                request=request,
-            )
             return JsonResponse(
                 {
                     "ok": True,
                     "message": success_message,
-                    "rows_html": rows_html,
-                    "count": products.count(),
+                    "product_id": product.id,
+                    "row_html": _render_vendor_product_row(request, product),
+                    "count": product_count,
                 }
             )
         messages.success(request, success_message)
@@ -1673,6 +1901,7 @@ class VendorProductUpdateView(SellerAccountRequiredMixin, VendorAccessMixin, Vie
             return redirect("vendor_products")
 
         product = get_object_or_404(request.user.products, pk=kwargs.get("pk"))
+        previous_sku = product.vin
         form = ProductForm(request.POST, request.FILES, vendor=request.user, instance=product)
         if not form.is_valid():
             first_error = next(iter(form.errors.values()))[0] if form.errors else "Please check your input and try again."
@@ -1687,31 +1916,22 @@ class VendorProductUpdateView(SellerAccountRequiredMixin, VendorAccessMixin, Vie
 
         with transaction.atomic():
             product = form.save()
+        invalidate_product_caches({previous_sku, product.vin})
 
         success_message = f"Product '{product.name}' was updated successfully."
         if is_htmx:
-            products = _vendor_products_queryset(request.user)
-            rows_html = render_to_string(
-                "vendors/partials/product_rows.html",
-                {"products": products},
-                request=request,
+            response = HttpResponse(_render_vendor_product_row(request, product))
+            response["HX-Trigger"] = _vendor_product_row_trigger(
+                "product:update:success", success_message, product.id
             )
-            response = HttpResponse(rows_html)
-            response["HX-Trigger"] = json.dumps({"product:update:success": {"message": success_message}})
             return response
         if is_ajax:
-            products = _vendor_products_queryset(request.user)
-            rows_html = render_to_string(
-                "vendors/partials/product_rows.html",
-                {"products": products},
-                request=request,
-            )
             return JsonResponse(
                 {
                     "ok": True,
                     "message": success_message,
-                    "rows_html": rows_html,
-                    "count": products.count(),
+                    "product_id": product.id,
+                    "row_html": _render_vendor_product_row(request, product),
                 }
             )
         messages.success(request, success_message)
@@ -1740,40 +1960,182 @@ class VendorProductDeleteView(SellerAccountRequiredMixin, VendorAccessMixin, Vie
             messages.error(request, error_text)
             return redirect("vendor_products")
 
-        product = get_object_or_404(request.user.products.only("id", "name"), pk=kwargs.get("pk"))
+        product = get_object_or_404(request.user.products.only("id", "name", "vin"), pk=kwargs.get("pk"))
+        product_id = product.id
         product_name = product.name
         product.delete()
+        invalidate_product_caches([product.vin])
 
         success_message = f"Product '{product_name}' was deleted successfully."
+        product_count = request.user.products.count()
         if is_htmx:
-            products = _vendor_products_queryset(request.user)
-            rows_html = render_to_string(
-                "vendors/partials/product_rows.html",
-                {"products": products},
-                request=request,
+            response = HttpResponse("")
+            response["HX-Trigger"] = _vendor_product_row_trigger(
+                "product:delete:success", success_message, product_id, product_count
             )
-            response = HttpResponse(rows_html)
-            response["HX-Trigger"] = json.dumps({"product:delete:success": {"message": success_message}})
             return response
         if is_ajax:
-            products = _vendor_products_queryset(request.user)
-            rows_html = render_to_string(
-                "vendors/partials/product_rows.html",
-                {"products": products},
-                request=request,
-            )
             return JsonResponse(
                 {
                     "ok": True,
                     "message": success_message,
-                    "rows_html": rows_html,
-                    "count": products.count(),
+                    "product_id": product_id,
+                    "count": product_count,
                 }
             )
         messages.success(request, success_message)
         return redirect("vendor_products")
 
 
+class VendorStockAdjustmentView(SellerAccountRequiredMixin, VendorAccessMixin, View):
+    http_method_names = ["post"]
+
+    def post(self, request, *args, **kwargs):
+        try:
+            payload = json.loads(request.body or "{}")
+        except json.JSONDecodeError:
+            return JsonResponse({"ok": False, "message": "Invalid request payload."}, status=400)
+
+        entries = payload.get("adjustments") if isinstance(payload, dict) else None
+        if not isinstance(entries, list) or not entries:
+            return JsonResponse({"ok": False, "message": "No adjustments were sent."}, status=400)
+        if len(entries) > STOCK_ADJUSTMENT_MAX_ENTRIES:
+            return JsonResponse(
+                {
+                    "ok": False,
+                    "message": f"Send at most {STOCK_ADJUSTMENT_MAX_ENTRIES} adjustments per request.",
+                },
+                status=400,
+            )
+
+        results = apply_stock_adjustments(request.user, entries)
+        updated_count = sum(1 for result in results if result["ok"])
+        return JsonResponse(
+            {
+                "ok": True,
+                "message": f"Updated {updated_count} of {len(results)} products.",
+                "updated_count": updated_count,
+                "results": results,
+            }
+        )
+
+
+class VendorLowStockView(SellerAccountRequiredMixin, VendorAccessMixin, View):
+    http_method_names = ["get"]
+    paginate_by = 50
+
+    def get(self, request, *args, **kwargs):
+        products_qs = (
+            low_stock_products(request.user.id)
+            .annotate(shortfall=F("reorder_level") - F("current_stock"))
+            .order_by("-shortfall", "current_stock", "id")
+            .values("id", "name", "vin", "category", "current_stock", "reorder_level", "shortfall")
+        )
+        page_obj = Paginator(products_qs, self.paginate_by).get_page(request.GET.get("page"))
+        return JsonResponse(
+            {
+                "ok": True,
+                "count": page_obj.paginator.count,
+                "page": page_obj.number,
+                "num_pages": page_obj.paginator.num_pages,
+                "products": [
+                    {
+                        "id": row["id"],
+                        "name": row["name"],
+                        "sku": row["vin"],
+                        "category": row["category"],
+                        "stock": row["current_stock"],
+                        "reorder_level": row["reorder_level"],
+                        "shortfall": row["shortfall"],
+                    }
+                    for row in page_obj
+                ],
+            }
+        )
+
+
+class VendorProductImportView(SellerAccountRequiredMixin, VendorAccessMixin, View):
+    http_method_names = ["get", "post"]
+
+    def get(self, request, *args, **kwargs):
+        response = HttpResponse(product_import_template_csv(), content_type="text/csv")
+        response["Content-Disposition"] = 'attachment; filename="product-import-template.csv"'
+        return response
+
+    def post(self, request, *args, **kwargs):
+        is_ajax = request.headers.get("X-Requested-With") == "XMLHttpRequest"
+        form = ProductImportForm(request.POST, request.FILES)
+        error_text = ""
+        if not form.is_valid():
+            error_text = str(next(iter(form.errors.values()))[0])
+        else:
+            try:
+                report = import_vendor_products(request.user, form.cleaned_data["file"])
+            except ProductImportError as exc:
+                error_text = str(exc)
+        if error_text:
+            if is_ajax:
+                return JsonResponse({"ok": False, "message": error_text}, status=422)
+            messages.error(request, error_text)
+            return redirect("vendor_products")
+
+        success_message = (
+            f"Imported {report['created_count']} of {report['total_rows']} products."
+        )
+        if report["created_count"]:
+            success_message += " They stay hidden from the shop until you upload their images."
+        if report["error_count"]:
+            success_message += f" {report['error_count']} rows had errors."
+        if is_ajax:
+            return JsonResponse(
+                {
+                    "ok": True,
+                    "message": success_message,
+                    "count": request.user.products.count(),
+                    **report,
+                }
+            )
+        if report["error_count"]:
+            messages.warning(request, success_message)
+        else:
+            messages.success(request, success_message)
+        return redirect("vendor_products")
+
+
+class VendorProductImageImportView(SellerAccountRequiredMixin, VendorAccessMixin, View):
+    http_method_names = ["post"]
+
+    def post(self, request, *args, **kwargs):
+        is_ajax = request.headers.get("X-Requested-With") == "XMLHttpRequest"
+        form = ProductImageArchiveForm(request.POST, request.FILES)
+        error_text = ""
+        if not form.is_valid():
+            error_text = str(next(iter(form.errors.values()))[0])
+        else:
+            try:
+                report = import_vendor_product_images(request.user, form.cleaned_data["archive"])
+            except ProductImportError as exc:
+                error_text = str(exc)
+        if error_text:
+            if is_ajax:
+                return JsonResponse({"ok": False, "message": error_text}, status=422)
+            messages.error(request, error_text)
+            return redirect("vendor_products")
+
+        success_message = (
+            f"Attached {report['updated_count']} of {report['total_entries']} images."
+        )
+        if report["error_count"]:
+            success_message += f" {report['error_count']} files had errors."
+        if is_ajax:
+            return JsonResponse({"ok": True, "message": success_message, **report})
+        if report["error_count"]:
+            messages.warning(request, success_message)
+        else:
+            messages.success(request, success_message)
+        return redirect("vendor_products")
+
+
 class HtmxTemplateMixin:
     full_template_name = ""
     partial_template_name = ""
@@ -1788,13 +2150,6 @@ class HtmxTemplateMixin:
             return HttpResponseClientRedirect(url)
         return HttpResponseRedirect(url)
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        language = get_request_language(self.request)
-        context["shop_language"] = language
-        context["ui_text"] = get_ui_text(language)
-        return context
-
 
 class AccountSettingsView(LoginRequiredMixin, TemplateView):
     login_url = reverse_lazy("login")
@@ -1824,12 +2179,12 @@ class AccountSettingsView(LoginRequiredMixin, TemplateView):
                 messages.error(request, "All profile fields are required.")
                 return redirect("account_settings")
 
-            username_exists = User.objects.filter(username__iexact=username).exclude(pk=user.id).exists()
+            username_exists = users_with_username(username).exclude(pk=user.id).exists()
             if username_exists:
                 messages.error(request, "Username is already taken.")
                 return redirect("account_settings")
 
-            email_exists = User.objects.filter(email__iexact=email).exclude(pk=user.id).exists()
+            email_exists = users_with_email(email).exclude(pk=user.id).exists()
             if email_exists:
                 messages.error(request, "Email is already registered.")
                 return redirect("account_settings")
@@ -2035,7 +2390,11 @@ class ForgotPasswordView(HtmxTemplateMixin, FormView):
 
     def form_valid(self, form):
         email = form.cleaned_data["email"]
-        User.objects.filter(email__iexact=email).exists()
+        # The reply is the same whether or not the address is known, and the mail
+        # itself goes out through the outbox worker, so this returns at once.
+        for user in users_with_email(email).filter(is_active=True):
+            if user.has_usable_password():
+                queue_password_reset_email(self.request, user)
         messages.success(
             self.request,
             "If an account exists for that email, a reset link has been sent.",
@@ -2043,13 +2402,54 @@ class ForgotPasswordView(HtmxTemplateMixin, FormView):
         return self.client_redirect(self.get_success_url())
 
 
+class ResetPasswordView(HtmxTemplateMixin, FormView):
+    full_template_name = "auth/reset_password.html"
+    partial_template_name = "auth/partials/reset_password_content.html"
+    form_class = SetPasswordForm
+    success_url = reverse_lazy("login")
+
+    def dispatch(self, request, *args, **kwargs):
+        superuser_redirect = _redirect_superuser_home(request)
+        if superuser_redirect:
+            return superuser_redirect
+
+        try:
+            user_id = urlsafe_base64_decode(kwargs.get("uidb64", "")).decode()
+            self.reset_user = User.objects.get(pk=user_id, is_active=True)
+        except (TypeError, ValueError, OverflowError, User.DoesNotExist):
+            self.reset_user = None
+        if self.reset_user is None or not default_token_generator.check_token(
+            self.reset_user, kwargs.get("token", "")
+        ):
+            messages.error(request, "This password reset link is invalid or has expired.")
+            return redirect("forgot_password")
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs["user"] = self.reset_user
+        return kwargs
+
+    def form_valid(self, form):
+        form.save()
+        messages.success(self.request, "Your password has been reset. You can sign in now.")
+        return self.client_redirect(self.get_success_url())
+
+    def form_invalid(self, form):
+        for errors in form.errors.values():
+            for error in errors:
+                messages.error(self.request, error)
+        return super().form_invalid(form)
+
+
 class LogoutView(LoginRequiredMixin, View):
     login_url = reverse_lazy("login")
     http_method_names = ["post"]
 
     def post(self, request, *args, **kwargs):
-        language = normalize_language(request.session.get(SESSION_LANGUAGE_KEY))
+        language = request.session.get(SESSION_LANGUAGE_KEY)
         logout(request)
-        request.session[SESSION_LANGUAGE_KEY] = language
+        if language:
+            request.session[SESSION_LANGUAGE_KEY] = normalize_language(language)
         messages.success(request, "You have been signed out successfully.")
         return redirect("login")
@@ -10,12 +10,24 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 
+def env_choice(name, choices, default):
+    value = os.environ.get(name, default)
+    if value not in choices:
+        raise ImproperlyConfigured(
+            f"{name}={value!r} is not valid; use one of: {', '.join(sorted(choices))}."
+        )
+    return choices[value]
+
+
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/6.0/howto/deployment/checklist/
 
@@ -43,12 +55,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'App.instrumentation.RequestInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'App.i18n.LanguageVaryMiddleware',
     'django_htmx.middleware.HtmxMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'App.profiling.RequestProfilerMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -89,6 +104,168 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+#
+# "default" and "sessions" must be shared by every worker process, because
+# cross-process invalidation (product caches, the site announcement version,
+# cached_db sessions) relies on it. Set WEBAPP_REDIS_URL to keep them in Redis;
+# without it they fall back to files under .cache/, where every hit is a disk
+# read. "fragments" holds only version-keyed entries (rendered product cards)
+# that never need invalidating, so each process keeps its own copy in memory.
+# The App.cache_backends classes are Django's backends plus hit/miss counters
+# for /metrics/, labelled with METRICS_LABEL.
+
+REDIS_URL = os.environ.get('WEBAPP_REDIS_URL', '')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'App.cache_backends.MeteredRedisCache',
+            'METRICS_LABEL': 'default',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'webapp',
+        },
+        'sessions': {
+            'BACKEND': 'App.cache_backends.MeteredRedisCache',
+            'METRICS_LABEL': 'sessions',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'webapp-sessions',
+            'TIMEOUT': None,
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'App.cache_backends.MeteredFileBasedCache',
+            'METRICS_LABEL': 'default',
+            'LOCATION': BASE_DIR / '.cache' / 'default',
+        },
+        'sessions': {
+            'BACKEND': 'App.cache_backends.MeteredFileBasedCache',
+            'METRICS_LABEL': 'sessions',
+            'LOCATION': BASE_DIR / '.cache' / 'sessions',
+            'TIMEOUT': None,
+        },
+    }
+CACHES['fragments'] = {
+    'BACKEND': 'App.cache_backends.MeteredLocMemCache',
+    'METRICS_LABEL': 'fragments',
+    'LOCATION': 'fragments',
+    'TIMEOUT': 86400,
+    'OPTIONS': {'MAX_ENTRIES': 20000},
+}
+
+
+# Sessions
+# https://docs.djangoproject.com/en/6.0/topics/http/sessions/
+#
+# WEBAPP_SESSION_BACKEND picks where sessions are stored:
+#   "cached_db"      - reads served from the "sessions" cache; every modified session
+#                      is still written to the DB as well (default)
+#   "cache"          - "sessions" cache only, never touches django_session
+#   "signed_cookies" - no server-side storage; suits anonymous language-only sessions
+#   "db"             - django_session only (Django's default)
+# Expired django_session rows are removed by `python manage.py prune_sessions`.
+# App.session_backends wraps each of Django's engines to count session writes.
+
+SESSION_ENGINES = {
+    'cached_db': 'App.session_backends.cached_db',
+    'cache': 'App.session_backends.cache',
+    'signed_cookies': 'App.session_backends.signed_cookies',
+    'db': 'App.session_backends.db',
+}
+SESSION_ENGINE = env_choice('WEBAPP_SESSION_BACKEND', SESSION_ENGINES, 'cached_db')
+SESSION_CACHE_ALIAS = 'sessions'
+
+
+# Background tasks
+#
+# Side effects queued with App.tasks.enqueue_task run right after the request's
+# transaction commits, so nothing waits on a worker that is not deployed. Set
+# WEBAPP_TASKS_EAGER=0 when `python manage.py run_tasks --interval 5` runs next to
+# the web server to store them in the database for the worker instead.
+
+BACKGROUND_TASKS_EAGER = os.environ.get('WEBAPP_TASKS_EAGER', '1') != '0'
+
+
+# Request metrics
+#
+# App.instrumentation.RequestInstrumentationMiddleware adds a Server-Timing header
+# (SQL count/time, template and context-processor time) to every response and
+# logs the same numbers as JSON on the "App.instrumentation" logger: INFO for
+# every request, WARNING when a view runs more queries than its query_budget.
+# WEBAPP_REQUEST_LOG_LEVEL=INFO logs every request; the default only logs
+# requests over budget.
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'App.instrumentation': {
+            'handlers': ['console'],
+            'level': os.environ.get('WEBAPP_REQUEST_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+    },
+}
+
+
+# Request profiler
+#
+# A superuser can add ?_profile=1 (sampled call stacks) or ?_profile=cprofile to
+# any URL, or send the same value in an X-Profile header. The request then runs
+# under the profiler and the report (collapsed stacks or cProfile stats, plus
+# every SQL statement with its EXPLAIN plan) is saved under REQUEST_PROFILE_DIR.
+# The response's X-Profile-Url header links to it. WEBAPP_REQUEST_PROFILER=0
+# removes the hook.
+
+REQUEST_PROFILER_ENABLED = os.environ.get('WEBAPP_REQUEST_PROFILER', '1') == '1'
+REQUEST_PROFILE_DIR = Path(os.environ.get('WEBAPP_PROFILE_DIR', BASE_DIR / '.profiles'))
+
+
+# Metrics
+#
+# /metrics/ serves Prometheus text: request latency, SQL and template time per URL
+# name, cache hit ratios, session writes and checkout outcomes. Every process
+# writes its counters to METRICS_DIR and a scrape adds them up, so all gunicorn
+# workers are counted. At scrape time the counts of exited workers are folded
+# into METRICS_DIR/_exited.json, so the totals never go down. Scrapes must send "Authorization: Bearer $WEBAPP_METRICS_TOKEN"; only with
+# DEBUG on may localhost scrape without a token.
+
+METRICS_DIR = Path(os.environ.get('WEBAPP_METRICS_DIR', BASE_DIR / '.metrics'))
+METRICS_TOKEN = os.environ.get('WEBAPP_METRICS_TOKEN', '')
+
+
+# Email
+# https://docs.djangoproject.com/en/6.0/topics/email/
+#
+# Mail is never sent during a request: App.outbox queues it and
+# `python manage.py send_emails` delivers it over one SMTP connection per batch.
+# WEBAPP_EMAIL_BACKEND picks the transport:
+#   "console" - print messages to the worker's stdout (default)
+#   "file"    - write messages under .mail/, a stand-in for tests and staging
+#   "smtp"    - deliver through WEBAPP_EMAIL_HOST
+
+EMAIL_BACKENDS = {
+    'console': 'django.core.mail.backends.console.EmailBackend',
+    'file': 'django.core.mail.backends.filebased.EmailBackend',
+    'smtp': 'django.core.mail.backends.smtp.EmailBackend',
+}
+EMAIL_BACKEND = env_choice('WEBAPP_EMAIL_BACKEND', EMAIL_BACKENDS, 'console')
+EMAIL_FILE_PATH = BASE_DIR / '.mail'
+EMAIL_HOST = os.environ.get('WEBAPP_EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('WEBAPP_EMAIL_PORT', '587'))
+EMAIL_HOST_USER = os.environ.get('WEBAPP_EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.environ.get('WEBAPP_EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.environ.get('WEBAPP_EMAIL_USE_TLS', '1') == '1'
+EMAIL_TIMEOUT = 20
+DEFAULT_FROM_EMAIL = os.environ.get('WEBAPP_DEFAULT_FROM_EMAIL', 'Wahid parts <no-reply@localhost>')
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -25,6 +25,9 @@ from App.views import (
     AdminPricingOversightView,
     AdminProductSkuControlView,
     AdminSellerManagementView,
+    AdminRequestProfileView,
+    MetricsView,
+    AdminSalesExportView,
     AdminSellerVerificationUpdateView,
     AdminMessagesInboxView,
     AdminAnnouncementControlsView,
@@ -35,26 +38,38 @@ from App.views import (
     AdminSystemAdminCreateView,
     AdminSystemAdminStatusUpdateView,
     ForgotPasswordView,
+    ResetPasswordView,
     HomeView,
     LoginView,
     LogoutView,
     AccountSettingsView,
     ContactMessageCreateView,
     OrderCreateView,
+    ProductCatalogView,
+    ProductDetailView,
+    ProductLookupView,
     ProductRatingCreateView,
+    ProductSuggestionsView,
     BuyerOrderCancelView,
     BuyerDashboardView,
+    BuyerOrdersExportView,
     BuyerOrdersView,
     CategoryProductsView,
     SearchProductsView,
     SetLanguagePreferenceView,
+    UiTextBundleView,
     VendorOrderDeliveredUpdateView,
     VendorOrderUnacceptView,
     VendorProductDeleteView,
     VendorProductCreateView,
+    VendorStockAdjustmentView,
+    VendorLowStockView,
+    VendorProductImageImportView,
+    VendorProductImportView,
     VendorProductRowsView,
     VendorProductUpdateView,
     VendorAnalyticsView,
+    VendorOrdersExportView,
     VendorOrdersView,
     VendorProductsView,
     SignupView,
@@ -66,29 +81,43 @@ urlpatterns = [
     path('categories/', CategoryProductsView.as_view(), name='category_products'),
     path('search/', SearchProductsView.as_view(), name='search_products'),
     path('language/set/', SetLanguagePreferenceView.as_view(), name='set_language_preference'),
+    path('i18n/<str:language>/ui-text.<str:version>.js', UiTextBundleView.as_view(), name='ui_text_bundle'),
     path('login/', LoginView.as_view(), name='login'),
     path('logout/', LogoutView.as_view(), name='logout'),
     path('forgot-password/', ForgotPasswordView.as_view(), name='forgot_password'),
+    path('reset-password/<uidb64>/<token>/', ResetPasswordView.as_view(), name='reset_password'),
     path('signup/', SignupView.as_view(), name='signup'),
     path('account/settings/', AccountSettingsView.as_view(), name='account_settings'),
     path('vendor/', VendorDashboardView.as_view(), name='vendor_dashboard'),
     path('vendor/dashboard/', VendorDashboardView.as_view(), name='vendor_dashboard_home'),
     path('vendor/orders/', VendorOrdersView.as_view(), name='vendor_orders'),
+    path('vendor/orders/export/', VendorOrdersExportView.as_view(), name='vendor_orders_export'),
     path('vendor/orders/<int:pk>/delivered/', VendorOrderDeliveredUpdateView.as_view(), name='vendor_order_delivered_update'),
     path('vendor/orders/<int:pk>/unaccept/', VendorOrderUnacceptView.as_view(), name='vendor_order_unaccept'),
     path('vendor/products/', VendorProductsView.as_view(), name='vendor_products'),
     path('vendor/products/rows/', VendorProductRowsView.as_view(), name='vendor_product_rows'),
     path('vendor/products/create/', VendorProductCreateView.as_view(), name='vendor_product_create'),
+    path('vendor/products/import/', VendorProductImportView.as_view(), name='vendor_product_import'),
+    path('vendor/products/images/import/', VendorProductImageImportView.as_view(), name='vendor_product_image_import'),
+    path('vendor/products/stock/adjust/', VendorStockAdjustmentView.as_view(), name='vendor_stock_adjust'),
+    path('vendor/products/low-stock/', VendorLowStockView.as_view(), name='vendor_low_stock'),
     path('vendor/products/<int:pk>/update/', VendorProductUpdateView.as_view(), name='vendor_product_update'),
     path('vendor/products/<int:pk>/delete/', VendorProductDeleteView.as_view(), name='vendor_product_delete'),
     path('vendor/analytics/', VendorAnalyticsView.as_view(), name='vendor_analytics'),
     path('buyer/dashboard/', BuyerDashboardView.as_view(), name='buyer_dashboard'),
     path('buyer/orders/', BuyerOrdersView.as_view(), name='buyer_orders'),
+    path('buyer/orders/export/', BuyerOrdersExportView.as_view(), name='buyer_orders_export'),
     path('orders/create/', OrderCreateView.as_view(), name='order_create'),
     path('contact/messages/create/', ContactMessageCreateView.as_view(), name='contact_message_create'),
+    path('products/catalog/', ProductCatalogView.as_view(), name='product_catalog'),
+    path('products/lookup/', ProductLookupView.as_view(), name='product_lookup'),
+    path('products/suggest/', ProductSuggestionsView.as_view(), name='product_suggestions'),
+    path('products/<str:sku>/detail/', ProductDetailView.as_view(), name='product_detail'),
     path('products/<str:sku>/rate/', ProductRatingCreateView.as_view(), name='product_rate'),
     path('orders/<int:pk>/cancel/', BuyerOrderCancelView.as_view(), name='buyer_order_cancel'),
     path('admin/dashboard/', AdminDashboardView.as_view(), name='admin_dashboard'),
+    path('admin/sales/export/', AdminSalesExportView.as_view(), name='admin_sales_export'),
+    path('admin/profiles/<str:profile_id>/', AdminRequestProfileView.as_view(), name='admin_request_profile'),
     path('admin/seller-management/', AdminSellerManagementView.as_view(), name='admin_seller_management'),
     path('admin/seller-management/<int:pk>/verification/', AdminSellerVerificationUpdateView.as_view(), name='admin_seller_verification_update'),
     path('admin/product-sku-control/', AdminProductSkuControlView.as_view(), name='admin_product_sku_control'),
@@ -104,6 +133,7 @@ urlpatterns = [
     path('admin/system-controls/categories/create/', AdminProductCategoryCreateView.as_view(), name='admin_product_category_create'),
     path('admin/system-controls/categories/<int:pk>/visibility/', AdminProductCategoryVisibilityUpdateView.as_view(), name='admin_product_category_visibility_update'),
     path('admin/', admin.site.urls),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
 ]
 
 if settings.DEBUG:
@@ -24,6 +24,7 @@ function normalizeProduct(raw = {}) {
     badges: Array.isArray(raw.badges) ? raw.badges.map((v) => String(v)) : [],
     oem: String(raw.oem || raw.sku || raw.vin || ""),
     img: String(raw.img || ""),
+    summary: String(raw.summary || ""),
     desc: String(raw.desc || raw.description || ""),
   };
 }
@@ -51,6 +52,8 @@ function readRatingContext() {
       can_rate: false,
       login_url: "/login/",
       rate_url_template: "/products/__SKU__/rate/",
+      product_lookup_url: "/products/lookup/",
+      product_detail_url_template: "/products/__SKU__/detail/",
     };
   }
   try {
@@ -64,6 +67,12 @@ function readRatingContext() {
       rate_url_template: String(
         parsed.rate_url_template || "/products/__SKU__/rate/"
       ),
+      product_lookup_url: String(
+        parsed.product_lookup_url || "/products/lookup/"
+      ),
+      product_detail_url_template: String(
+        parsed.product_detail_url_template || "/products/__SKU__/detail/"
+      ),
     };
   } catch (e) {
     return {
@@ -73,11 +82,16 @@ function readRatingContext() {
       current_user_id: 0,
       login_url: "/login/",
       rate_url_template: "/products/__SKU__/rate/",
+      product_lookup_url: "/products/lookup/",
+      product_detail_url_template: "/products/__SKU__/detail/",
     };
   }
 }
 const RATING_CONTEXT = readRatingContext();
 function readUiText() {
+  if (window.SHOP_UI_TEXT && typeof window.SHOP_UI_TEXT === "object") {
+    return window.SHOP_UI_TEXT;
+  }
   const node = document.getElementById("home-ui-text");
   if (!node) return {};
   try {
@@ -119,6 +133,8 @@ let savedVehicle = loadLS(LS.vehicle, null); // {make, year} or null
 let ratedSkus = new Set(loadLS(LS.rated, [])); // [sku]
 let ratedSkuValues = loadLS(LS.rated_values, {}); // { [sku]: rating }
 let pendingRatingConfirm = null; // { sku, rating }
+let lookedUpProducts = {}; // { [sku]: product } fresh from the lookup endpoint
+let unavailableSkus = new Set(); // SKUs the lookup endpoint reported as gone
 
 // ==========================
 // HELPERS
@@ -151,7 +167,39 @@ const moneyFormatter = new Intl.NumberFormat("en-US", {
   maximumFractionDigits: 2,
 });
 const money = (n) => `${moneyFormatter.format(Number(n) || 0)} ETB`;
-const bySku = (sku) => PRODUCTS.find((p) => p.sku === String(sku));
+const bySku = (sku) =>
+  lookedUpProducts[String(sku)] || PRODUCTS.find((p) => p.sku === String(sku));
+
+// Refresh price/stock/rating for the given SKUs in one batched request so the
+// cart and compare panels do not depend on the page's product list.
+async function refreshProductsBySku(skus) {
+  const wanted = [...new Set((skus || []).map((sku) => String(sku || "")))]
+    .filter(Boolean)
+    .slice(0, 50);
+  if (wanted.length === 0) return;
+
+  const params = new URLSearchParams();
+  wanted.forEach((sku) => params.append("sku", sku));
+  try {
+    const response = await fetch(
+      `${RATING_CONTEXT.product_lookup_url}?${params.toString()}`,
+      { headers: { Accept: "application/json" } }
+    );
+    if (!response.ok) return;
+    const data = await response.json();
+    Object.values(data.products || {}).forEach((raw) => {
+      const product = normalizeProduct(raw);
+      lookedUpProducts[product.sku] = product;
+      unavailableSkus.delete(product.sku);
+    });
+    (data.missing || []).forEach((sku) => {
+      delete lookedUpProducts[String(sku)];
+      unavailableSkus.add(String(sku));
+    });
+  } catch (e) {
+    // Keep showing the last known data when the lookup fails.
+  }
+}
 const truncateWords = (text, maxWords = 14) => {
   const words = String(text || "")
     .trim()
@@ -577,6 +625,37 @@ function renderSkeletons(n = 6) {
 // ==========================
 // RENDER: PRODUCTS
 // ==========================
+function fitHintHtml() {
+  return savedVehicle && savedVehicle.make
+    ? `<span class="badge badge-ghost ml-2">Fitment: saved</span>`
+    : ``;
+}
+function rateSlotHtml(sku, ownerId) {
+  const cleanSku = String(sku || "").trim();
+  if (
+    Number(ownerId || 0) > 0 &&
+    Number(ownerId || 0) === Number(RATING_CONTEXT.current_user_id || 0)
+  ) {
+    return '<span class="muted small">Own product</span>';
+  }
+  if (ratedSkus.has(cleanSku)) return ratedStateHtml(cleanSku);
+  return RATING_CONTEXT.can_rate ? openRateNowLinkHtml(sku) : "";
+}
+
+// Cards rendered by the server are shared by every visitor, so only the
+// per-visitor bits (rating state, saved vehicle) are filled in here.
+function hydrateServerProductCards() {
+  const grid = $("#productGrid");
+  const fitHint = fitHintHtml();
+  grid.find(".js-rate-slot").each(function () {
+    const slot = $(this);
+    slot.html(rateSlotHtml(slot.attr("data-sku"), slot.attr("data-owner-id")));
+  });
+  grid.find(".js-fit-slot").html(fitHint);
+  $("#resultCount").text(grid.find(".product-card").length);
+  if (window.AOS) AOS.refresh();
+}
+
 function renderProducts(items) {
   const grid = $("#productGrid");
   grid.empty();
@@ -607,10 +686,7 @@ function renderProducts(items) {
     const sellerName = p.seller_name || p.brand || t("js_unknown_seller", "Unknown Seller");
     const sellerPhoto = p.seller_photo || sellerAvatarDataUri(sellerName);
 
-    const fitHint =
-      savedVehicle && savedVehicle.make
-        ? `<span class="badge badge-ghost ml-2">Fitment: saved</span>`
-        : ``;
+    const fitHint = fitHintHtml();
 
     grid.append(`
           <div class="col-sm-6 col-lg-3 mb-4" data-aos="fade-up" data-aos-delay="${delay}">
@@ -655,21 +731,12 @@ function renderProducts(items) {
       p.reviews
     })</span></div>
                   <div class="ml-2">
-                    ${
-                      Number(p.owner_id || 0) > 0 &&
-                      Number(p.owner_id || 0) === Number(RATING_CONTEXT.current_user_id || 0)
-                        ? '<span class="muted small">Own product</span>'
-                        : ratedSkus.has(String(p.sku || "").trim())
-                        ? ratedStateHtml(String(p.sku || "").trim())
-                        : RATING_CONTEXT.can_rate
-                        ? openRateNowLinkHtml(p.sku)
-                        : ""
-                    }
+                    ${rateSlotHtml(p.sku, p.owner_id)}
                   </div>
                 </div>
 
                 <div class="muted small mt-2" style="min-height:42px">
-                  ${escapeHtml(truncateWords(p.desc, 12))}
+                  ${escapeHtml(p.summary || truncateWords(p.desc, 12))}
                 </div>
 
                 <div class="mt-3 muted small">
@@ -701,14 +768,36 @@ function renderProducts(items) {
 // ==========================
 // QUICK VIEW
 // ==========================
-function openQuickView(sku) {
+// Listing entries carry a short summary only; the full description and seller
+// details are fetched once per SKU when the quick view is first opened.
+async function loadProductDetail(p) {
+  if (p.desc) return;
+  const url = RATING_CONTEXT.product_detail_url_template.replace(
+    "__SKU__",
+    encodeURIComponent(p.sku)
+  );
+  try {
+    const response = await fetch(url, { headers: { Accept: "application/json" } });
+    if (!response.ok) return;
+    const data = await response.json();
+    const detail = normalizeProduct(data.product || {});
+    p.desc = detail.desc;
+    p.seller_name = detail.seller_name;
+    p.seller_photo = detail.seller_photo || p.seller_photo;
+  } catch (e) {
+    // Fall back to the card summary below.
+  }
+}
+
+async function openQuickView(sku) {
   const p = bySku(sku);
   if (!p) return;
+  await loadProductDetail(p);
 
   $("#qvTitle").text(p.name);
   $("#qvImg").attr("src", p.img);
   $("#qvPrice").text(money(p.price));
-  $("#qvDesc").text(p.desc);
+  $("#qvDesc").text(p.desc || p.summary);
   $("#qvSku").text(p.sku);
   $("#qvSellerName").text(p.seller_name || p.brand || t("js_unknown_seller", "Unknown Seller"));
   $("#qvSellerPhoto")
@@ -907,9 +996,9 @@ function renderCartTable() {
   if (!tbody.length) return;
   tbody.empty();
 
-  if (PRODUCTS.length > 0) {
+  if (unavailableSkus.size > 0) {
     const previousCount = cart.length;
-    cart = cart.filter((item) => !!bySku(item.sku));
+    cart = cart.filter((item) => !unavailableSkus.has(String(item.sku)));
     if (cart.length !== previousCount) {
       saveLS(LS.cart, cart);
     }
@@ -1324,16 +1413,31 @@ $(function () {
     });
   }
 
-  // skeleton then render (gives "premium" feel)
-  renderSkeletons(6);
-  setTimeout(() => {
-    resetAll();
-  }, 350);
+  if ($("#productGrid").is("[data-server-rendered]")) {
+    hydrateServerProductCards();
+  } else {
+    // skeleton then render (gives "premium" feel)
+    renderSkeletons(6);
+    setTimeout(() => {
+      resetAll();
+    }, 350);
+  }
 
   // init UI
   renderCartBadge();
   renderCartTable();
   renderCompareUI();
+  refreshProductsBySku([...cart.map((item) => item.sku), ...compare]).then(() => {
+    renderCartBadge();
+    renderCartTable();
+    renderCompareUI();
+  });
+  $("#cartModal").on("show.bs.modal", () => {
+    refreshProductsBySku(cart.map((item) => item.sku)).then(() => {
+      renderCartBadge();
+      renderCartTable();
+    });
+  });
   renderFitmentRecs();
   updateSavedVehicleBadge();
 